@@ -1,8 +1,90 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
+import time
+from functools import cached_property
+from typing import List, Dict, Any, Optional, Sequence
+
+from langchain_core.messages import BaseMessage, message_chunk_to_message
+
+from agents.llm_cache import LLMResponseCache, llm_cache
+from agents.client_pool import ClientPool, LLM_BACKEND, client_pool
+from telemetry.tracing import span, record_span
 
 class BaseAgent:
     """Parent class for all agents to handle model init and state binding."""
-    def __init__(self, name: str, model_name: str = "gemini-2.5-flash"):
+    # JSON schemas of bound tools, part of the response cache key
+    tool_schemas: List[Dict] = []
+
+    def __init__(self, name: str, model_name: str = "gemini-2.5-flash", cache: LLMResponseCache = llm_cache,
+                 backend: str = LLM_BACKEND, pool: ClientPool = client_pool):
         self.name = name
-        # Using gemini-1.5-flash: fast and free tier available
-        self.llm = ChatGoogleGenerativeAI(model=model_name, temperature=0)
+        self.model_name = model_name
+        self.backend = backend
+        # temperature=0 makes responses cacheable; None disables caching
+        self.cache = cache
+        self.pool = pool
+
+    @cached_property
+    def llm(self):
+        """
+        Shared model client from the pool, fetched on first use: agents
+        served by templates or direct dispatch never build one.
+        """
+        return self.pool.client(self.model_name, self.backend)
+
+    def _cache_key(self, messages: Sequence[BaseMessage]):
+        if self.cache is None:
+            return None
+        return self.cache.key(messages, f"{self.backend}/{self.model_name}", self.tool_schemas)
+
+    def _invoke(self, runnable: Any, messages: Sequence[BaseMessage],
+                key_messages: Optional[Sequence[BaseMessage]] = None) -> BaseMessage:
+        """
+        Invokes the model through the shared response cache, recording an llm
+        span. key_messages is the full prompt when part of it is sent by
+        reference (a cached context prefix).
+        """
+        with span("llm", self.name, model=self.model_name) as record:
+            key = self._cache_key(key_messages or messages)
+            cached = self.cache.get(key) if key else None
+            if cached is not None:
+                record["cache_hit"] = True
+                return cached
+
+            started = time.perf_counter()
+            response, record["retries"] = self.pool.invoke(runnable, messages, self.tool_schemas)
+            if key:
+                self.cache.put(key, response, time.perf_counter() - started)
+            _record_usage(record, response)
+            return response
+
+    async def _ainvoke(self, runnable: Any, messages: Sequence[BaseMessage],
+                       key_messages: Optional[Sequence[BaseMessage]] = None) -> BaseMessage:
+        """Async variant of _invoke."""
+        with span("llm", self.name, model=self.model_name) as record:
+            key = self._cache_key(key_messages or messages)
+            cached = self.cache.get(key) if key else None
+            if cached is not None:
+                record["cache_hit"] = True
+                return cached
+
+            started = time.perf_counter()
+            response, record["retries"] = await self.pool.ainvoke(runnable, messages, self.tool_schemas)
+            if key:
+                self.cache.put(key, response, time.perf_counter() - started)
+            _record_usage(record, response)
+            return response
+
+    def _stream_finished(self, key, started: float, message: BaseMessage) -> None:
+        """Caches a fully streamed answer and records its llm span."""
+        elapsed = time.perf_counter() - started
+        message = message_chunk_to_message(message)
+        if key:
+            self.cache.put(key, message, elapsed)
+        usage = {}
+        _record_usage(usage, message)
+        record_span("llm", self.name, elapsed * 1000, model=self.model_name, streamed=True, **usage)
+
+def _record_usage(record: Dict[str, Any], response: BaseMessage) -> None:
+    usage = getattr(response, "usage_metadata", None) or {}
+    record["input_tokens"] = usage.get("input_tokens", 0)
+    record["output_tokens"] = usage.get("output_tokens", 0)
+    record["cached_tokens"] = (usage.get("input_token_details") or {}).get("cache_read", 0)
@@ -0,0 +1,256 @@
+"""
+One shared, rate-limited model client pool for every agent.
+
+Agents used to build a chat model each; now they share one client per
+(backend, model), so HTTP connections are reused and a single limiter sees
+all traffic. Calls go through token buckets (requests/min and tokens/min),
+a concurrency cap and jittered exponential retries. A 429 pauses every
+caller for the backoff delay instead of letting each retry on its own.
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+import weakref
+from typing import Dict, Any, Optional, Sequence, Tuple, Iterator, AsyncIterator
+
+from langchain_core.messages import BaseMessage, BaseMessageChunk
+from langchain_core.exceptions import ModelRateLimitError
+
+# TALENTFLOW_LLM_BACKEND=fake runs fully offline against a deterministic local model
+LLM_BACKEND = os.getenv("TALENTFLOW_LLM_BACKEND", "gemini")
+
+def make_chat_model(model_name: str, backend: str = LLM_BACKEND):
+    """Builds the chat model for a backend ('gemini' or 'fake')."""
+    if backend == "gemini":
+        # Imported here: the Gemini SDK is the slowest import of a cold start
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        # Using gemini-1.5-flash: fast and free tier available
+        # Retries are coordinated by the pool, so the SDK only makes one attempt
+        return ChatGoogleGenerativeAI(model=model_name, temperature=0, max_retries=1)
+    if backend == "fake":
+        from agents.fake_llm import FakeOnboardingChatModel
+        latency_ms = float(os.getenv("TALENTFLOW_FAKE_LATENCY_MS", "0"))
+        return FakeOnboardingChatModel(latency=latency_ms / 1000)
+    raise ValueError(f"Unknown TALENTFLOW_LLM_BACKEND '{backend}' (expected 'gemini' or 'fake')")
+
+
+def estimate_tokens(messages: Sequence[BaseMessage], tools: Sequence[Dict] = ()) -> int:
+    """Rough prompt size (4 chars per token) used to reserve quota before a call."""
+    chars = sum(len(str(m.content)) for m in messages) + (len(json.dumps(list(tools))) if tools else 0)
+    return max(1, chars // 4)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, 5xx, timeouts and dropped connections are worth another attempt."""
+    return bool(getattr(error, "is_retryable", False)) or isinstance(error, (TimeoutError, ConnectionError))
+
+
+class TokenBucket:
+    """
+    Refills `per_minute` units per minute up to `burst`. Callers reserve
+    first and then sleep off any deficit, so waiters queue in arrival order
+    without polling.
+    """
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self.rate = per_minute / 60
+        self.capacity = burst or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Takes `amount` units and returns how many seconds to wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # A single request larger than the bucket would otherwise never fit
+            self.tokens -= min(amount, self.capacity)
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def adjust(self, amount: float) -> None:
+        """Charges (positive) or refunds (negative) units after the fact, e.g. actual vs estimated tokens."""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class ClientPool:
+    """Shared chat models plus the limiter every model call goes through."""
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 max_concurrency: int = 32, max_attempts: int = 5,
+                 base_delay: float = 0.5, max_delay: float = 30.0):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._clients: Dict[Tuple[str, str], Any] = {}
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        # asyncio semaphores belong to one event loop, so keep one per loop
+        self._async_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+            weakref.WeakKeyDictionary()
+        self._cooldown_until = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "rate_limited": 0, "throttled_s": 0.0}
+
+    def client(self, model_name: str, backend: str = LLM_BACKEND):
+        """The shared chat model for (backend, model); agents bind their own tools on top of it."""
+        key = (backend, model_name)
+        model = self._clients.get(key)
+        if model is None:
+            with self._lock:
+                model = self._clients.get(key)
+                if model is None:
+                    model = self._clients[key] = make_chat_model(model_name, backend)
+        return model
+
+    # ----- Calls -----
+    def invoke(self, runnable: Any, messages: Sequence[BaseMessage], tools: Sequence[Dict] = ()) -> Tuple[BaseMessage, int]:
+        """Invokes `runnable` under the limits. Returns the response and the number of retries it took."""
+        estimate = estimate_tokens(messages, tools)
+        for attempt in range(self.max_attempts):
+            time.sleep(self._admission_delay(estimate))
+            try:
+                with self._semaphore:
+                    response = runnable.invoke(messages)
+            except Exception as e:
+                if not is_retryable(e) or attempt + 1 == self.max_attempts:
+                    raise
+                time.sleep(self._backoff(e, attempt))
+                continue
+            self._settle(estimate, getattr(response, "usage_metadata", None))
+            return response, attempt
+
+    async def ainvoke(self, runnable: Any, messages: Sequence[BaseMessage],
+                      tools: Sequence[Dict] = ()) -> Tuple[BaseMessage, int]:
+        """Async variant of invoke."""
+        estimate = estimate_tokens(messages, tools)
+        for attempt in range(self.max_attempts):
+            await asyncio.sleep(self._admission_delay(estimate))
+            try:
+                async with self._async_semaphore():
+                    response = await runnable.ainvoke(messages)
+            except Exception as e:
+                if not is_retryable(e) or attempt + 1 == self.max_attempts:
+                    raise
+                await asyncio.sleep(self._backoff(e, attempt))
+                continue
+            self._settle(estimate, getattr(response, "usage_metadata", None))
+            return response, attempt
+
+    def stream(self, runnable: Any, messages: Sequence[BaseMessage], tools: Sequence[Dict] = ()) -> Iterator[BaseMessageChunk]:
+        """
+        Streams `runnable` under the rate limits. Retries only happen before
+        the first chunk, and the concurrency cap is not held, since a stream
+        may be consumed across several graph steps.
+        """
+        estimate = estimate_tokens(messages, tools)
+        for attempt in range(self.max_attempts):
+            time.sleep(self._admission_delay(estimate))
+            chunks = iter(runnable.stream(messages))
+            try:
+                first = next(chunks, None)
+                break
+            except Exception as e:
+                if not is_retryable(e) or attempt + 1 == self.max_attempts:
+                    raise
+                time.sleep(self._backoff(e, attempt))
+
+        usage: Dict[str, int] = {}
+        if first is not None:
+            _add_usage(usage, first)
+            yield first
+        for chunk in chunks:
+            _add_usage(usage, chunk)
+            yield chunk
+        self._settle(estimate, usage)
+
+    async def astream(self, runnable: Any, messages: Sequence[BaseMessage],
+                      tools: Sequence[Dict] = ()) -> AsyncIterator[BaseMessageChunk]:
+        """Async variant of stream."""
+        estimate = estimate_tokens(messages, tools)
+        for attempt in range(self.max_attempts):
+            await asyncio.sleep(self._admission_delay(estimate))
+            chunks = runnable.astream(messages).__aiter__()
+            try:
+                first = await anext(chunks, None)
+                break
+            except Exception as e:
+                if not is_retryable(e) or attempt + 1 == self.max_attempts:
+                    raise
+                await asyncio.sleep(self._backoff(e, attempt))
+
+        usage: Dict[str, int] = {}
+        if first is not None:
+            _add_usage(usage, first)
+            yield first
+        async for chunk in chunks:
+            _add_usage(usage, chunk)
+            yield chunk
+        self._settle(estimate, usage)
+
+    def _async_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._async_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._async_semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    def _admission_delay(self, estimate: int) -> float:
+        """Reserves one request and `estimate` tokens; returns the wait for quota or cooldown."""
+        delay = max(0.0, self._cooldown_until - time.monotonic())
+        if self.requests:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens:
+            delay = max(delay, self.tokens.reserve(estimate))
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["throttled_s"] += delay
+        return delay
+
+    def _backoff(self, error: BaseException, attempt: int) -> float:
+        """Full-jitter exponential delay. Rate limits pause every caller, not just this one."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        with self._lock:
+            self._stats["retries"] += 1
+            if isinstance(error, ModelRateLimitError):
+                self._stats["rate_limited"] += 1
+                self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+        return delay
+
+    def _settle(self, estimate: int, usage: Optional[Dict[str, int]]) -> None:
+        """Corrects the token reservation with the usage the provider reported."""
+        if self.tokens and usage:
+            self.tokens.adjust(usage.get("total_tokens", estimate) - estimate)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "throttled_s": round(self._stats["throttled_s"], 3), "clients": len(self._clients)}
+
+
+def _add_usage(total: Dict[str, int], chunk: BaseMessage) -> None:
+    """Sums streamed usage (providers report it per chunk, usually on the last one)."""
+    for field, value in (getattr(chunk, "usage_metadata", None) or {}).items():
+        if isinstance(value, int):
+            total[field] = total.get(field, 0) + value
+
+
+def make_client_pool() -> ClientPool:
+    """
+    Limits come from TALENTFLOW_LLM_RPM / TALENTFLOW_LLM_TPM (0 = unlimited,
+    the default for the fake backend), TALENTFLOW_LLM_CONCURRENCY and
+    TALENTFLOW_LLM_MAX_ATTEMPTS.
+    """
+    gemini = LLM_BACKEND == "gemini"
+    return ClientPool(
+        requests_per_minute=float(os.getenv("TALENTFLOW_LLM_RPM", "1000" if gemini else "0")),
+        tokens_per_minute=float(os.getenv("TALENTFLOW_LLM_TPM", "1000000" if gemini else "0")),
+        max_concurrency=int(os.getenv("TALENTFLOW_LLM_CONCURRENCY", "32")),
+        max_attempts=int(os.getenv("TALENTFLOW_LLM_MAX_ATTEMPTS", "5")),
+    )
+
+client_pool = make_client_pool()
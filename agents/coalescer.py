@@ -0,0 +1,134 @@
+"""
+Micro-batching of model calls across concurrent hires.
+
+A RequestCoalescer sits in front of a runnable (a worker's tool-bound
+model). Calls arriving within a short window, up to a maximum batch size,
+are sent together through the runnable's batch interface and each result is
+handed back to the caller that asked for it.
+"""
+import os
+import asyncio
+import threading
+import weakref
+from typing import List, Dict, Any, Optional, Set
+
+# TALENTFLOW_COALESCE_WINDOW_MS=0 (default) sends every call on its own
+COALESCE_WINDOW_MS = float(os.getenv("TALENTFLOW_COALESCE_WINDOW_MS", "0"))
+COALESCE_MAX_BATCH = int(os.getenv("TALENTFLOW_COALESCE_MAX_BATCH", "16"))
+
+
+class _Request:
+    __slots__ = ("input", "result", "error", "done")
+
+    def __init__(self, input: Any):
+        self.input = input
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+
+class RequestCoalescer:
+    """Runnable-like wrapper: invoke/ainvoke calls are gathered and run as batches."""
+    def __init__(self, runnable: Any, window: float = 0.005, max_batch: int = 16):
+        self.runnable = runnable
+        self.window = window
+        self.max_batch = max_batch
+        # Sync callers: the first request of a batch leads it and runs the call
+        self._pending: List[_Request] = []
+        self._cond = threading.Condition()
+        # Async callers: one pending batch per event loop
+        self._async_pending: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, List]" = weakref.WeakKeyDictionary()
+        # The window timer of each loop's pending batch, cancelled when the batch fills up first
+        self._timers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.TimerHandle]" = \
+            weakref.WeakKeyDictionary()
+        self._tasks: Set[asyncio.Task] = set()
+        self._stats = {"requests": 0, "batches": 0}
+
+    # ----- Sync -----
+    def invoke(self, input: Any) -> Any:
+        request = _Request(input)
+        with self._cond:
+            self._pending.append(request)
+            leader = len(self._pending) == 1
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+
+        if leader:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._pending) >= self.max_batch, timeout=self.window)
+                batch, self._pending = self._pending, []
+            for start in range(0, len(batch), self.max_batch):
+                self._run(batch[start:start + self.max_batch])
+
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _run(self, batch: List[_Request]) -> None:
+        try:
+            outputs = self.runnable.batch([r.input for r in batch], return_exceptions=True)
+        except Exception as e:
+            outputs = [e] * len(batch)
+        self._record(len(batch))
+        for request, output in zip(batch, outputs):
+            if isinstance(output, Exception):
+                request.error = output
+            else:
+                request.result = output
+            request.done.set()
+
+    # ----- Async -----
+    async def ainvoke(self, input: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._async_pending.setdefault(loop, [])
+        pending.append((input, future))
+        if len(pending) == 1:
+            self._timers[loop] = loop.call_later(self.window, self._aflush, loop)
+        elif len(pending) >= self.max_batch:
+            self._aflush(loop)
+        return await future
+
+    def _aflush(self, loop: asyncio.AbstractEventLoop) -> None:
+        timer = self._timers.pop(loop, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._async_pending.pop(loop, None)
+        if batch:
+            task = loop.create_task(self._arun(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _arun(self, batch: List) -> None:
+        try:
+            outputs = await self.runnable.abatch([input for input, _ in batch], return_exceptions=True)
+        except Exception as e:
+            outputs = [e] * len(batch)
+        self._record(len(batch))
+        for (_, future), output in zip(batch, outputs):
+            # The waiting node may have been cancelled meanwhile
+            if future.done():
+                continue
+            if isinstance(output, Exception):
+                future.set_exception(output)
+            else:
+                future.set_result(output)
+
+    # ----- Stats -----
+    def _record(self, size: int) -> None:
+        with self._cond:
+            self._stats["requests"] += size
+            self._stats["batches"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            batches = self._stats["batches"]
+            return {**self._stats, "mean_batch": round(self._stats["requests"] / batches, 2) if batches else 0.0}
+
+
+def make_coalescer(runnable: Any) -> Any:
+    """Wraps `runnable` in a coalescer when TALENTFLOW_COALESCE_WINDOW_MS is set, else returns it unchanged."""
+    if COALESCE_WINDOW_MS <= 0:
+        return runnable
+    return RequestCoalescer(runnable, window=COALESCE_WINDOW_MS / 1000, max_batch=COALESCE_MAX_BATCH)
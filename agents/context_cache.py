@@ -0,0 +1,129 @@
+"""
+Static prompt prefixes sent by reference.
+
+Gemini can keep a prompt prefix server-side (context caching), so later
+requests send only the new messages. GeminiContextCache creates one cache
+per distinct prefix and renews it before it expires. LocalContextCache is
+an in-process stand-in used by the fake backend and tests.
+"""
+import os
+import time
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Set, Tuple, Any
+
+from langchain_core.messages import SystemMessage
+
+from agents.client_pool import LLM_BACKEND
+from telemetry.tracing import span
+
+
+class ContextCache(ABC):
+    """
+    Maps a system prompt to a cached-content handle. Prefixes shorter than
+    `min_tokens` (the provider's minimum) and prefixes whose cache could not
+    be created return None, meaning: send the prompt inline.
+
+    Creating a cache is a provider round trip, so it runs outside the lock
+    and only one caller creates each prefix's cache. Meanwhile other callers
+    keep using the previous handle while it is still valid, or send the
+    prompt inline. Creations are recorded as "context_cache" spans; a failed
+    one has outcome "error" and the reason in its trace record.
+    """
+    def __init__(self, ttl_seconds: float = 3600, min_tokens: int = 0):
+        self.ttl_seconds = ttl_seconds
+        self.min_tokens = min_tokens
+        self._handles: Dict[str, Tuple[str, float]] = {}
+        self._failed: Set[str] = set()
+        self._creating: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "created": 0, "inline": 0}
+
+    def handle(self, model: Any, system_prompt: str) -> Optional[str]:
+        if len(system_prompt) // 4 < self.min_tokens:
+            return self._inline()
+        key = hashlib.sha256(f"{getattr(model, 'model', '')}\n{system_prompt}".encode()).hexdigest()
+
+        with self._lock:
+            entry = self._handles.get(key)
+            now = time.time()
+            # Renew a minute early so a request never references an expired cache
+            if entry is not None and (entry[1] > now + 60 or (key in self._creating and entry[1] > now)):
+                self._stats["hits"] += 1
+                return entry[0]
+            if key in self._failed or key in self._creating:
+                self._stats["inline"] += 1
+                return None
+            self._creating.add(key)
+
+        name = None
+        try:
+            with span("context_cache", "create") as record:
+                try:
+                    name = self._create(model, system_prompt, key)
+                except Exception as e:
+                    # Not retried: this prefix is sent inline from now on
+                    record["outcome"], record["error"] = "error", f"{type(e).__name__}: {e}"
+        finally:
+            with self._lock:
+                self._creating.discard(key)
+                if name is None:
+                    self._failed.add(key)
+                    self._stats["inline"] += 1
+                else:
+                    self._handles[key] = (name, time.time() + self.ttl_seconds)
+                    self._stats["created"] += 1
+        return name
+
+    def _inline(self) -> None:
+        with self._lock:
+            self._stats["inline"] += 1
+        return None
+
+    @abstractmethod
+    def _create(self, model: Any, system_prompt: str, key: str) -> str:
+        """Creates the provider-side cache for a prefix and returns its handle."""
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+class GeminiContextCache(ContextCache):
+    """Server-side context caches through the Gemini caching API."""
+    def _create(self, model: Any, system_prompt: str, key: str) -> str:
+        from langchain_google_genai import create_context_cache
+        return create_context_cache(model, [SystemMessage(content=system_prompt)], ttl=f"{int(self.ttl_seconds)}s")
+
+
+class LocalContextCache(ContextCache):
+    """In-process stand-in: handles resolve back to their prefix via lookup()."""
+    def __init__(self, ttl_seconds: float = 3600, min_tokens: int = 0):
+        super().__init__(ttl_seconds, min_tokens)
+        self._prefixes: Dict[str, str] = {}
+
+    def _create(self, model: Any, system_prompt: str, key: str) -> str:
+        name = f"cachedContents/local-{key[:16]}"
+        self._prefixes[name] = system_prompt
+        return name
+
+    def lookup(self, name: str) -> Optional[str]:
+        return self._prefixes.get(name)
+
+
+def make_context_cache(backend: str) -> Optional[ContextCache]:
+    """
+    Gemini caches for the gemini backend, the local stand-in otherwise.
+    TALENTFLOW_CONTEXT_CACHE=0 disables it; TALENTFLOW_CONTEXT_CACHE_TTL
+    (seconds) and TALENTFLOW_CONTEXT_CACHE_MIN_TOKENS tune it.
+    """
+    if os.getenv("TALENTFLOW_CONTEXT_CACHE", "1") == "0":
+        return None
+    ttl = float(os.getenv("TALENTFLOW_CONTEXT_CACHE_TTL", "3600"))
+    if backend == "gemini":
+        # Gemini rejects caches below its minimum prompt size
+        return GeminiContextCache(ttl, int(os.getenv("TALENTFLOW_CONTEXT_CACHE_MIN_TOKENS", "1024")))
+    return LocalContextCache(ttl, int(os.getenv("TALENTFLOW_CONTEXT_CACHE_MIN_TOKENS", "0")))
+
+context_cache = make_context_cache(LLM_BACKEND)
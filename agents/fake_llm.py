@@ -0,0 +1,160 @@
+import re
+import json
+import time
+import uuid
+import asyncio
+from typing import List, Dict, Any, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatResult, ChatGeneration, ChatGenerationChunk
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from agents.plan_cache import ROLE_WORKFLOWS, extract_hire, classify_role, fill_workflow, free_desk, next_orientation_date
+
+# Worker instructions look like: Execute: enroll_course with params {...}
+INSTRUCTION_PATTERN = re.compile(r"Execute:\s*(?P<action>\w+)\s+with params\s+(?P<params>\{.*\})", re.S)
+
+# Characters per streamed chunk, roughly a handful of tokens
+STREAM_CHUNK_CHARS = 64
+
+# Fake plans take free desks from the 'F' series, apart from the template cache's 'A' series
+DESK_SERIES = "F"
+
+
+class FakeOnboardingChatModel(BaseChatModel):
+    """
+    Deterministic offline stand-in for Gemini. Without bound tools it
+    answers like the orchestrator (a JSON plan for the hire); with tools it
+    answers like a worker (one tool call built from the instruction).
+    `latency` seconds are injected per call to mimic a network round trip.
+    """
+    latency: float = 0.0
+    fallback_workflow: str = "sales"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-onboarding"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, tools: Optional[List[Dict]] = None, cached_content: Optional[str] = None,
+                  **kwargs: Any) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(messages, tools, cached_content)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, tools: Optional[List[Dict]] = None, cached_content: Optional[str] = None,
+                         **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(messages, tools, cached_content)
+
+    # Streaming spreads the latency over the chunks, like tokens arriving over the wire
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, tools: Optional[List[Dict]] = None, cached_content: Optional[str] = None,
+                **kwargs: Any):
+        chunks = self._chunks(self._respond(messages, tools, cached_content).generations[0].message)
+        for chunk in chunks:
+            if self.latency:
+                time.sleep(self.latency / len(chunks))
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, tools: Optional[List[Dict]] = None, cached_content: Optional[str] = None,
+                       **kwargs: Any):
+        chunks = self._chunks(self._respond(messages, tools, cached_content).generations[0].message)
+        for chunk in chunks:
+            if self.latency:
+                await asyncio.sleep(self.latency / len(chunks))
+            yield chunk
+
+    @staticmethod
+    def _chunks(message: AIMessage) -> List[ChatGenerationChunk]:
+        if message.tool_calls:
+            tool_call_chunks = [
+                {"name": tc["name"], "args": json.dumps(tc["args"]), "id": tc["id"], "index": i}
+                for i, tc in enumerate(message.tool_calls)
+            ]
+            return [ChatGenerationChunk(message=AIMessageChunk(
+                content="", tool_call_chunks=tool_call_chunks, usage_metadata=message.usage_metadata))]
+
+        text = message.content
+        pieces = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)] or [""]
+        chunks = [ChatGenerationChunk(message=AIMessageChunk(content=piece)) for piece in pieces]
+        # Usage arrives with the final chunk
+        chunks[-1].message.usage_metadata = message.usage_metadata
+        return chunks
+
+    # One simulated round trip per batch, like a native batch endpoint
+    def batch(self, inputs: List[Any], config=None, *, return_exceptions: bool = False, **kwargs: Any) -> List[Any]:
+        if self.latency:
+            time.sleep(self.latency)
+        instant = self.model_copy(update={"latency": 0.0})
+        return BaseChatModel.batch(instant, inputs, config, return_exceptions=return_exceptions, **kwargs)
+
+    async def abatch(self, inputs: List[Any], config=None, *, return_exceptions: bool = False, **kwargs: Any) -> List[Any]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        instant = self.model_copy(update={"latency": 0.0})
+        return await BaseChatModel.abatch(instant, inputs, config, return_exceptions=return_exceptions, **kwargs)
+
+    # ----- Responses -----
+    def _respond(self, messages: List[BaseMessage], tools: Optional[List[Dict]],
+                 cached_content: Optional[str] = None) -> ChatResult:
+        request = next((m.content for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        message = self._tool_call(request, tools) if tools else self._plan(request)
+        cached_chars = len(self._cached_prefix(cached_content)) if cached_content else 0
+        prompt_chars = sum(len(str(m.content)) for m in messages) + cached_chars
+        completion_chars = len(message.content) + len(json.dumps(message.tool_calls))
+        message.usage_metadata = {
+            "input_tokens": prompt_chars // 4,
+            "output_tokens": completion_chars // 4,
+            "total_tokens": (prompt_chars + completion_chars) // 4,
+            "input_token_details": {"cache_read": cached_chars // 4},
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    @staticmethod
+    def _cached_prefix(name: str) -> str:
+        """Resolves a context cache handle through the local stand-in, like the API would."""
+        from agents.context_cache import LocalContextCache, context_cache
+        prefix = context_cache.lookup(name) if isinstance(context_cache, LocalContextCache) else None
+        if prefix is None:
+            raise ValueError(f"Unknown cached content '{name}'")
+        return prefix
+
+    def _plan(self, request: str) -> AIMessage:
+        hire = extract_hire(request) or {"name": "New Hire", "role": "Employee", "email": "new.hire@company.com"}
+        workflow = classify_role(hire["role"]) or self.fallback_workflow
+        plan = fill_workflow(ROLE_WORKFLOWS[workflow], {
+            **hire,
+            "desk_number": free_desk(ROLE_WORKFLOWS[workflow], DESK_SERIES),
+            "orientation_date": next_orientation_date(),
+        })
+        return AIMessage(content=f"```json\n{json.dumps(plan)}\n```")
+
+    def _tool_call(self, request: str, tools: List[Dict]) -> AIMessage:
+        match = INSTRUCTION_PATTERN.search(request)
+        if not match:
+            return AIMessage(content="I could not find a task to execute.")
+
+        action = match.group("action")
+        try:
+            params = json.loads(match.group("params"))
+        except json.JSONDecodeError:
+            params = {}
+
+        functions = [t["function"] for t in tools]
+        function = next((f for f in functions if f["name"] == action or f["name"].endswith(f"_{action}")), functions[0])
+        accepted = function.get("parameters", {}).get("properties", {})
+        args = {k: v for k, v in params.items() if k in accepted}
+        return AIMessage(content="", tool_calls=[{
+            "name": function["name"],
+            "args": args,
+            "id": f"fake-{uuid.uuid4().hex}",
+            "type": "tool_call",
+        }])
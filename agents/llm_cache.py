@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Sequence
+
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+def _normalize(message: BaseMessage) -> Dict[str, Any]:
+    """Reduces a message to what affects the model's answer; whitespace is collapsed."""
+    content = message.content
+    if isinstance(content, str):
+        content = " ".join(content.split())
+    normalized = {"type": message.type, "content": content}
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        normalized["tool_calls"] = [{"name": tc["name"], "args": tc["args"]} for tc in tool_calls]
+    return normalized
+
+
+def tool_schemas(tools: Sequence[Any]) -> List[Dict]:
+    """JSON schemas of bound tools, so a schema change invalidates cached tool calls."""
+    return [convert_to_openai_tool(t) for t in tools]
+
+
+class LLMResponseCache:
+    """
+    Two-level response cache: an in-memory LRU in front of an optional
+    SQLite file, so repeated prompts and reruns after a crash skip the
+    model. Safe because every agent runs with temperature=0. The file is
+    only opened (and created) on the first lookup or store.
+    """
+    def __init__(self, path: Optional[str] = None, max_entries: int = 2048, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()   # key -> (expires_at, message, latency)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.latency_saved = 0.0
+
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """The SQLite level, opened on first use; None without a path. Called with the lock held."""
+        if self._conn is None and self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, message TEXT NOT NULL, latency REAL NOT NULL, expires_at REAL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def key(messages: Sequence[BaseMessage], model_name: str, schemas: Sequence[Dict] = ()) -> str:
+        payload = json.dumps(
+            {"model": model_name, "tools": list(schemas), "messages": [_normalize(m) for m in messages]},
+            sort_keys=True, default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[BaseMessage]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] is not None and entry[0] < now:
+                del self._memory[key]
+                entry = None
+            if entry is None and self.path:
+                entry = self._load(key, now)
+                if entry is not None:
+                    self.disk_hits += 1
+                    self._remember(key, entry)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._memory.move_to_end(key)
+            self.hits += 1
+            self.latency_saved += entry[2]
+            return entry[1]
+
+    def put(self, key: str, message: BaseMessage, latency: float) -> None:
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._remember(key, (expires_at, message, latency))
+            db = self._db()
+            if db is not None:
+                db.execute(
+                    "INSERT OR REPLACE INTO responses (key, message, latency, expires_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(message_to_dict(message)), latency, expires_at),
+                )
+                db.commit()
+
+    def evict_expired(self) -> int:
+        """Drops expired entries from both levels; returns how many disk rows were removed."""
+        now = time.time()
+        with self._lock:
+            for key in [k for k, e in self._memory.items() if e[0] is not None and e[0] < now]:
+                del self._memory[key]
+            db = self._db()
+            if db is None:
+                return 0
+            cur = db.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+            db.commit()
+            return cur.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            db = self._db()
+            if db is not None:
+                db.execute("DELETE FROM responses")
+                db.commit()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": self.hits / total if total else 0.0,
+                "latency_saved_s": round(self.latency_saved, 3),
+                "entries": len(self._memory),
+            }
+
+    def _remember(self, key: str, entry: tuple) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _load(self, key: str, now: float) -> Optional[tuple]:
+        row = self._db().execute(
+            "SELECT message, latency, expires_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        message, latency, expires_at = row
+        if expires_at is not None and expires_at < now:
+            return None
+        return (expires_at, messages_from_dict([json.loads(message)])[0], latency)
+
+
+def make_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    Builds the shared cache from TALENTFLOW_LLM_CACHE* settings
+    (TALENTFLOW_LLM_CACHE=0 disables it). It is kept in memory unless
+    TALENTFLOW_LLM_CACHE_PATH names a SQLite file to persist it to.
+    """
+    if os.getenv("TALENTFLOW_LLM_CACHE", "1") == "0":
+        return None
+    ttl = os.getenv("TALENTFLOW_LLM_CACHE_TTL", "86400")
+    return LLMResponseCache(
+        path=os.getenv("TALENTFLOW_LLM_CACHE_PATH") or None,
+        max_entries=int(os.getenv("TALENTFLOW_LLM_CACHE_SIZE", "2048")),
+        ttl_seconds=float(ttl) if ttl else None,
+    )
+
+
+# Shared by the orchestrator and every worker
+llm_cache = make_llm_cache()
@@ -1,104 +1,100 @@
-import json
-from typing import List, Dict
+import time
+from functools import partial
+from typing import List, Dict, Any, Optional, Tuple
 
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import SystemMessage, HumanMessage, BaseMessage
 from agents.base import BaseAgent
+from agents.plan_parser import PlanStream, parse_plan_text
+from agents.plan_cache import PlanTemplateCache
+from agents.plan_prompt import build_system_prompt, prompt_variant
+from agents.context_cache import ContextCache, context_cache
+from agents.registry import agent_registry
+
+# Full prompt: every department and workflow (requests that name no particular departments)
+SYSTEM_PROMPT = build_system_prompt()
+
+
+def parse_plan(content: str) -> List[Dict]:
+    """Parses the model's JSON plan. Raises PlanParseError (with reason and position) when malformed."""
+    return parse_plan_text(content)
 
 class OrchestratorAgent(BaseAgent):
     """Decides the plan based on the user request."""
+    def __init__(self, name: str, model_name: str = "gemini-2.5-flash", plan_cache: PlanTemplateCache = None,
+                 context_cache: Optional[ContextCache] = context_cache):
+        super().__init__(name, model_name)
+        self.plan_cache = plan_cache if plan_cache is not None else PlanTemplateCache()
+        self.context_cache = context_cache
+
+    def _plan_messages(self, user_input: str) -> List[BaseMessage]:
+        """The system prompt for the departments the request needs, plus the request (also the response cache key)."""
+        system_prompt = build_system_prompt(prompt_variant(user_input))
+        return [SystemMessage(content=system_prompt), HumanMessage(content=user_input)]
+
+    def _plan_request(self, messages: List[BaseMessage]) -> Tuple[Any, List[BaseMessage]]:
+        """Model and messages to send. With a cached prefix, only the request travels."""
+        handle = self.context_cache.handle(self.llm, messages[0].content) if self.context_cache else None
+        if handle is None:
+            return self.llm, messages
+        return self.llm.bind(cached_content=handle), messages[1:]
+
     def generate_plan(self, user_input: str) -> List[Dict]:
+        # Known roles have a fixed workflow: skip the LLM entirely.
+        plan = self.plan_cache.lookup(user_input)
+        if plan is not None:
+            return plan
+
         # In a real app, we would use .with_structured_output()
         # For simplicity, we ask for raw JSON text here.
-        system_prompt = """
-        You are the Onboarding Orchestrator for TalentFlow.
-        Based on the new hire's role and requirements, create a sequential multi-department plan.
-
-        Available Departments and Actions:
-
-        1. HR Department:
-           - Action: 'create_profile'
-           - Required for ALL hires
-           - Params: {name, role, email}
-
-        2. Legal Department:
-           - Action: 'generate_contract' - Params: {employee_name, role, contract_type}
-           - Action: 'compliance_check' - Params: {employee_name, check_type}
-           - contract_type options: "full-time", "part-time", "contractor"
-           - check_type options: "background", "reference", "credential"
-
-        3. Finance Department:
-           - Action: 'approve_budget' - Params: {department, amount, purpose}
-           - Action: 'setup_expense_account' - Params: {employee_name, monthly_limit}
-           - For regular employees: $2000/month limit
-           - For contractors: $500/month limit
-
-        4. IT Department:
-           - Action: 'provision_device' - Params: {device, override_auth}
-           - Device options: "macbook_pro" (Engineers), "dell_xps" (Sales/Business), "thinkpad_t14" (Finance), "ipad_pro" (Field)
-           - override_auth required only if stock is depleted
-
-        5. Facilities Department:
-           - Action: 'assign_desk' - Params: {employee_name, floor, desk_number}
-           - Action: 'issue_badge' - Params: {employee_name, access_level}
-           - access_level: "standard" (default), "elevated" (managers), "admin" (executives)
-
-        6. Training Department:
-           - Action: 'enroll_course' - Params: {employee_name, course_name}
-           - Action: 'schedule_orientation' - Params: {employee_name, orientation_date}
-           - Required courses: "compliance_101" (all), "security_basics" (IT/Engineering)
-           - orientation_date format: "YYYY-MM-DD"
-
-        Standard Workflows by Role:
-
-        - Engineer/Developer:
-          1. HR: create_profile
-          2. Legal: generate_contract (full-time), compliance_check (background)
-          3. Finance: setup_expense_account ($2000)
-          4. IT: provision_device (macbook_pro)
-          5. Facilities: assign_desk + issue_badge (standard)
-          6. Training: enroll_course (compliance_101, security_basics), schedule_orientation
-
-        - Sales Representative:
-          1. HR: create_profile
-          2. Legal: generate_contract (full-time), compliance_check (background)
-          3. Finance: setup_expense_account ($2000)
-          4. IT: provision_device (dell_xps)
-          5. Facilities: assign_desk + issue_badge (standard)
-          6. Training: enroll_course (compliance_101), schedule_orientation
-
-        - Contractor:
-          1. HR: create_profile
-          2. Legal: generate_contract (contractor), compliance_check (background)
-          3. Finance: setup_expense_account ($500)
-          4. IT: provision_device (dell_xps)
-          5. Training: schedule_orientation
-
-        Rules:
-        - HR must always be FIRST
-        - Legal typically follows HR
-        - IT comes before Facilities (need hardware before desk assignment)
-        - Training is usually LAST
-        - Each step must specify which agent and what action
-
-        Return ONLY a JSON list of steps. Example format:
-        [
-          {"agent": "HR", "action": "create_profile", "params": {"name": "...", "role": "...", "email": "..."}},
-          {"agent": "Legal", "action": "generate_contract", "params": {"employee_name": "...", "role": "...", "contract_type": "full-time"}},
-          {"agent": "Finance", "action": "setup_expense_account", "params": {"employee_name": "...", "monthly_limit": 2000}},
-          {"agent": "IT", "action": "provision_device", "params": {"device": "macbook_pro"}},
-          {"agent": "Facilities", "action": "assign_desk", "params": {"employee_name": "...", "floor": 3, "desk_number": "A42"}},
-          {"agent": "Training", "action": "enroll_course", "params": {"employee_name": "...", "course_name": "compliance_101"}}
-        ]
+        messages = self._plan_messages(user_input)
+        response = self._invoke(*self._plan_request(messages), key_messages=messages)
+        return parse_plan(response.content)
+
+    async def agenerate_plan(self, user_input: str) -> List[Dict]:
+        """Async variant of generate_plan."""
+        plan = self.plan_cache.lookup(user_input)
+        if plan is not None:
+            return plan
+
+        messages = self._plan_messages(user_input)
+        response = await self._ainvoke(*self._plan_request(messages), key_messages=messages)
+        return parse_plan(response.content)
+
+    def stream_plan(self, user_input: str) -> PlanStream:
+        """
+        Starts generating a plan whose steps can be pulled as soon as the
+        model has written them, so execution overlaps with planning.
         """
-        messages = [SystemMessage(content=system_prompt), HumanMessage(content=user_input)]
-        response = self.llm.invoke(messages)
-
-        # Naive JSON parsing for the demo
-        try:
-            clean_json = response.content.replace("```json", "").replace("```", "").strip()
-            return json.loads(clean_json)
-        except Exception as e:
-            print(f"⚠️ JSON parsing error: {e}")
-            return []
-
-orchestrator = OrchestratorAgent("Orchestrator")
+        plan = self.plan_cache.lookup(user_input)
+        if plan is not None:
+            return PlanStream.from_steps(plan)
+
+        messages = self._plan_messages(user_input)
+        key = self._cache_key(messages)
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            return PlanStream.from_steps(parse_plan(cached.content))
+
+        on_complete = partial(self._stream_finished, key, time.perf_counter())
+        return PlanStream(self.pool.stream(*self._plan_request(messages)), on_complete=on_complete)
+
+    def astream_plan(self, user_input: str) -> PlanStream:
+        """Async variant of stream_plan: pull the returned stream with apull()."""
+        plan = self.plan_cache.lookup(user_input)
+        if plan is not None:
+            return PlanStream.from_steps(plan)
+
+        messages = self._plan_messages(user_input)
+        key = self._cache_key(messages)
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            return PlanStream.from_steps(parse_plan(cached.content))
+
+        on_complete = partial(self._stream_finished, key, time.perf_counter())
+        return PlanStream(self.pool.astream(*self._plan_request(messages)), on_complete=on_complete)
+
+def __getattr__(attr: str):
+    # `orchestrator` is built on first use by agents.registry
+    if attr == "orchestrator":
+        return agent_registry.get("Orchestrator")
+    raise AttributeError(f"module {__name__!r} has no attribute {attr!r}")
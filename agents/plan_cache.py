@@ -0,0 +1,158 @@
+import re
+import threading
+from copy import deepcopy
+from datetime import date, timedelta
+from typing import List, Dict, Optional
+
+from external_crm_mock.mock import crm
+
+# Extraction patterns for requests like
+# "Onboard Sarah Johnson as a Senior Engineer. Email: sarah.johnson@company.com"
+# The pattern must cover the whole request, with the email swapped for
+# EMAIL_SLOT first so its dots never end up in the role. Anything else in
+# the request ("with a ThinkPad", "no laptop needed") is a requirement the
+# template cannot honor, so such requests are left to the model.
+EMAIL_SLOT = "<email>"
+NAME_ROLE_PATTERN = re.compile(
+    r"\s*onboard\s+(?P<name>[^.,;:()\n]+?)\s+as\s+(?:an?\s+)?(?P<role>(?:(?!\bwith\b)[^.,;:()\n])+?)\s*"
+    r"(?:[.,;]\s*|\s)(?:(?:with\s+)?e-?mail(?:\s+address)?\s*(?:is\s+|:\s*)?)?"
+    rf"(?:{re.escape(EMAIL_SLOT)}|\({re.escape(EMAIL_SLOT)}\))\s*\.?\s*",
+    re.IGNORECASE,
+)
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+
+# Whole role titles -> workflow key, after seniority words are dropped.
+# Checked in order, so "Contract Engineer" gets the contractor workflow.
+# A title that matches none of them (e.g. "Account Manager for enterprise
+# sales") is left to the model.
+SENIORITY_PATTERN = re.compile(r"^(?:(?:senior|sr|junior|jr|lead|staff|principal)\.?\s+)+")
+ROLE_TITLES = [
+    (re.compile(r"(?:independent\s+)?contractor|contract\s+(?:engineer|developer)"), "contractor"),
+    (re.compile(r"(?:(?:software|backend|back-end|frontend|front-end|full[- ]?stack|data|platform|devops|mobile|web)\s+)?"
+                r"(?:engineer|developer)"), "engineer"),
+    (re.compile(r"sales\s+(?:representative|rep|associate|executive)|account\s+executive"), "sales"),
+]
+
+# Standard workflows by role, also rendered into the orchestrator prompt.
+# Values in {braces} are filled from the request at lookup time.
+ROLE_WORKFLOWS: Dict[str, List[Dict]] = {
+    "engineer": [
+        {"agent": "HR", "action": "create_profile", "params": {"name": "{name}", "role": "{role}", "email": "{email}"}},
+        {"agent": "Legal", "action": "generate_contract", "params": {"employee_name": "{name}", "role": "{role}", "contract_type": "full-time"}},
+        {"agent": "Legal", "action": "compliance_check", "params": {"employee_name": "{name}", "check_type": "background"}},
+        {"agent": "Finance", "action": "setup_expense_account", "params": {"employee_name": "{name}", "monthly_limit": 2000}},
+        {"agent": "IT", "action": "provision_device", "params": {"device": "macbook_pro"}},
+        {"agent": "Facilities", "action": "assign_desk", "params": {"employee_name": "{name}", "floor": 3, "desk_number": "{desk_number}"}},
+        {"agent": "Facilities", "action": "issue_badge", "params": {"employee_name": "{name}", "access_level": "standard"}},
+        {"agent": "Training", "action": "enroll_course", "params": {"employee_name": "{name}", "course_name": "compliance_101"}},
+        {"agent": "Training", "action": "enroll_course", "params": {"employee_name": "{name}", "course_name": "security_basics"}},
+        {"agent": "Training", "action": "schedule_orientation", "params": {"employee_name": "{name}", "orientation_date": "{orientation_date}"}},
+    ],
+    "sales": [
+        {"agent": "HR", "action": "create_profile", "params": {"name": "{name}", "role": "{role}", "email": "{email}"}},
+        {"agent": "Legal", "action": "generate_contract", "params": {"employee_name": "{name}", "role": "{role}", "contract_type": "full-time"}},
+        {"agent": "Legal", "action": "compliance_check", "params": {"employee_name": "{name}", "check_type": "background"}},
+        {"agent": "Finance", "action": "setup_expense_account", "params": {"employee_name": "{name}", "monthly_limit": 2000}},
+        {"agent": "IT", "action": "provision_device", "params": {"device": "dell_xps"}},
+        {"agent": "Facilities", "action": "assign_desk", "params": {"employee_name": "{name}", "floor": 3, "desk_number": "{desk_number}"}},
+        {"agent": "Facilities", "action": "issue_badge", "params": {"employee_name": "{name}", "access_level": "standard"}},
+        {"agent": "Training", "action": "enroll_course", "params": {"employee_name": "{name}", "course_name": "compliance_101"}},
+        {"agent": "Training", "action": "schedule_orientation", "params": {"employee_name": "{name}", "orientation_date": "{orientation_date}"}},
+    ],
+    "contractor": [
+        {"agent": "HR", "action": "create_profile", "params": {"name": "{name}", "role": "{role}", "email": "{email}"}},
+        {"agent": "Legal", "action": "generate_contract", "params": {"employee_name": "{name}", "role": "{role}", "contract_type": "contractor"}},
+        {"agent": "Legal", "action": "compliance_check", "params": {"employee_name": "{name}", "check_type": "background"}},
+        {"agent": "Finance", "action": "setup_expense_account", "params": {"employee_name": "{name}", "monthly_limit": 500}},
+        {"agent": "IT", "action": "provision_device", "params": {"device": "dell_xps"}},
+        {"agent": "Training", "action": "schedule_orientation", "params": {"employee_name": "{name}", "orientation_date": "{orientation_date}"}},
+    ],
+}
+
+
+def extract_hire(user_input: str) -> Optional[Dict[str, str]]:
+    """Pulls name, role and email out of a request that consists of nothing else, or None."""
+    emails = EMAIL_PATTERN.findall(user_input)
+    if len(emails) != 1:
+        return None
+    match = NAME_ROLE_PATTERN.fullmatch(EMAIL_PATTERN.sub(EMAIL_SLOT, user_input))
+    if not match:
+        return None
+    return {
+        "name": match.group("name").strip(),
+        "role": match.group("role").strip(),
+        "email": emails[0],
+    }
+
+
+def classify_role(role: str) -> Optional[str]:
+    """Maps a role title onto a known workflow key, or None unless the whole title is a known one."""
+    title = SENIORITY_PATTERN.sub("", " ".join(role.lower().split()))
+    for pattern, workflow in ROLE_TITLES:
+        if pattern.fullmatch(title):
+            return workflow
+    return None
+
+
+def next_orientation_date(today: Optional[date] = None) -> str:
+    """Orientation runs on Mondays; pick the next one strictly after today."""
+    today = today or date.today()
+    return (today + timedelta(days=7 - today.weekday())).isoformat()
+
+
+def free_desk(steps: List[Dict], series: str) -> str:
+    """A free desk number on the floor of the workflow's assign_desk step ('' if it assigns none)."""
+    floor = next((step["params"]["floor"] for step in steps if step["action"] == "assign_desk"), None)
+    return crm.free_desk(floor, series) if floor is not None else ""
+
+
+def fill_workflow(steps: List[Dict], values: Dict[str, str]) -> List[Dict]:
+    """Copies a workflow template, replacing {placeholders} in params with values."""
+    filled = []
+    for step in steps:
+        step = deepcopy(step)
+        for key, value in step["params"].items():
+            if isinstance(value, str) and value.startswith("{") and value.endswith("}"):
+                step["params"][key] = values[value[1:-1]]
+        filled.append(step)
+    return filled
+
+
+class PlanTemplateCache:
+    """
+    Serves ready-made plans for roles with a standard workflow so the
+    orchestrator only pays for an LLM round trip on unknown roles.
+    """
+    def __init__(self, workflows: Optional[Dict[str, List[Dict]]] = None):
+        self.workflows = workflows if workflows is not None else ROLE_WORKFLOWS
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, user_input: str) -> Optional[List[Dict]]:
+        """Returns a filled-in plan for a known role, or None on a miss."""
+        hire = extract_hire(user_input)
+        workflow = classify_role(hire["role"]) if hire else None
+        if workflow not in self.workflows:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+
+        values = {
+            **hire,
+            "desk_number": free_desk(self.workflows[workflow], "A"),
+            "orientation_date": next_orientation_date(),
+        }
+        return fill_workflow(self.workflows[workflow], values)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
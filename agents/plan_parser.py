@@ -0,0 +1,210 @@
+"""
+Incremental parsing of the orchestrator's JSON plan.
+
+The model answers with a JSON list of steps (optionally inside a ```json
+fence). StreamingPlanParser consumes that text chunk by chunk and hands out
+each step object as soon as its closing brace arrives, so execution can
+start before the model has finished writing the plan. Malformed output
+raises PlanParseError with the reason and position instead of silently
+becoming an empty plan.
+"""
+import json
+from typing import List, Dict, Any, Optional, Callable, Iterator, AsyncIterator, Union
+
+from langchain_core.messages import BaseMessage
+
+
+class PlanParseError(ValueError):
+    """Model output that is not a usable JSON list of plan steps."""
+    def __init__(self, reason: str, position: Optional[int] = None, step: Optional[int] = None, excerpt: str = ""):
+        self.reason = reason
+        self.position = position
+        self.step = step
+        self.excerpt = excerpt
+        where = []
+        if step is not None:
+            where.append(f"step {step + 1}")
+        if position is not None:
+            where.append(f"char {position}")
+        message = f"Invalid plan: {reason}" + (f" ({', '.join(where)})" if where else "")
+        super().__init__(message + (f" near {excerpt!r}" if excerpt else ""))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"reason": self.reason, "position": self.position, "step": self.step, "excerpt": self.excerpt}
+
+
+def validate_step(step: Any, index: int, position: Optional[int] = None) -> Dict:
+    """Checks one step has an agent, an action and (optional) dict params."""
+    if not isinstance(step, dict):
+        raise PlanParseError("step is not an object", position, index)
+    for field in ("agent", "action"):
+        if not isinstance(step.get(field), str) or not step[field]:
+            raise PlanParseError(f"step is missing '{field}'", position, index)
+    if not isinstance(step.get("params", {}), dict):
+        raise PlanParseError("step 'params' is not an object", position, index)
+    return step
+
+
+class StreamingPlanParser:
+    """
+    Feed text chunks; get back each step object once it is complete. Text
+    before the opening '[' (fences, prose) and after the closing ']' is
+    ignored.
+    """
+    def __init__(self):
+        self.text = ""
+        self.count = 0
+        self.started = False
+        self.closed = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._step_start = 0
+
+    def feed(self, chunk: str) -> List[Dict]:
+        self.text += chunk
+        steps = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            c = text[i]
+            if self.closed:
+                break
+            if not self.started:
+                if c == "[":
+                    self.started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                continue
+
+            if c == '"':
+                if self._depth == 1:
+                    self._error("expected a step object", i)
+                self._in_string = True
+            elif c in "{[":
+                self._depth += 1
+                if self._depth == 2:
+                    if c == "[":
+                        self._error("expected a step object", i)
+                    self._step_start = i
+            elif c in "}]":
+                self._depth -= 1
+                if self._depth == 1 and c == "}":
+                    steps.append(self._step(text[self._step_start:i + 1], i))
+                elif self._depth == 0:
+                    self.closed = True
+            elif self._depth == 1 and not c.isspace() and c != ",":
+                self._error("expected a step object", i)
+        self._pos = len(text)
+        return steps
+
+    def close(self) -> None:
+        """Call once the text is complete: raises if no whole plan was seen."""
+        if not self.started:
+            raise PlanParseError("no JSON list found", excerpt=self.text[:60])
+        if not self.closed:
+            raise PlanParseError("output ended before the plan was closed", len(self.text), self.count,
+                                 self.text[-60:])
+        if not self.count:
+            raise PlanParseError("the plan has no steps")
+
+    def _step(self, raw: str, position: int) -> Dict:
+        try:
+            step = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise PlanParseError(f"malformed step JSON ({e.msg})", self._step_start + e.pos, self.count,
+                                 raw[max(0, e.pos - 30):e.pos + 30]) from e
+        step = validate_step(step, self.count, position)
+        self.count += 1
+        return step
+
+    def _error(self, reason: str, position: int) -> None:
+        raise PlanParseError(reason, position, self.count, self.text[max(0, position - 30):position + 30])
+
+
+def parse_plan_text(content: str) -> List[Dict]:
+    """Parses a complete model answer; raises PlanParseError on malformed output."""
+    parser = StreamingPlanParser()
+    steps = parser.feed(content)
+    parser.close()
+    return steps
+
+
+class PlanStream:
+    """
+    The steps of one plan as the model emits them. pull()/apull() block
+    until at least one more step has closed or the stream ends; `done` is
+    set once the whole plan has been read. on_complete receives the full
+    message (e.g. to cache it) when the model finishes.
+    """
+    def __init__(self, chunks: Union[Iterator[BaseMessage], AsyncIterator[BaseMessage], None] = None,
+                 on_complete: Optional[Callable[[BaseMessage], None]] = None):
+        self.parser = StreamingPlanParser()
+        self.done = chunks is None
+        self._chunks = chunks
+        self._on_complete = on_complete
+        self._message: Optional[BaseMessage] = None
+        self._ready: List[Dict] = []
+
+    @classmethod
+    def from_steps(cls, steps: List[Dict]) -> "PlanStream":
+        """A stream whose plan is already complete (template or cached answer)."""
+        stream = cls()
+        stream._ready = list(steps)
+        return stream
+
+    def pull(self) -> List[Dict]:
+        ready, self._ready = self._ready, []
+        try:
+            while not ready and not self.done:
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    self._finish()
+                    break
+                ready = self._accept(chunk)
+                if self.parser.closed:
+                    # Drain the trailing tokens (closing fence, usage) so the call completes
+                    for chunk in self._chunks:
+                        self._accept(chunk)
+                    self._finish()
+        except Exception:
+            self.done = True
+            raise
+        return ready
+
+    async def apull(self) -> List[Dict]:
+        """Async variant of pull."""
+        ready, self._ready = self._ready, []
+        try:
+            while not ready and not self.done:
+                chunk = await anext(self._chunks, None)
+                if chunk is None:
+                    self._finish()
+                    break
+                ready = self._accept(chunk)
+                if self.parser.closed:
+                    async for chunk in self._chunks:
+                        self._accept(chunk)
+                    self._finish()
+        except Exception:
+            self.done = True
+            raise
+        return ready
+
+    def _accept(self, chunk: BaseMessage) -> List[Dict]:
+        self._message = chunk if self._message is None else self._message + chunk
+        return self.parser.feed(chunk.text)
+
+    def _finish(self) -> None:
+        self.done = True
+        self.parser.close()
+        if self._on_complete is not None and self._message is not None:
+            self._on_complete(self._message)
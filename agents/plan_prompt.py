@@ -0,0 +1,148 @@
+"""
+The orchestrator's system prompt, built from a structured catalog.
+
+Only requests that miss the plan template cache reach the model. A request
+that names the departments it needs ("set up a laptop and a desk") gets
+only those departments (plus HR, which every plan starts with) and the
+matching steps of the standard workflows; any other request gets the full
+catalog. Each variant is static, so it can be sent once as a cached
+context prefix and referenced afterwards.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from agents.plan_cache import ROLE_WORKFLOWS, extract_hire
+
+HEADER = (
+    "You are the Onboarding Orchestrator for TalentFlow. Based on the new hire's role "
+    "and requirements, create a multi-department onboarding plan."
+)
+
+# Department -> actions (with their params) and guidance for filling them in
+DEPARTMENT_CATALOG: Dict[str, Dict] = {
+    "HR": {
+        "actions": {"create_profile": ["name", "role", "email"]},
+        "notes": ["Required for ALL hires"],
+    },
+    "Legal": {
+        "actions": {
+            "generate_contract": ["employee_name", "role", "contract_type"],
+            "compliance_check": ["employee_name", "check_type"],
+        },
+        "notes": [
+            'contract_type: "full-time", "part-time" or "contractor"',
+            'check_type: "background", "reference" or "credential"',
+        ],
+    },
+    "Finance": {
+        "actions": {
+            "approve_budget": ["department", "amount", "purpose"],
+            "setup_expense_account": ["employee_name", "monthly_limit"],
+        },
+        "notes": ["monthly_limit: 2000 for regular employees, 500 for contractors"],
+    },
+    "IT": {
+        "actions": {"provision_device": ["device", "override_auth"]},
+        "notes": [
+            'device: "macbook_pro" (Engineers), "dell_xps" (Sales/Business), '
+            '"thinkpad_t14" (Finance), "ipad_pro" (Field)',
+            "override_auth only if stock is depleted",
+        ],
+    },
+    "Facilities": {
+        "actions": {
+            "assign_desk": ["employee_name", "floor", "desk_number"],
+            "issue_badge": ["employee_name", "access_level"],
+        },
+        "notes": ['access_level: "standard" (default), "elevated" (managers), "admin" (executives)'],
+    },
+    "Training": {
+        "actions": {
+            "enroll_course": ["employee_name", "course_name"],
+            "schedule_orientation": ["employee_name", "orientation_date"],
+        },
+        "notes": [
+            'Required courses: "compliance_101" (all), "security_basics" (IT/Engineering)',
+            'orientation_date: "YYYY-MM-DD"',
+        ],
+    },
+}
+
+# How a request names a department: its name or the things it handles
+DEPARTMENT_MENTIONS: Dict[str, re.Pattern] = {
+    "HR": re.compile(r"\bHR\b|(?i:\bprofile\b)"),
+    "Legal": re.compile(r"(?i:\blegal\b|\bcontracts?\b|\bcompliance\b|\bbackground check)"),
+    "Finance": re.compile(r"(?i:\bfinance\b|\bbudget|\bexpense)"),
+    "IT": re.compile(r"\bIT\b|(?i:\blaptop|\bdevice|\bhardware|\bmacbook|\bthinkpad|\bipad)"),
+    "Facilities": re.compile(r"(?i:\bfacilities\b|\bdesk|\bbadge)"),
+    "Training": re.compile(r"(?i:\btraining\b|\bcourses?\b|\borientation\b)"),
+}
+
+WORKFLOW_TITLES = {"engineer": "Engineer/Developer", "sales": "Sales Representative", "contractor": "Contractor"}
+
+RULES = [
+    "HR must always be FIRST",
+    "Legal typically follows HR",
+    "IT comes before Facilities (need hardware before desk assignment)",
+    "Training is usually LAST",
+    "Each step must specify which agent and what action",
+]
+
+OUTPUT_FORMAT = (
+    "Return ONLY a JSON list of steps. Example format:\n"
+    '[{"agent": "HR", "action": "create_profile", "params": {"name": "...", "role": "...", "email": "..."}}, '
+    '{"agent": "IT", "action": "provision_device", "params": {"device": "macbook_pro"}}]'
+)
+
+
+def render_department(name: str) -> str:
+    entry = DEPARTMENT_CATALOG[name]
+    lines = [f"{name}:"]
+    lines += [f"- {action} {{{', '.join(params)}}}" for action, params in entry["actions"].items()]
+    lines += [f"- {note}" for note in entry["notes"]]
+    return "\n".join(lines)
+
+
+def render_workflow(name: str, departments: Optional[Tuple[str, ...]] = None) -> str:
+    """
+    One line per step (only those of `departments` if given); fixed params
+    are shown, per-hire placeholders are left out.
+    """
+    lines = [f"{WORKFLOW_TITLES.get(name, name.title())}:"]
+    for step in ROLE_WORKFLOWS[name]:
+        if departments is not None and step["agent"] not in departments:
+            continue
+        fixed = {k: v for k, v in step["params"].items() if not (isinstance(v, str) and "{" in v)}
+        hint = f" ({', '.join(f'{k}={v}' for k, v in fixed.items())})" if fixed else ""
+        lines.append(f"- {step['agent']}: {step['action']}{hint}")
+    return "\n".join(lines)
+
+
+def prompt_variant(user_input: str) -> Optional[Tuple[str, ...]]:
+    """
+    The departments a request names (with HR, in catalog order), or None
+    for the full catalog when it names none or all of them. The hire's role
+    is not searched, so "Contract Analyst" does not count as naming Legal.
+    """
+    hire = extract_hire(user_input)
+    text = user_input.replace(hire["role"], " ") if hire else user_input
+    named = {name for name, pattern in DEPARTMENT_MENTIONS.items() if pattern.search(text)}
+    if not named - {"HR"} or len(named | {"HR"}) == len(DEPARTMENT_CATALOG):
+        return None
+    return tuple(name for name in DEPARTMENT_CATALOG if name in named | {"HR"})
+
+
+@lru_cache(maxsize=None)
+def build_system_prompt(variant: Optional[Tuple[str, ...]] = None) -> str:
+    """System prompt for a department variant (None: every department and workflow)."""
+    departments = list(variant) if variant else list(DEPARTMENT_CATALOG)
+    return "\n\n".join([
+        HEADER,
+        "Departments and actions (params in braces):",
+        *map(render_department, departments),
+        "Standard workflows by role:",
+        *(render_workflow(name, variant) for name in ROLE_WORKFLOWS),
+        "Rules:\n" + "\n".join(f"- {rule}" for rule in RULES),
+        OUTPUT_FORMAT,
+    ])
@@ -0,0 +1,76 @@
+"""
+Lazily built agents.
+
+Agents are registered by name with a factory and only constructed the first
+time a graph node asks for them, so importing the graph builds no model
+clients. Factories import their agent modules on demand as well.
+"""
+import threading
+from functools import partial
+from typing import Callable, Dict, List, Any
+
+from telemetry.tracing import span
+
+DEPARTMENTS = ["HR", "IT", "Finance", "Legal", "Facilities", "Training"]
+
+
+class AgentRegistry:
+    """Name -> agent, built once on first get() (thread-safe)."""
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._agents: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        with self._lock:
+            self._factories[name] = factory
+            self._agents.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        agent = self._agents.get(name)
+        if agent is not None:
+            return agent
+
+        with self._lock:
+            agent = self._agents.get(name)
+            if agent is None:
+                if name not in self._factories:
+                    raise KeyError(f"No agent registered as '{name}'")
+                with span("init", name):
+                    agent = self._agents[name] = self._factories[name]()
+        return agent
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._factories
+
+    def names(self) -> List[str]:
+        return list(self._factories)
+
+    def loaded(self) -> List[str]:
+        """Agents built so far."""
+        return list(self._agents)
+
+    def preload(self, *names: str) -> None:
+        """Builds the given agents (all when none are given), e.g. before forking workers."""
+        for name in names or self.names():
+            self.get(name)
+
+    def reset(self) -> None:
+        """Drops built agents so the next get() rebuilds them (e.g. after changing the backend)."""
+        with self._lock:
+            self._agents.clear()
+
+
+def _build_orchestrator():
+    from agents.orchestrator import OrchestratorAgent
+    return OrchestratorAgent("Orchestrator")
+
+def _build_worker(name: str):
+    from agents.worker import WorkerAgent, WORKER_TOOLS
+    return WorkerAgent(name, WORKER_TOOLS[name])
+
+
+agent_registry = AgentRegistry()
+agent_registry.register("Orchestrator", _build_orchestrator)
+for _department in DEPARTMENTS:
+    agent_registry.register(_department, partial(_build_worker, _department))
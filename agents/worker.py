@@ -1,5 +1,10 @@
-from typing import List, Any
-from langchain_core.messages import SystemMessage, HumanMessage, BaseMessage
+import os
+import json
+import uuid
+from functools import cached_property
+from typing import List, Dict, Any, Optional
+from pydantic import ValidationError
+from langchain_core.messages import SystemMessage, HumanMessage, BaseMessage, AIMessage
 from external_crm_mock.mock import (
     hr_create_profile,
     it_provision_device,
@@ -14,26 +19,107 @@ from external_crm_mock.mock import (
 )
 
 from agents.base import BaseAgent
+from agents.llm_cache import tool_schemas
+from agents.coalescer import make_coalescer
+from agents.registry import agent_registry
+
+# Set TALENTFLOW_DIRECT_DISPATCH=0 to always route plan steps through the LLM.
+DIRECT_DISPATCH = os.getenv("TALENTFLOW_DIRECT_DISPATCH", "1") != "0"
 
 class WorkerAgent(BaseAgent):
     """Generic worker that executes tools."""
-    def __init__(self, name: str, tools: List[Any]):
+    def __init__(self, name: str, tools: List[Any], direct_dispatch: bool = DIRECT_DISPATCH):
         super().__init__(name)
         self.tools = tools
-        self.llm_with_tools = self.llm.bind_tools(tools)
+        self.tools_by_name = {t.name: t for t in tools}
+        self.direct_dispatch = direct_dispatch
+
+    @cached_property
+    def llm_with_tools(self):
+        return self.llm.bind_tools(self.tools)
+
+    @cached_property
+    def batched_llm(self):
+        """llm_with_tools behind a micro-batching coalescer (when enabled)."""
+        return make_coalescer(self.llm_with_tools)
+
+    @cached_property
+    def tool_schemas(self) -> List[Dict]:
+        return tool_schemas(self.tools)
+
+    def resolve_tool_call(self, step: Dict) -> Optional[Dict]:
+        """
+        Builds a tool call straight from a plan step. Returns None when the
+        action has no matching tool or its params fail the tool's schema.
+        """
+        action = step.get("action", "")
+        tool = self.tools_by_name.get(action) or self.tools_by_name.get(f"{self.name.lower()}_{action}")
+        if tool is None:
+            return None
+
+        try:
+            args = tool.args_schema.model_validate(step.get("params") or {})
+        except ValidationError:
+            return None
+
+        return {
+            "name": tool.name,
+            "args": args.model_dump(exclude_unset=True),
+            "id": f"direct-{uuid.uuid4().hex}",
+            "type": "tool_call",
+        }
+
+    def dispatch(self, step: Dict) -> Optional[AIMessage]:
+        """The step as a direct tool call, or None when the LLM has to resolve it."""
+        if self.direct_dispatch:
+            tool_call = self.resolve_tool_call(step)
+            if tool_call is not None:
+                return AIMessage(content="", tool_calls=[tool_call])
+        return None
+
+    def resolve_step(self, step: Dict) -> AIMessage:
+        """
+        Turns a plan step into tool calls. Well-formed steps are dispatched
+        directly; the LLM is only asked when params are missing or invalid.
+        """
+        return self.dispatch(step) or self.process_step(self._instruction(step))
+
+    async def aresolve_step(self, step: Dict) -> AIMessage:
+        """Async variant of resolve_step."""
+        return self.dispatch(step) or await self.aprocess_step(self._instruction(step))
+
+    @staticmethod
+    def _instruction(step: Dict) -> str:
+        return f"Execute: {step['action']} with params {json.dumps(step.get('params', {}))}"
 
     def process_step(self, instruction: str) -> Any:
         # Standard ReAct style invocation
-        messages = [
+        return self._invoke(self.batched_llm, self._messages(instruction))
+
+    async def aprocess_step(self, instruction: str) -> Any:
+        return await self._ainvoke(self.batched_llm, self._messages(instruction))
+
+    def _messages(self, instruction: str) -> List[BaseMessage]:
+        return [
             SystemMessage(content=f"You are the {self.name} Agent. Execute the requested task."),
             HumanMessage(content=instruction)
         ]
-        return self.llm_with_tools.invoke(messages)
 
 # ============= AGENT INSTANCES =============
-hr_agent = WorkerAgent("HR", [hr_create_profile])
-it_agent = WorkerAgent("IT", [it_provision_device])
-finance_agent = WorkerAgent("Finance", [finance_approve_budget, finance_setup_expense_account])
-legal_agent = WorkerAgent("Legal", [legal_generate_contract, legal_compliance_check])
-facilities_agent = WorkerAgent("Facilities", [facilities_assign_desk, facilities_issue_badge])
-training_agent = WorkerAgent("Training", [training_enroll_course, training_schedule_orientation])
+# Built on first use by agents.registry
+WORKER_TOOLS = {
+    "HR": [hr_create_profile],
+    "IT": [it_provision_device],
+    "Finance": [finance_approve_budget, finance_setup_expense_account],
+    "Legal": [legal_generate_contract, legal_compliance_check],
+    "Facilities": [facilities_assign_desk, facilities_issue_badge],
+    "Training": [training_enroll_course, training_schedule_orientation],
+}
+
+_INSTANCES = {f"{name.lower()}_agent": name for name in WORKER_TOOLS}
+
+def __getattr__(attr: str):
+    # Keeps `from agents.worker import hr_agent` working without eager construction
+    if attr in _INSTANCES:
+        return agent_registry.get(_INSTANCES[attr])
+    raise AttributeError(f"module {__name__!r} has no attribute {attr!r}")
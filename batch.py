@@ -0,0 +1,159 @@
+"""
+Bulk onboarding runner.
+
+Reads hires from a JSONL or CSV file (fields: name, role, email and an
+optional thread_id) and onboards each one on its own thread through the
+compiled graph. All hires share one event loop via app.astream, with a
+semaphore bounding how many are in flight.
+
+    python batch.py hires.jsonl --concurrency 256
+"""
+import os
+import csv
+import json
+import time
+import asyncio
+import argparse
+from typing import List, Dict
+
+from dotenv import load_dotenv
+from langchain_core.messages import HumanMessage
+
+load_dotenv()
+
+
+def load_hires(path: str) -> List[Dict]:
+    """Loads hires from a .jsonl or .csv file."""
+    with open(path, newline="") as f:
+        if path.endswith(".csv"):
+            return [dict(row) for row in csv.DictReader(f)]
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def onboarding_request(hire: Dict) -> str:
+    return f"Onboard {hire['name']} as a {hire['role']}. Email: {hire['email']}"
+
+
+async def onboard(app, hire: Dict) -> Dict:
+    """Runs one hire until it finishes or pauses and reports the outcome."""
+    thread_id = hire.get("thread_id") or f"onboarding-{hire['email']}"
+    config = {"configurable": {"thread_id": thread_id}}
+    started = time.perf_counter()
+    outcome = {"thread_id": thread_id, "name": hire.get("name")}
+
+    try:
+        async for _ in app.astream({"messages": [HumanMessage(content=onboarding_request(hire))]}, config):
+            pass
+        state = await app.aget_state(config)
+        if state.next:
+            outcome["outcome"] = "paused"
+            outcome["interrupts"] = [i.value for task in state.tasks for i in task.interrupts]
+        elif state.values.get("last_error"):
+            outcome["outcome"] = "failed"
+            outcome["error"] = state.values["last_error"]
+        else:
+            outcome["outcome"] = "completed"
+        outcome["steps_completed"] = len(state.values.get("completed_steps", []))
+        outcome["steps_total"] = len(state.values.get("plan", []))
+    except Exception as e:
+        outcome["outcome"] = "failed"
+        outcome["error"] = f"{type(e).__name__}: {e}"
+        # The graph never reached its end, so return what its steps still hold
+        from external_crm_mock.mock import crm
+        crm.release_holds(thread_id)
+
+    outcome["seconds"] = round(time.perf_counter() - started, 3)
+    return outcome
+
+
+async def run_batch(app, hires: List[Dict], concurrency: int = 64) -> Dict:
+    """Onboards all hires with at most `concurrency` in flight and summarises the run."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(hire: Dict) -> Dict:
+        async with semaphore:
+            return await onboard(app, hire)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(bounded(hire) for hire in hires))
+    elapsed = time.perf_counter() - started
+
+    counts = {}
+    for result in results:
+        counts[result["outcome"]] = counts.get(result["outcome"], 0) + 1
+
+    return {
+        "results": results,
+        "counts": counts,
+        "paused_threads": [r["thread_id"] for r in results if r["outcome"] == "paused"],
+        "elapsed_seconds": round(elapsed, 3),
+        "hires_per_second": round(len(results) / elapsed, 2) if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Onboard a batch of hires concurrently.")
+    parser.add_argument("path", help="JSONL or CSV file with name, role, email columns")
+    parser.add_argument("--concurrency", type=int, default=64, help="Max hires in flight (default: 64)")
+    parser.add_argument("--report", help="Write per-hire outcomes as JSONL to this file")
+    parser.add_argument("--quiet", action="store_true", help="Suppress per-step progress output")
+    parser.add_argument("--events", help="Append every progress event as JSONL to this file")
+    parser.add_argument("--approve", metavar="ANSWER",
+                        help="Answer every step left waiting for approval (e.g. ADMIN_OVERRIDE) and resume")
+    args = parser.parse_args()
+
+    if os.getenv("TALENTFLOW_LLM_BACKEND", "gemini") == "gemini" and not os.getenv("GOOGLE_API_KEY"):
+        print("❌ ERROR: GOOGLE_API_KEY not found! See README.md for setup.")
+        exit(1)
+
+    from graph.graph import app
+    from graph.approvals import approval_queue
+    from external_crm_mock.mock import crm
+
+    from telemetry.events import event_bus, ConsoleRenderer, JsonlSink
+
+    # Progress events are rendered by the event bus thread, off the event loop running the hires
+    if not args.quiet:
+        event_bus.subscribe(ConsoleRenderer(show_thread=True))
+    if args.events:
+        event_bus.subscribe(JsonlSink(args.events))
+
+    hires = load_hires(args.path)
+    print(f"🚀 Onboarding {len(hires)} hires with concurrency {args.concurrency}...")
+
+    summary = asyncio.run(run_batch(app, hires, args.concurrency))
+    event_bus.flush()
+
+    if args.report:
+        with open(args.report, "w") as f:
+            for result in summary["results"]:
+                f.write(json.dumps(result) + "\n")
+
+    print("\n" + "=" * 70)
+    print("📊 BATCH SUMMARY")
+    print("=" * 70)
+    for result in summary["results"]:
+        detail = result.get("error") or f"{result.get('steps_completed', 0)}/{result.get('steps_total', 0)} steps"
+        print(f"   • {result['thread_id']}: {result['outcome']} ({detail}, {result['seconds']}s)")
+    print(f"\n✅ Outcomes: {summary['counts']}")
+    if summary["paused_threads"]:
+        print(f"⏸️  Paused threads awaiting approval: {len(summary['paused_threads'])}")
+        waiting = approval_queue.summary()
+        print(f"🅿️  Approval queue: {waiting['waiting']} step(s) by reason {waiting['by_reason']}, "
+              f"by department {waiting['by_agent']}")
+    print(f"⏱️  {summary['elapsed_seconds']}s total, {summary['hires_per_second']} hires/sec")
+    if crm.journal is not None:
+        wal = crm.journal.stats()
+        print(f"💾 CRM log: {wal['records']} records in {wal['flushes']} group commits "
+              f"({wal['records_per_flush']}/commit, {wal['fsync_s']}s fsync), "
+              f"recovered {wal['recovered']['replayed']} records in {wal['recovered']['seconds']}s at startup")
+
+    if args.approve and len(approval_queue):
+        result = asyncio.run(approval_queue.aresolve(app, approval_queue.query(), args.approve, args.concurrency))
+        event_bus.flush()
+        print(f"✅ Approved {result['steps']} step(s) across {result['threads']} thread(s) in {result['seconds']}s: "
+              f"{result['resumed']} resumed, {result['paused']} still paused, {result['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Cold start benchmark: time from a fresh interpreter to the first graph node.
+
+Each run spawns a new Python process that imports the graph, streams one
+templated onboarding and reports how long the import, the first node and
+the whole hire took, plus which agents were actually built. --preload
+builds every agent right after import (the old eager behaviour) for
+comparison.
+
+    python -m benchmarks.bench_cold_start --runs 5
+    python -m benchmarks.bench_cold_start --runs 5 --preload
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List
+
+CHILD = """
+import time
+started = time.perf_counter()
+import json, os, sys, contextlib
+from langchain_core.messages import HumanMessage
+from graph.graph import compile_app
+from agents.registry import agent_registry
+imported = time.perf_counter()
+if {preload}:
+    agent_registry.preload()
+preloaded = time.perf_counter()
+
+app = compile_app()
+config = {{"configurable": {{"thread_id": "cold-start"}}}}
+request = {{"messages": [HumanMessage(content="Onboard Ada Park as a Backend Engineer. Email: ada.park@company.com")]}}
+first_node = None
+with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+    for _ in app.stream(request, config):
+        if first_node is None:
+            first_node = time.perf_counter()
+finished = time.perf_counter()
+
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "preload_ms": (preloaded - imported) * 1000,
+    "first_node_ms": (first_node - started) * 1000,
+    "first_hire_ms": (finished - started) * 1000,
+    "agents_built": agent_registry.loaded(),
+}}))
+"""
+
+
+def run_once(preload: bool, env: Dict[str, str]) -> Dict:
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD.format(preload=preload)],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fresh-process import and first-node latency.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--preload", action="store_true", help="Build every agent eagerly after import")
+    parser.add_argument("--backend", choices=["gemini", "fake"], default="gemini")
+    args = parser.parse_args()
+
+    env = dict(os.environ, TALENTFLOW_LLM_BACKEND=args.backend, TALENTFLOW_LLM_CACHE="0",
+               TALENTFLOW_CHECKPOINTER="memory")
+    # Templated hires never call the model, so a placeholder key is enough to build clients
+    env.setdefault("GOOGLE_API_KEY", "cold-start-benchmark")
+
+    runs: List[Dict] = [run_once(args.preload, env) for _ in range(args.runs)]
+    median = lambda field: statistics.median(r[field] for r in runs)
+
+    print("=" * 70)
+    print(f"🧊 COLD START ({args.backend} backend, {'eager' if args.preload else 'lazy'} agents, "
+          f"median of {args.runs} fresh processes)")
+    print("=" * 70)
+    print(f"Import graph:        {median('import_ms'):8.1f}ms")
+    if args.preload:
+        print(f"Build all agents:    {median('preload_ms'):8.1f}ms")
+    print(f"First node done:     {median('first_node_ms'):8.1f}ms")
+    print(f"First hire done:     {median('first_hire_ms'):8.1f}ms")
+    print(f"Agents built:        {', '.join(runs[-1]['agents_built']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+End-to-end throughput benchmark against the offline fake model.
+
+Drives the compiled graph over synthetic hires (paused threads are resumed
+with the admin override) and reports hires/sec, per-hire and per-node
+p50/p99 latency, time spent in the checkpointer and memory growth.
+No network or API key is needed.
+
+    python -m benchmarks.bench_throughput --hires 500 --concurrency 64 --latency-ms 20
+    python -m benchmarks.bench_throughput --llm-path --checkpointer sqlite
+"""
+import os
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+import tracemalloc
+from typing import List, Dict
+
+ROLES = ["Backend Engineer", "Sales Representative", "Contractor", "Data Analyst"]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def synthetic_hires(count: int) -> List[Dict]:
+    return [
+        {"name": f"Hire {i}", "role": ROLES[i % len(ROLES)], "email": f"hire{i}@company.com"}
+        for i in range(count)
+    ]
+
+
+def timed_checkpointer(saver, timings: Dict[str, List[float]]):
+    """Wraps the saver's read/write methods so every call's duration is recorded."""
+    def wrap(name, method, is_async):
+        if is_async:
+            async def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await method(*args, **kwargs)
+                finally:
+                    timings.setdefault(name, []).append(time.perf_counter() - started)
+        else:
+            def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    timings.setdefault(name, []).append(time.perf_counter() - started)
+        return timed
+
+    for name in ("put", "put_writes", "get_tuple"):
+        setattr(saver, name, wrap(name, getattr(saver, name), False))
+        setattr(saver, f"a{name}", wrap(name, getattr(saver, f"a{name}"), True))
+    return saver
+
+
+def make_node_timer(timings: Dict[str, List[float]]):
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class NodeTimer(BaseCallbackHandler):
+        """Records the wall time of every graph node run."""
+        run_inline = True
+
+        def __init__(self):
+            self.started = {}
+
+        def on_chain_start(self, serialized, inputs, *, run_id, tags=None, metadata=None, **kwargs):
+            node = (metadata or {}).get("langgraph_node")
+            if node and kwargs.get("name") == node and any(t.startswith("graph:step:") for t in tags or []):
+                self.started[run_id] = (node, time.perf_counter())
+
+        def on_chain_end(self, outputs, *, run_id, **kwargs):
+            entry = self.started.pop(run_id, None)
+            if entry is not None:
+                timings.setdefault(entry[0], []).append(time.perf_counter() - entry[1])
+
+        def on_chain_error(self, error, *, run_id, **kwargs):
+            # Interrupts surface as errors; count the time the node ran before pausing
+            self.on_chain_end(None, run_id=run_id)
+
+    return NodeTimer()
+
+
+async def run(args) -> Dict:
+    from langchain_core.messages import HumanMessage
+    from langgraph.types import Command
+
+    from graph.graph import compile_app
+    from graph.checkpoint import make_checkpointer
+    from agents.plan_cache import PlanTemplateCache
+    from agents.registry import agent_registry, DEPARTMENTS
+
+    if args.llm_path:
+        # Force every plan and step through the (fake) model
+        agent_registry.get("Orchestrator").plan_cache = PlanTemplateCache(workflows={})
+        for department in DEPARTMENTS:
+            agent_registry.get(department).direct_dispatch = False
+
+    checkpoint_timings: Dict[str, List[float]] = {}
+    node_timings: Dict[str, List[float]] = {}
+    app = compile_app(timed_checkpointer(make_checkpointer(), checkpoint_timings))
+    node_timer = make_node_timer(node_timings)
+
+    hires = synthetic_hires(args.hires)
+    hire_latencies: List[float] = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def onboard(hire: Dict):
+        config = {"configurable": {"thread_id": f"bench-{hire['email']}"}, "callbacks": [node_timer]}
+        request = f"Onboard {hire['name']} as a {hire['role']}. Email: {hire['email']}"
+        async with semaphore:
+            started = time.perf_counter()
+            payload = {"messages": [HumanMessage(content=request)]}
+            while True:
+                async for _ in app.astream(payload, config):
+                    pass
+                if not (await app.aget_state(config)).next:
+                    break
+                payload = Command(resume="ADMIN_OVERRIDE")
+            hire_latencies.append(time.perf_counter() - started)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if args.trace_memory:
+        tracemalloc.start()
+    traced_before = tracemalloc.get_traced_memory()[0] if args.trace_memory else 0
+
+    started = time.perf_counter()
+    await asyncio.gather(*(onboard(hire) for hire in hires))
+    elapsed = time.perf_counter() - started
+
+    traced_after = tracemalloc.get_traced_memory()[0] if args.trace_memory else 0
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    from agents.client_pool import client_pool
+    from agents.coalescer import RequestCoalescer
+
+    coalescers = [agent_registry.get(d).batched_llm for d in agent_registry.loaded() if d in DEPARTMENTS]
+    batching = [c.stats() for c in coalescers if isinstance(c, RequestCoalescer)]
+
+    return {
+        "pool": client_pool.stats(),
+        "batching": batching,
+        "elapsed": elapsed,
+        "hire_latencies": hire_latencies,
+        "node_timings": node_timings,
+        "checkpoint_timings": checkpoint_timings,
+        "rss_growth_kb": rss_after - rss_before,
+        "traced_growth_kb": (traced_after - traced_before) / 1024,
+    }
+
+
+def report(args, result: Dict) -> None:
+    hires = args.hires
+    elapsed = result["elapsed"]
+    ms = lambda seconds: f"{seconds * 1000:8.2f}"
+
+    print("=" * 70)
+    print(f"📈 THROUGHPUT BENCHMARK ({'LLM path' if args.llm_path else 'fast path'}, "
+          f"{args.checkpointer} checkpointer, {args.latency_ms}ms model latency)")
+    print("=" * 70)
+    print(f"Hires: {hires}   Concurrency: {args.concurrency}   Wall: {elapsed:.3f}s   "
+          f"Throughput: {hires / elapsed:.1f} hires/sec")
+    lat = result["hire_latencies"]
+    print(f"Per-hire latency (ms): p50 {ms(percentile(lat, 50))}   p99 {ms(percentile(lat, 99))}")
+
+    print(f"\n{'node':<20}{'runs':>8}{'p50 ms':>10}{'p99 ms':>10}{'total s':>10}")
+    for node, samples in sorted(result["node_timings"].items()):
+        print(f"{node:<20}{len(samples):>8}{ms(percentile(samples, 50)):>10}"
+              f"{ms(percentile(samples, 99)):>10}{sum(samples):>10.3f}")
+
+    print(f"\n{'checkpointer':<20}{'calls':>8}{'p50 ms':>10}{'p99 ms':>10}{'total s':>10}")
+    checkpoint_total = 0.0
+    for name, samples in sorted(result["checkpoint_timings"].items()):
+        checkpoint_total += sum(samples)
+        print(f"{name:<20}{len(samples):>8}{ms(percentile(samples, 50)):>10}"
+              f"{ms(percentile(samples, 99)):>10}{sum(samples):>10.3f}")
+    print(f"Checkpoint time per hire: {checkpoint_total / hires * 1000:.2f}ms")
+
+    pool = result["pool"]
+    print(f"\nModel requests: {pool['requests']}   Retries: {pool['retries']}   "
+          f"Throttled: {pool['throttled_s']:.2f}s total")
+    if result["batching"]:
+        requests = sum(b["requests"] for b in result["batching"])
+        batches = sum(b["batches"] for b in result["batching"])
+        print(f"Worker calls coalesced: {requests} in {batches} batches "
+              f"(mean {requests / max(batches, 1):.1f} per batch)")
+
+    print(f"\nMax RSS growth: {result['rss_growth_kb'] / 1024:.1f} MB")
+    if args.trace_memory:
+        print(f"Traced heap growth: {result['traced_growth_kb'] / 1024:.1f} MB "
+              f"({result['traced_growth_kb'] / hires:.1f} KB/hire)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end throughput benchmark.")
+    parser.add_argument("--hires", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Injected fake model latency per call")
+    parser.add_argument("--llm-path", action="store_true", help="Disable plan templates and direct dispatch")
+    parser.add_argument("--checkpointer", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--coalesce-ms", type=float, default=0, help="Micro-batch window for worker model calls")
+    parser.add_argument("--rpm", type=float, default=0, help="Client pool requests/minute limit (0 = unlimited)")
+    parser.add_argument("--trace-memory", action="store_true", help="Measure heap growth with tracemalloc (slower)")
+    args = parser.parse_args()
+
+    # Configure the backend before anything builds an agent
+    os.environ["TALENTFLOW_LLM_BACKEND"] = "fake"
+    os.environ["TALENTFLOW_FAKE_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["TALENTFLOW_LLM_CACHE"] = "0"
+    os.environ["TALENTFLOW_CHECKPOINTER"] = args.checkpointer
+    os.environ["TALENTFLOW_LLM_RPM"] = str(args.rpm)
+    os.environ["TALENTFLOW_COALESCE_WINDOW_MS"] = str(args.coalesce_ms)
+    if args.checkpointer == "sqlite":
+        os.environ["TALENTFLOW_CHECKPOINT_DB"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+    report(args, asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
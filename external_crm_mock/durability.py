@@ -0,0 +1,265 @@
+"""
+Durable mode for the mock CRM: a write-ahead log plus periodic snapshots.
+
+Every store mutation becomes one compact JSON line `[lsn, op, ...]` in the
+current log segment. Appends only buffer the record; a flusher thread
+writes and fsyncs whatever has accumulated (group commit), and callers
+wait until their own record is on disk. Every `snapshot_every` records a
+snapshot of all tables is written (atomically, via rename) and the log
+segments it covers are deleted. Recovery time is therefore bounded by one
+snapshot load plus at most `snapshot_every` replayed records.
+
+    TALENTFLOW_CRM_DIR=talentflow_crm python batch.py hires.jsonl
+
+Layout of the directory:
+    snapshot.json          {"lsn": N, "state": {...}}
+    wal-<first lsn>.log    log segments, one started after each snapshot
+"""
+import os
+import json
+import time
+import threading
+from typing import List, Optional, Iterator, Tuple
+
+SNAPSHOT_FILE = "snapshot.json"
+
+
+class WriteAheadLog:
+    """Append-only record log with group commit. LSNs start at 1 and never repeat."""
+    def __init__(self, directory: str, next_lsn: int = 1, group_commit_ms: float = 2.0, fsync: bool = True):
+        self.directory = directory
+        self.group_commit = group_commit_ms / 1000
+        self.fsync = fsync
+        self.next_lsn = next_lsn
+        self.flushed_lsn = next_lsn - 1
+        self._buffer: List[Tuple[int, List]] = []
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+        self._stats = {"records": 0, "flushes": 0, "fsync_s": 0.0}
+        self._file = self._open_segment(next_lsn)
+        self._flusher = threading.Thread(target=self._run, name="crm-wal-flusher", daemon=True)
+        self._flusher.start()
+
+    # ----- Appending -----
+    def append(self, record: List) -> int:
+        """Buffers a record and returns its LSN. It is durable once wait() returns."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Write-ahead log is closed")
+            lsn = self.next_lsn
+            self.next_lsn += 1
+            self._buffer.append((lsn, record))
+            self._cond.notify_all()
+        self._local.lsn = lsn
+        return lsn
+
+    def wait(self, lsn: Optional[int] = None) -> None:
+        """Blocks until `lsn` (default: this thread's last append) is flushed."""
+        lsn = lsn if lsn is not None else getattr(self._local, "lsn", 0)
+        with self._cond:
+            self._cond.wait_for(lambda: self.flushed_lsn >= lsn or self._closed)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._buffer or self._closed)
+                if not self._buffer and self._closed:
+                    return
+            # Let concurrent appenders join this commit
+            if self.group_commit:
+                time.sleep(self.group_commit)
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes and fsyncs everything buffered so far, then wakes its waiters."""
+        with self._io_lock:
+            with self._cond:
+                batch, self._buffer = self._buffer, []
+            if batch:
+                self._commit(batch)
+
+    def _commit(self, batch: List[Tuple[int, List]]) -> None:
+        """Writes one group of records to the current segment (caller holds _io_lock)."""
+        self._file.write("".join(json.dumps([lsn, *record], separators=(",", ":")) + "\n"
+                                 for lsn, record in batch))
+        self._file.flush()
+        started = time.perf_counter()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        with self._cond:
+            self.flushed_lsn = batch[-1][0]
+            self._stats["records"] += len(batch)
+            self._stats["flushes"] += 1
+            self._stats["fsync_s"] += time.perf_counter() - started
+            self._cond.notify_all()
+
+    # ----- Segments -----
+    def _open_segment(self, first_lsn: int):
+        return open(os.path.join(self.directory, f"wal-{first_lsn:012d}.log"), "a", encoding="utf-8")
+
+    def rotate(self) -> int:
+        """Flushes and starts a new segment. Returns the last LSN in the closed segments."""
+        with self._io_lock:
+            with self._cond:
+                last = self.next_lsn - 1
+                batch, self._buffer = self._buffer, []
+            # Records buffered before the rotation still belong to the old segment
+            if batch:
+                self._commit(batch)
+            self._file.close()
+            self._file = self._open_segment(last + 1)
+        return last
+
+    def drop_segments(self, upto_lsn: int) -> int:
+        """Deletes closed segments whose records are all <= upto_lsn (covered by a snapshot)."""
+        segments = segment_files(self.directory)
+        dropped = 0
+        for (first, path), following in zip(segments, segments[1:]):
+            if following[0] - 1 <= upto_lsn:
+                os.remove(path)
+                dropped += 1
+        return dropped
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._flusher.join()
+        self.flush()
+        self._file.close()
+
+    def stats(self):
+        with self._cond:
+            flushes = self._stats["flushes"]
+            return {**self._stats, "fsync_s": round(self._stats["fsync_s"], 3),
+                    "records_per_flush": round(self._stats["records"] / flushes, 2) if flushes else 0.0}
+
+
+def segment_files(directory: str) -> List[Tuple[int, str]]:
+    """(first lsn, path) of every log segment, oldest first."""
+    segments = []
+    for name in os.listdir(directory):
+        if name.startswith("wal-") and name.endswith(".log"):
+            segments.append((int(name[4:-4]), os.path.join(directory, name)))
+    return sorted(segments)
+
+
+def read_log(directory: str, after_lsn: int = 0) -> Iterator[Tuple[int, List]]:
+    """
+    Records with an LSN above `after_lsn`, in order. A torn last line (a
+    crash mid-write) ends the log and is cut off so new appends start clean.
+    """
+    for _, path in segment_files(directory):
+        with open(path, "r+", encoding="utf-8") as f:
+            offset = 0
+            for line in iter(f.readline, ""):
+                try:
+                    lsn, *record = json.loads(line)
+                except ValueError:
+                    f.truncate(offset)
+                    return
+                offset += len(line.encode("utf-8"))
+                if lsn > after_lsn:
+                    yield lsn, record
+
+
+class CRMJournal:
+    """Attaches a WAL to a CRMStore, snapshots it periodically and recovers it on open."""
+    def __init__(self, store, directory: str, snapshot_every: int = 10000,
+                 group_commit_ms: float = 2.0, fsync: bool = True):
+        self.store = store
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        os.makedirs(directory, exist_ok=True)
+        self.recovery = self._recover()
+        self.wal = WriteAheadLog(directory, self.recovery["last_lsn"] + 1, group_commit_ms, fsync)
+        self._snapshot_lock = threading.Lock()
+        self._snapshotting = threading.Lock()
+        self._since_snapshot = self.recovery["replayed"]
+        store.journal = self.record
+
+    def _recover(self) -> dict:
+        """Loads the snapshot, replays the log tail and reports how long it took."""
+        started = time.perf_counter()
+        snapshot_lsn = 0
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self.store.load(snapshot["state"])
+            snapshot_lsn = snapshot["lsn"]
+
+        last_lsn, replayed = snapshot_lsn, 0
+        for lsn, record in read_log(self.directory, snapshot_lsn):
+            self.store.apply(record)
+            last_lsn, replayed = lsn, replayed + 1
+        self.store.resume_sequences()
+        return {"snapshot_lsn": snapshot_lsn, "last_lsn": last_lsn, "replayed": replayed,
+                "seconds": round(time.perf_counter() - started, 3)}
+
+    def record(self, record: List) -> None:
+        """Store journal hook: logs a mutation and kicks off a snapshot when one is due."""
+        self.wal.append(record)
+        with self._snapshot_lock:
+            self._since_snapshot += 1
+            due = self._since_snapshot >= self.snapshot_every
+            if due:
+                self._since_snapshot = 0
+        if due:
+            threading.Thread(target=self.snapshot, name="crm-snapshot", daemon=True).start()
+
+    def wait(self) -> None:
+        """Blocks until this thread's mutations are on disk."""
+        self.wal.wait()
+
+    def snapshot(self) -> Optional[int]:
+        """
+        Writes a snapshot and drops the log segments it covers. The dump is
+        taken after rotating the log, so it contains at least everything up
+        to the returned LSN; records after it are replayed idempotently.
+        Returns None if another snapshot is already being written.
+        """
+        if not self._snapshotting.acquire(blocking=False):
+            return None
+        try:
+            return self._write_snapshot()
+        finally:
+            self._snapshotting.release()
+
+    def _write_snapshot(self) -> int:
+        lsn = self.wal.rotate()
+        state = self.store.dump()
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"lsn": lsn, "state": state}, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        self.wal.drop_segments(lsn)
+        return lsn
+
+    def close(self) -> None:
+        self.wal.close()
+
+    def stats(self):
+        return {**self.wal.stats(), "recovered": self.recovery}
+
+
+def make_journal(store) -> Optional[CRMJournal]:
+    """
+    Durable mode when TALENTFLOW_CRM_DIR is set. TALENTFLOW_CRM_SNAPSHOT_EVERY
+    (records, default 10000), TALENTFLOW_CRM_GROUP_COMMIT_MS (default 2) and
+    TALENTFLOW_CRM_FSYNC=0 (write without fsync) tune it.
+    """
+    directory = os.getenv("TALENTFLOW_CRM_DIR")
+    if not directory:
+        return None
+    return CRMJournal(
+        store,
+        directory,
+        snapshot_every=int(os.getenv("TALENTFLOW_CRM_SNAPSHOT_EVERY", "10000")),
+        group_commit_ms=float(os.getenv("TALENTFLOW_CRM_GROUP_COMMIT_MS", "2")),
+        fsync=os.getenv("TALENTFLOW_CRM_FSYNC", "1") != "0",
+    )
@@ -1,82 +1,143 @@
 import json
 import random
-from typing import Dict, Any
+import asyncio
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Any, Optional, Iterator
 from langchain_core.tools import tool
 
+from external_crm_mock.store import CRMStore, Employee, Contract, Badge
+from external_crm_mock.reservations import ReservationEngine
+from external_crm_mock.durability import CRMJournal, make_journal
+
+
+# The onboarding that CRM calls in the current context reserve for (see MockCorporateCRM.holding_for)
+_hold_owner: ContextVar[Optional[str]] = ContextVar("crm_hold_owner", default=None)
+
+
+def durable(method):
+    """Mutating CRM call: in durable mode it returns only once its journal records are on disk."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        if self.journal is not None:
+            self.journal.wait()
+        return result
+    wrapper.durable = True
+    return wrapper
+
 class MockCorporateCRM:
     """
     Simulates a database and external APIs.
     Includes logic to force a 'Soft Failure' (Out of Stock).
     """
-    def __init__(self):
-        self.db = {
-            "employees": [],
-            "inventory": {
+    def __init__(self, journal_factory=make_journal):
+        self.store = CRMStore(
+            inventory={
                 "macbook_pro": 0,      # <--- MACBOOK IS 0 TO TRIGGER PAUSE
                 "dell_xps": 5,
                 "thinkpad_t14": 3,
                 "ipad_pro": 10,
                 "monitor_27inch": 8
             },
-            "budgets": {
+            budgets={
                 "hr": 50000,
                 "it": 30000,
                 "facilities": 20000,
                 "training": 15000
             },
-            "desk_assignments": {},
-            "access_badges": {},
-            "training_courses": {
+            courses={
                 "compliance_101": {"capacity": 50, "enrolled": 35},
                 "security_basics": {"capacity": 30, "enrolled": 28},
                 "onboarding_orientation": {"capacity": 100, "enrolled": 45}
             },
-            "contracts": []
-        }
+        )
+        # Durable mode (TALENTFLOW_CRM_DIR): recover the tables, then log every mutation
+        self.journal: Optional[CRMJournal] = journal_factory(self.store)
+        self._desk_cursors: Dict[tuple, int] = {}
+        self._desk_lock = threading.Lock()
+
+    @property
+    def reservations(self) -> ReservationEngine:
+        return self.store.reservations
+
+    @contextmanager
+    def holding_for(self, owner: str) -> Iterator[None]:
+        """
+        Devices, budgets and seats taken inside the block stay held by `owner`
+        (an onboarding's thread id) until commit_holds() or release_holds().
+        Outside any owner, each call commits its hold before returning.
+        """
+        token = _hold_owner.set(owner)
+        try:
+            yield
+        finally:
+            _hold_owner.reset(token)
+
+    def _take(self, key: str, amount: float):
+        """A hold on `key` for the current owner, or None if the pool is short."""
+        return self.reservations.reserve(key, amount, owner=_hold_owner.get())
+
+    def _keep(self, hold) -> None:
+        """Commits an unowned hold right away; an owned one waits for its onboarding to finish."""
+        if hold.owner is None:
+            self.reservations.commit(hold)
+
+    @durable
+    def commit_holds(self, owner: str) -> int:
+        """Makes everything `owner` holds permanent (a finished onboarding). Returns how many holds."""
+        return self.reservations.commit_owner(owner)
+
+    @durable
+    def release_holds(self, owner: str) -> int:
+        """Returns every stock, budget or seat hold still taken by `owner` (e.g. a failed onboarding)."""
+        return self.reservations.release_owner(owner)
 
+    @durable
     def create_employee(self, name: str, role: str, email: str) -> str:
-        self.db["employees"].append({"name": name, "role": role, "email": email})
+        self.store.add_employee(name, role, email)
         return f"SUCCESS: Created HR profile for {name} ({role})."
 
+    @durable
     def provision_hardware(self, device: str, override_auth: str = None) -> str:
-        stock = self.db["inventory"].get(device, 0)
+        key = f"inventory:{device}"
+        # Reserving is atomic per SKU, so concurrent hires can never take the same last unit
+        hold = self._take(key, 1) if key in self.reservations else None
 
         # LOGIC: If out of stock and no auth provided, return specific flag
-        if stock < 1:
+        if hold is None:
             if override_auth == "ADMIN_OVERRIDE":
                 return f"SUCCESS: Admin Override accepted. Backordered {device} assigned."
             return "ERROR_OUT_OF_STOCK"
 
-        self.db["inventory"][device] -= 1
+        self._keep(hold)
         return f"SUCCESS: Assigned {device} from inventory."
 
+    @durable
     def approve_budget(self, department: str, amount: float, purpose: str) -> str:
         """Approve budget allocation for a department"""
-        if department not in self.db["budgets"]:
+        key = f"budget:{department}"
+        if key not in self.reservations:
             return f"ERROR: Department '{department}' not found."
 
-        available = self.db["budgets"][department]
-        if amount > available:
+        hold = self._take(key, amount)
+        if hold is None:
+            available = self.reservations.available(key)
             return f"ERROR_INSUFFICIENT_BUDGET: Requested ${amount}, but only ${available} available."
-
-        self.db["budgets"][department] -= amount
-        return f"SUCCESS: Approved ${amount} for {department} - {purpose}. Remaining budget: ${self.db['budgets'][department]}"
+        self._keep(hold)
+        return f"SUCCESS: Approved ${amount} for {department} - {purpose}. Remaining budget: ${hold.remaining}"
 
     def setup_expense_account(self, employee_name: str, limit: float) -> str:
         """Setup expense account for employee"""
         return f"SUCCESS: Expense account created for {employee_name} with ${limit} monthly limit."
 
+    @durable
     def generate_contract(self, employee_name: str, role: str, contract_type: str = "full-time") -> str:
         """Generate employment contract"""
-        contract_id = f"CONTRACT-{len(self.db['contracts']) + 1:04d}"
-        contract = {
-            "id": contract_id,
-            "employee": employee_name,
-            "role": role,
-            "type": contract_type
-        }
-        self.db["contracts"].append(contract)
-        return f"SUCCESS: Generated {contract_type} contract {contract_id} for {employee_name}."
+        contract = self.store.add_contract(employee_name, role, contract_type)
+        return f"SUCCESS: Generated {contract_type} contract {contract.id} for {employee_name}."
 
     def compliance_check(self, employee_name: str, check_type: str = "background") -> str:
         """Run compliance checks"""
@@ -85,95 +146,214 @@ class MockCorporateCRM:
             return f"SUCCESS: {check_type.title()} check passed for {employee_name}."
         return f"PENDING: {check_type.title()} check for {employee_name} requires manual review."
 
+    def free_desk(self, floor: int, series: str) -> str:
+        """
+        A desk number in `series` (e.g. "A7") that is free on `floor` and was
+        not handed out before by this process. Desks already assigned in the
+        store, including ones recovered from the durable log, are skipped.
+        """
+        with self._desk_lock:
+            number = self._desk_cursors.get((floor, series), 0) + 1
+            while self.desk_holder(floor, f"{series}{number}") is not None:
+                number += 1
+            self._desk_cursors[(floor, series)] = number
+        return f"{series}{number}"
+
+    @durable
     def assign_desk(self, employee_name: str, floor: int, desk_number: str) -> str:
         """Assign desk to employee"""
         location = f"Floor-{floor}-Desk-{desk_number}"
-        if location in self.db["desk_assignments"].values():
+        if self.store.claim_desk(employee_name, location) is not None:
             return f"ERROR: Desk {location} already assigned."
-
-        self.db["desk_assignments"][employee_name] = location
         return f"SUCCESS: Assigned {location} to {employee_name}."
 
+    @durable
     def issue_access_badge(self, employee_name: str, access_level: str = "standard") -> str:
         """Issue access badge"""
-        badge_id = f"BADGE-{len(self.db['access_badges']) + 1:05d}"
-        self.db["access_badges"][employee_name] = {
-            "badge_id": badge_id,
-            "access_level": access_level
-        }
-        return f"SUCCESS: Issued badge {badge_id} with {access_level} access to {employee_name}."
+        badge = self.store.issue_badge(employee_name, access_level)
+        return f"SUCCESS: Issued badge {badge.badge_id} with {access_level} access to {employee_name}."
 
+    @durable
     def enroll_training(self, employee_name: str, course_name: str) -> str:
         """Enroll employee in training course"""
-        if course_name not in self.db["training_courses"]:
+        course = self.store.courses.get(course_name)
+        if course is None:
             return f"ERROR: Course '{course_name}' not found."
 
-        course = self.db["training_courses"][course_name]
-        if course["enrolled"] >= course["capacity"]:
-            return f"ERROR_COURSE_FULL: {course_name} is at capacity ({course['capacity']}/{course['capacity']})."
-
-        course["enrolled"] += 1
-        return f"SUCCESS: Enrolled {employee_name} in {course_name}. ({course['enrolled']}/{course['capacity']})"
+        hold = self._take(f"course:{course_name}", 1)
+        if hold is None:
+            return f"ERROR_COURSE_FULL: {course_name} is at capacity ({course.capacity}/{course.capacity})."
+        self._keep(hold)
+        enrolled = course.capacity - hold.remaining
+        return f"SUCCESS: Enrolled {employee_name} in {course_name}. ({enrolled}/{course.capacity})"
 
     def schedule_orientation(self, employee_name: str, date: str) -> str:
         """Schedule new employee orientation"""
         return f"SUCCESS: Scheduled orientation for {employee_name} on {date}."
 
+    # ============= QUERIES =============
+    def find_employee(self, email: str) -> Optional[Employee]:
+        return self.store.employee_by_email(email)
+
+    def find_employees_by_name(self, name: str) -> List[Employee]:
+        return self.store.employees_named(name)
+
+    def desk_holder(self, floor: int, desk_number: str) -> Optional[str]:
+        return self.store.desk_holder(f"Floor-{floor}-Desk-{desk_number}")
+
+    def desk_for(self, employee_name: str) -> Optional[str]:
+        return self.store.desk_by_employee.get(employee_name)
+
+    def badge_for(self, employee_name: str) -> Optional[Badge]:
+        return self.store.badges.get(employee_name)
+
+    def contracts_for(self, employee_name: str) -> List[Contract]:
+        return self.store.contracts_for(employee_name)
+
+    # ============= ASYNC INTERFACE =============
+    # In memory these never block; a real CRM client would await its HTTP
+    # calls here and let the event loop serve other hires. In durable mode,
+    # mutating calls wait for the log's group commit on a worker thread.
+    async def _call(self, method, *args):
+        if self.journal is not None and getattr(method, "durable", False):
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def acommit_holds(self, owner: str) -> int:
+        return await self._call(self.commit_holds, owner)
+
+    async def acreate_employee(self, name: str, role: str, email: str) -> str:
+        return await self._call(self.create_employee, name, role, email)
+
+    async def aprovision_hardware(self, device: str, override_auth: str = None) -> str:
+        return await self._call(self.provision_hardware, device, override_auth)
+
+    async def aapprove_budget(self, department: str, amount: float, purpose: str) -> str:
+        return await self._call(self.approve_budget, department, amount, purpose)
+
+    async def asetup_expense_account(self, employee_name: str, limit: float) -> str:
+        return await self._call(self.setup_expense_account, employee_name, limit)
+
+    async def agenerate_contract(self, employee_name: str, role: str, contract_type: str = "full-time") -> str:
+        return await self._call(self.generate_contract, employee_name, role, contract_type)
+
+    async def acompliance_check(self, employee_name: str, check_type: str = "background") -> str:
+        return await self._call(self.compliance_check, employee_name, check_type)
+
+    async def aassign_desk(self, employee_name: str, floor: int, desk_number: str) -> str:
+        return await self._call(self.assign_desk, employee_name, floor, desk_number)
+
+    async def aissue_access_badge(self, employee_name: str, access_level: str = "standard") -> str:
+        return await self._call(self.issue_access_badge, employee_name, access_level)
+
+    async def aenroll_training(self, employee_name: str, course_name: str) -> str:
+        return await self._call(self.enroll_training, employee_name, course_name)
+
+    async def aschedule_orientation(self, employee_name: str, date: str) -> str:
+        return await self._call(self.schedule_orientation, employee_name, date)
+
 # Initialize Singleton
 crm = MockCorporateCRM()
 
+def async_impl(sync_tool):
+    """Registers the decorated coroutine as the ainvoke implementation of a @tool."""
+    def register(coroutine):
+        sync_tool.coroutine = coroutine
+        return coroutine
+    return register
+
 # ============= HR TOOLS =============
 @tool
 def hr_create_profile(name: str, role: str, email: str):
     """Creates an employee profile in the HR system."""
     return crm.create_employee(name, role, email)
 
+@async_impl(hr_create_profile)
+async def ahr_create_profile(name: str, role: str, email: str):
+    return await crm.acreate_employee(name, role, email)
+
 # ============= IT TOOLS =============
 @tool
 def it_provision_device(device: str, override_auth: str = None):
     """Provisions a laptop. If out of stock, requires override_auth."""
     return crm.provision_hardware(device, override_auth)
 
+@async_impl(it_provision_device)
+async def ait_provision_device(device: str, override_auth: str = None):
+    return await crm.aprovision_hardware(device, override_auth)
+
 # ============= FINANCE TOOLS =============
 @tool
 def finance_approve_budget(department: str, amount: float, purpose: str):
     """Approves budget allocation for a department. Returns error if insufficient funds."""
     return crm.approve_budget(department, amount, purpose)
 
+@async_impl(finance_approve_budget)
+async def afinance_approve_budget(department: str, amount: float, purpose: str):
+    return await crm.aapprove_budget(department, amount, purpose)
+
 @tool
 def finance_setup_expense_account(employee_name: str, monthly_limit: float):
     """Sets up an expense account for an employee with specified monthly limit."""
     return crm.setup_expense_account(employee_name, monthly_limit)
 
+@async_impl(finance_setup_expense_account)
+async def afinance_setup_expense_account(employee_name: str, monthly_limit: float):
+    return await crm.asetup_expense_account(employee_name, monthly_limit)
+
 # ============= LEGAL TOOLS =============
 @tool
 def legal_generate_contract(employee_name: str, role: str, contract_type: str = "full-time"):
     """Generates an employment contract. Contract types: full-time, part-time, contractor."""
     return crm.generate_contract(employee_name, role, contract_type)
 
+@async_impl(legal_generate_contract)
+async def alegal_generate_contract(employee_name: str, role: str, contract_type: str = "full-time"):
+    return await crm.agenerate_contract(employee_name, role, contract_type)
+
 @tool
 def legal_compliance_check(employee_name: str, check_type: str = "background"):
     """Runs compliance checks. Types: background, reference, credential."""
     return crm.compliance_check(employee_name, check_type)
 
+@async_impl(legal_compliance_check)
+async def alegal_compliance_check(employee_name: str, check_type: str = "background"):
+    return await crm.acompliance_check(employee_name, check_type)
+
 # ============= FACILITIES TOOLS =============
 @tool
 def facilities_assign_desk(employee_name: str, floor: int, desk_number: str):
     """Assigns a desk to an employee. Returns error if desk is already taken."""
     return crm.assign_desk(employee_name, floor, desk_number)
 
+@async_impl(facilities_assign_desk)
+async def afacilities_assign_desk(employee_name: str, floor: int, desk_number: str):
+    return await crm.aassign_desk(employee_name, floor, desk_number)
+
 @tool
 def facilities_issue_badge(employee_name: str, access_level: str = "standard"):
     """Issues an access badge. Access levels: standard, elevated, admin."""
     return crm.issue_access_badge(employee_name, access_level)
 
+@async_impl(facilities_issue_badge)
+async def afacilities_issue_badge(employee_name: str, access_level: str = "standard"):
+    return await crm.aissue_access_badge(employee_name, access_level)
+
 # ============= TRAINING TOOLS =============
 @tool
 def training_enroll_course(employee_name: str, course_name: str):
     """Enrolls employee in a training course. Returns error if course is full."""
     return crm.enroll_training(employee_name, course_name)
 
+@async_impl(training_enroll_course)
+async def atraining_enroll_course(employee_name: str, course_name: str):
+    return await crm.aenroll_training(employee_name, course_name)
+
 @tool
 def training_schedule_orientation(employee_name: str, orientation_date: str):
     """Schedules new employee orientation on the specified date."""
     return crm.schedule_orientation(employee_name, orientation_date)
+
+@async_impl(training_schedule_orientation)
+async def atraining_schedule_orientation(employee_name: str, orientation_date: str):
+    return await crm.aschedule_orientation(employee_name, orientation_date)
@@ -0,0 +1,228 @@
+"""
+Reservations for the CRM's countable resources: device stock, department
+budgets and course seats.
+
+Every resource is a Pool with its own lock, so concurrent onboardings only
+contend when they want the same SKU, budget or course. Taking a resource is
+two-phase: reserve() moves quantity from available to held (or fails
+without side effects), then commit() makes it permanent or release() gives
+it back. Holds carry an owner, so everything an abandoned onboarding still
+holds can be returned with release_owner(). Owned holds outlive a single
+call, so on_hold reports each owner's held total per pool for the journal.
+
+    with engine.hold("inventory:macbook_pro", 1, owner="Sarah") as hold:
+        ...  # record the assignment; an exception releases the hold
+"""
+import time
+import itertools
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Iterator, Callable, Tuple
+
+
+class ReservationError(ValueError):
+    """Unknown pool, or a hold that was already committed or released."""
+
+
+class Hold:
+    __slots__ = ("hold_id", "key", "amount", "owner", "remaining", "created")
+
+    def __init__(self, hold_id: str, key: str, amount: float, owner: Optional[str], remaining: float):
+        self.hold_id = hold_id
+        self.key = key
+        self.amount = amount
+        self.owner = owner
+        self.remaining = remaining   # Available quantity right after this hold was taken
+        self.created = time.time()
+
+
+class Pool:
+    """One reservable quantity. All fields are guarded by the pool's own lock."""
+    __slots__ = ("key", "capacity", "available", "held", "holds", "lock")
+
+    def __init__(self, key: str, capacity: float, available: Optional[float] = None):
+        self.key = key
+        self.capacity = capacity
+        self.available = capacity if available is None else available
+        self.held = 0
+        self.holds: Dict[str, Hold] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def committed(self) -> float:
+        return self.capacity - self.available - self.held
+
+
+class ReservationEngine:
+    """
+    Pools by key ("inventory:<sku>", "budget:<department>",
+    "course:<name>"). There is no engine-wide lock on the reserve/commit
+    path: pools are created up front and each operation locks one pool.
+    on_commit, if set, is called with the pool (still locked) after every
+    commit, so a journal sees each pool's commits in order. on_hold is
+    called the same way with the pool and an owner whenever that owner's
+    held total in it changes (unowned holds are not reported).
+    """
+    def __init__(self):
+        self._pools: Dict[str, Pool] = {}
+        self._hold_ids = itertools.count(1)
+        self.on_commit: Optional[Callable[[Pool], None]] = None
+        self.on_hold: Optional[Callable[[Pool, str], None]] = None
+
+    # ----- Pools -----
+    def add_pool(self, key: str, capacity: float, available: Optional[float] = None) -> Pool:
+        pool = self._pools[key] = Pool(key, capacity, available)
+        return pool
+
+    def pool(self, key: str) -> Pool:
+        pool = self._pools.get(key)
+        if pool is None:
+            raise ReservationError(f"Unknown resource '{key}'")
+        return pool
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._pools
+
+    def keys(self, prefix: str = "") -> List[str]:
+        return [key for key in self._pools if key.startswith(prefix)]
+
+    def available(self, key: str) -> float:
+        return self.pool(key).available
+
+    # ----- Reserve / commit / release -----
+    def reserve(self, key: str, amount: float = 1, owner: Optional[str] = None) -> Optional[Hold]:
+        """Takes `amount` from the pool as a hold, or returns None (and changes nothing) if it is short."""
+        pool = self.pool(key)
+        with pool.lock:
+            if amount > pool.available:
+                return None
+            pool.available -= amount
+            pool.held += amount
+            hold = Hold(f"{key}#{next(self._hold_ids)}", key, amount, owner, pool.available)
+            pool.holds[hold.hold_id] = hold
+            self._held_changed(pool, owner)
+        return hold
+
+    def commit(self, hold: Hold) -> None:
+        """Makes a hold permanent."""
+        pool = self.pool(hold.key)
+        with pool.lock:
+            if pool.holds.pop(hold.hold_id, None) is None:
+                raise ReservationError(f"Hold {hold.hold_id} is no longer active")
+            pool.held -= hold.amount
+            if self.on_commit is not None:
+                self.on_commit(pool)
+            self._held_changed(pool, hold.owner)
+
+    def release(self, hold: Hold) -> bool:
+        """Returns a hold's quantity to the pool. False if it was already committed or released."""
+        pool = self.pool(hold.key)
+        with pool.lock:
+            if pool.holds.pop(hold.hold_id, None) is None:
+                return False
+            pool.held -= hold.amount
+            pool.available += hold.amount
+            self._held_changed(pool, hold.owner)
+        return True
+
+    def commit_owner(self, owner: str) -> int:
+        """Commits every active hold of `owner` (e.g. an onboarding that finished). Returns how many."""
+        committed = 0
+        for pool in list(self._pools.values()):
+            with pool.lock:
+                holds = [h for h in pool.holds.values() if h.owner == owner]
+                for hold in holds:
+                    del pool.holds[hold.hold_id]
+                    pool.held -= hold.amount
+                    committed += 1
+                if holds:
+                    if self.on_commit is not None:
+                        self.on_commit(pool)
+                    self._held_changed(pool, owner)
+        return committed
+
+    def release_owner(self, owner: str) -> int:
+        """Releases every active hold of `owner` (e.g. an onboarding that failed). Returns how many."""
+        released = 0
+        for pool in list(self._pools.values()):
+            with pool.lock:
+                holds = [h for h in pool.holds.values() if h.owner == owner]
+                for hold in holds:
+                    del pool.holds[hold.hold_id]
+                    pool.held -= hold.amount
+                    pool.available += hold.amount
+                    released += 1
+                if holds:
+                    self._held_changed(pool, owner)
+        return released
+
+    def _held_changed(self, pool: Pool, owner: Optional[str]) -> None:
+        if owner is not None and self.on_hold is not None:
+            self.on_hold(pool, owner)
+
+    @contextmanager
+    def hold(self, key: str, amount: float = 1, owner: Optional[str] = None) -> Iterator[Optional[Hold]]:
+        """
+        reserve() as a context manager: yields the hold (None if the pool is
+        short), commits it when the block succeeds and releases it if the
+        block raises.
+        """
+        hold = self.reserve(key, amount, owner)
+        try:
+            yield hold
+        except BaseException:
+            if hold is not None:
+                self.release(hold)
+            raise
+        if hold is not None:
+            self.commit(hold)
+
+    def set_committed(self, key: str, committed: float) -> None:
+        """Restores a pool's committed total (recovery); active holds stay held."""
+        pool = self.pool(key)
+        with pool.lock:
+            pool.available = pool.capacity - committed - pool.held
+
+    def set_held(self, key: str, owner: str, amount: float) -> None:
+        """Restores what `owner` holds in a pool (recovery) as one hold; the committed total is kept."""
+        pool = self.pool(key)
+        with pool.lock:
+            committed = pool.committed
+            for hold in [h for h in pool.holds.values() if h.owner == owner]:
+                del pool.holds[hold.hold_id]
+                pool.held -= hold.amount
+            if amount:
+                hold = Hold(f"{key}#{next(self._hold_ids)}", key, amount, owner, 0)
+                pool.holds[hold.hold_id] = hold
+                pool.held += amount
+            pool.available = pool.capacity - committed - pool.held
+
+    @staticmethod
+    def held_by(pool: Pool, owner: str) -> float:
+        """What `owner` holds in the pool; call with the pool's lock held."""
+        return sum(h.amount for h in pool.holds.values() if h.owner == owner)
+
+    # ----- Inspection -----
+    def committed(self) -> Dict[str, float]:
+        """Committed total per pool, each read under its pool's lock."""
+        return self.totals()[0]
+
+    def totals(self) -> Tuple[Dict[str, float], Dict[str, Dict[str, float]]]:
+        """Committed total per pool and held amount per pool and owner, each pool read under its lock."""
+        committed: Dict[str, float] = {}
+        held: Dict[str, Dict[str, float]] = {}
+        for key, pool in list(self._pools.items()):
+            with pool.lock:
+                committed[key] = pool.committed
+                for hold in pool.holds.values():
+                    if hold.owner is not None:
+                        owners = held.setdefault(key, {})
+                        owners[hold.owner] = owners.get(hold.owner, 0) + hold.amount
+        return committed, held
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        snapshot = {}
+        for key, pool in list(self._pools.items()):
+            with pool.lock:
+                snapshot[key] = {"capacity": pool.capacity, "available": pool.available, "held": pool.held}
+        return snapshot
@@ -0,0 +1,285 @@
+import itertools
+import threading
+from typing import Dict, List, Optional, Callable, Any
+
+from external_crm_mock.reservations import ReservationEngine, Pool
+
+
+# ============= RECORDS =============
+class Employee:
+    __slots__ = ("employee_id", "name", "role", "email")
+
+    def __init__(self, employee_id: int, name: str, role: str, email: str):
+        self.employee_id = employee_id
+        self.name = name
+        self.role = role
+        self.email = email
+
+
+class Contract:
+    __slots__ = ("id", "employee", "role", "type")
+
+    def __init__(self, id: str, employee: str, role: str, type: str):
+        self.id = id
+        self.employee = employee
+        self.role = role
+        self.type = type
+
+
+class Badge:
+    __slots__ = ("badge_id", "employee", "access_level")
+
+    def __init__(self, badge_id: str, employee: str, access_level: str):
+        self.badge_id = badge_id
+        self.employee = employee
+        self.access_level = access_level
+
+
+class Course:
+    """A course whose seats are a reservation pool (held seats count as taken)."""
+    __slots__ = ("name", "seats")
+
+    def __init__(self, name: str, seats: Pool):
+        self.name = name
+        self.seats = seats
+
+    @property
+    def capacity(self) -> int:
+        return self.seats.capacity
+
+    @property
+    def enrolled(self) -> int:
+        return self.seats.capacity - self.seats.available
+
+
+# ============= STORE =============
+class CRMStore:
+    """
+    In-process tables for the mock CRM. Every lookup the CRM needs is
+    backed by a dict index, and IDs come from monotonic sequences so they
+    never collide after deletes. Device stock, budgets and course seats are
+    reservation pools with one lock each (see reservations.py).
+
+    Every mutation is also described as a compact record (a list starting
+    with an opcode) and passed to `journal` when one is attached. apply()
+    replays a record and is idempotent, since records carry the IDs they
+    created and pools log absolute committed totals.
+    """
+    def __init__(self, inventory: Dict[str, int], budgets: Dict[str, float], courses: Dict[str, Dict[str, int]]):
+        self.reservations = ReservationEngine()
+        for device, stock in inventory.items():
+            self.reservations.add_pool(f"inventory:{device}", stock)
+        for department, amount in budgets.items():
+            self.reservations.add_pool(f"budget:{department}", amount)
+        self.courses: Dict[str, Course] = {
+            name: Course(name, self.reservations.add_pool(
+                f"course:{name}", c["capacity"], c["capacity"] - c.get("enrolled", 0)))
+            for name, c in courses.items()
+        }
+
+        self.employees: Dict[int, Employee] = {}
+        self.employees_by_email: Dict[str, Employee] = {}  # latest profile per email
+        self.employees_by_name: Dict[str, Dict[int, Employee]] = {}
+
+        self.contracts: Dict[str, Contract] = {}
+        self.contracts_by_employee: Dict[str, Dict[str, Contract]] = {}
+
+        self.desk_by_employee: Dict[str, str] = {}
+        self.employee_by_desk: Dict[str, str] = {}   # reverse index of occupied desks
+        self._desk_lock = threading.Lock()            # guards both desk indexes
+
+        self.badges: Dict[str, Badge] = {}           # by employee name
+
+        self._employee_ids = itertools.count(1)
+        self._contract_ids = itertools.count(1)
+        self._badge_ids = itertools.count(1)
+
+        self.journal: Optional[Callable[[List], None]] = None
+        self.reservations.on_commit = lambda pool: self._log("r", pool.key, pool.committed)
+        # An onboarding's holds are journaled too, so they survive a crash until it commits or releases them
+        self.reservations.on_hold = self._log_held
+
+    def _log(self, *record: Any) -> None:
+        if self.journal is not None:
+            self.journal(list(record))
+
+    def _log_held(self, pool: Pool, owner: str) -> None:
+        if self.journal is not None:
+            self.journal(["h", pool.key, owner, self.reservations.held_by(pool, owner)])
+
+    # ----- Reservable quantities (read-only views) -----
+    @property
+    def inventory(self) -> Dict[str, int]:
+        return self._available("inventory:")
+
+    @property
+    def budgets(self) -> Dict[str, float]:
+        return self._available("budget:")
+
+    def _available(self, prefix: str) -> Dict:
+        return {key[len(prefix):]: self.reservations.available(key) for key in self.reservations.keys(prefix)}
+
+    # ----- Employees -----
+    def add_employee(self, name: str, role: str, email: str) -> Employee:
+        employee = self._put_employee(Employee(next(self._employee_ids), name, role, email))
+        self._log("e", employee.employee_id, name, role, email)
+        return employee
+
+    def _put_employee(self, employee: Employee) -> Employee:
+        self._drop_employee(employee.employee_id)
+        self.employees[employee.employee_id] = employee
+        self.employees_by_email[employee.email] = employee
+        self.employees_by_name.setdefault(employee.name, {})[employee.employee_id] = employee
+        return employee
+
+    def remove_employee(self, employee_id: int) -> Optional[Employee]:
+        employee = self._drop_employee(employee_id)
+        if employee is not None:
+            self._log("x", employee_id)
+        return employee
+
+    def _drop_employee(self, employee_id: int) -> Optional[Employee]:
+        employee = self.employees.pop(employee_id, None)
+        if employee is None:
+            return None
+        if self.employees_by_email.get(employee.email) is employee:
+            del self.employees_by_email[employee.email]
+        same_name = self.employees_by_name.get(employee.name, {})
+        same_name.pop(employee_id, None)
+        if not same_name:
+            self.employees_by_name.pop(employee.name, None)
+        return employee
+
+    def employee_by_email(self, email: str) -> Optional[Employee]:
+        return self.employees_by_email.get(email)
+
+    def employees_named(self, name: str) -> List[Employee]:
+        return list(self.employees_by_name.get(name, {}).values())
+
+    # ----- Contracts -----
+    def add_contract(self, employee: str, role: str, contract_type: str) -> Contract:
+        contract = self._put_contract(Contract(f"CONTRACT-{next(self._contract_ids):04d}", employee, role, contract_type))
+        self._log("k", contract.id, employee, role, contract_type)
+        return contract
+
+    def _put_contract(self, contract: Contract) -> Contract:
+        self.contracts[contract.id] = contract
+        self.contracts_by_employee.setdefault(contract.employee, {})[contract.id] = contract
+        return contract
+
+    def contracts_for(self, employee: str) -> List[Contract]:
+        return list(self.contracts_by_employee.get(employee, {}).values())
+
+    # ----- Desks -----
+    def desk_holder(self, location: str) -> Optional[str]:
+        return self.employee_by_desk.get(location)
+
+    def assign_desk(self, employee: str, location: str) -> None:
+        with self._desk_lock:
+            self._put_desk(employee, location)
+            self._log("d", employee, location)
+
+    def claim_desk(self, employee: str, location: str) -> Optional[str]:
+        """
+        Assigns `location` unless someone else holds it, checking and writing
+        under one lock so two hires can never both get it. Returns the other
+        holder when it is taken, else None.
+        """
+        with self._desk_lock:
+            holder = self.employee_by_desk.get(location)
+            if holder is not None and holder != employee:
+                return holder
+            self._put_desk(employee, location)
+            self._log("d", employee, location)
+        return None
+
+    def _put_desk(self, employee: str, location: str) -> None:
+        previous = self.desk_by_employee.get(employee)
+        if previous is not None:
+            self.employee_by_desk.pop(previous, None)
+        self.desk_by_employee[employee] = location
+        self.employee_by_desk[location] = employee
+
+    def release_desk(self, employee: str) -> Optional[str]:
+        with self._desk_lock:
+            location = self._drop_desk(employee)
+            if location is not None:
+                self._log("u", employee)
+        return location
+
+    def _drop_desk(self, employee: str) -> Optional[str]:
+        location = self.desk_by_employee.pop(employee, None)
+        if location is not None:
+            self.employee_by_desk.pop(location, None)
+        return location
+
+    # ----- Badges -----
+    def issue_badge(self, employee: str, access_level: str) -> Badge:
+        badge = Badge(f"BADGE-{next(self._badge_ids):05d}", employee, access_level)
+        self.badges[employee] = badge
+        self._log("b", badge.badge_id, employee, access_level)
+        return badge
+
+    # ----- Recovery -----
+    def apply(self, record: List) -> None:
+        """Replays one journal record (see _log calls) without journaling it again."""
+        op, args = record[0], record[1:]
+        if op == "e":
+            self._put_employee(Employee(*args))
+        elif op == "x":
+            self._drop_employee(*args)
+        elif op == "k":
+            self._put_contract(Contract(*args))
+        elif op == "d":
+            self._put_desk(*args)
+        elif op == "u":
+            self._drop_desk(*args)
+        elif op == "b":
+            badge = Badge(*args)
+            self.badges[badge.employee] = badge
+        elif op == "r":
+            self.reservations.set_committed(*args)
+        elif op == "h":
+            self.reservations.set_held(*args)
+        else:
+            raise ValueError(f"Unknown journal record {record!r}")
+
+    def dump(self) -> Dict[str, Any]:
+        """Plain-data copy of every table, for snapshots. Safe to call while hires are running."""
+        with self._desk_lock:
+            desks = list(self.desk_by_employee.items())
+        # Under each pool's lock, so a reservation in progress is never half counted
+        committed, held = self.reservations.totals()
+        return {
+            "employees": [[e.employee_id, e.name, e.role, e.email] for e in list(self.employees.values())],
+            "contracts": [[c.id, c.employee, c.role, c.type] for c in list(self.contracts.values())],
+            "desks": desks,
+            "badges": [[b.badge_id, b.employee, b.access_level] for b in list(self.badges.values())],
+            "committed": committed,
+            "held": held,
+        }
+
+    def load(self, state: Dict[str, Any]) -> None:
+        """Restores a dump() (snapshot) over the seeded tables."""
+        for row in state["employees"]:
+            self.apply(["e", *row])
+        for row in state["contracts"]:
+            self.apply(["k", *row])
+        for employee, location in state["desks"]:
+            self.apply(["d", employee, location])
+        for row in state["badges"]:
+            self.apply(["b", *row])
+        for key, committed in state["committed"].items():
+            if key in self.reservations:
+                self.apply(["r", key, committed])
+        for key, owners in state.get("held", {}).items():
+            for owner, amount in owners.items():
+                if key in self.reservations:
+                    self.apply(["h", key, owner, amount])
+
+    def resume_sequences(self) -> None:
+        """Moves the ID sequences past every recovered record."""
+        suffix = lambda ids: max((int(i.rsplit("-", 1)[1]) for i in ids), default=0)
+        self._employee_ids = itertools.count(max(self.employees, default=0) + 1)
+        self._contract_ids = itertools.count(suffix(self.contracts) + 1)
+        self._badge_ids = itertools.count(suffix(b.badge_id for b in self.badges.values()) + 1)
@@ -0,0 +1,259 @@
+"""
+Queue of parked steps waiting for an admin, across every paused thread.
+
+The router registers a thread's parked steps when it pauses for approval
+and drops them once answered. Entries are indexed by reason and department
+and listed oldest first, so an admin can see what is waiting and answer a
+whole group at once:
+
+    queue.query(reason="ERROR_OUT_OF_STOCK", device="macbook_pro")
+    await queue.aresolve(app, entries, "ADMIN_OVERRIDE")
+
+The index lives in this process. Another process (e.g. the CLI below
+against the SQLite checkpointer) rebuilds it from the paused threads:
+
+    TALENTFLOW_CHECKPOINTER=sqlite python -m graph.approvals list --device macbook_pro
+    TALENTFLOW_CHECKPOINTER=sqlite python -m graph.approvals resolve --answer ADMIN_OVERRIDE --device macbook_pro
+"""
+import time
+import asyncio
+import argparse
+import threading
+from typing import Dict, List, Any, Optional, Iterable, Set, Tuple
+
+from langgraph.types import Command
+
+Key = Tuple[str, int]
+
+
+class ApprovalEntry:
+    __slots__ = ("thread_id", "step", "agent", "tool", "args", "reason", "prompt", "parked_at")
+
+    def __init__(self, thread_id: str, step: int, agent: str, tool: str, args: Dict[str, Any],
+                 reason: str, prompt: str, parked_at: float):
+        self.thread_id = thread_id
+        self.step = step            # 0-based plan index, as in the thread's state
+        self.agent = agent
+        self.tool = tool
+        self.args = args
+        self.reason = reason
+        self.prompt = prompt
+        self.parked_at = parked_at
+
+    @classmethod
+    def from_pending(cls, thread_id: str, approval: Dict) -> "ApprovalEntry":
+        return cls(thread_id, approval["step"], approval["agent"], approval["tool"], approval["args"],
+                   approval["reason"], approval["prompt"], approval.get("parked_at", time.time()))
+
+    @property
+    def number(self) -> int:
+        """The step number as displayed (1-based), which is also its key in a resume dict."""
+        return self.step + 1
+
+    @property
+    def key(self) -> Key:
+        return (self.thread_id, self.step)
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.parked_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**{field: getattr(self, field) for field in self.__slots__}, "number": self.number,
+                "age_s": round(self.age, 1)}
+
+
+class ApprovalQueue:
+    """Parked steps of paused threads, indexed by reason and department."""
+    def __init__(self):
+        self._entries: Dict[Key, ApprovalEntry] = {}
+        self._by_reason: Dict[str, Set[Key]] = {}
+        self._by_agent: Dict[str, Set[Key]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ----- Index -----
+    def add(self, entries: Iterable[ApprovalEntry]) -> None:
+        with self._lock:
+            for entry in entries:
+                self._discard(entry.key)
+                self._entries[entry.key] = entry
+                self._by_reason.setdefault(entry.reason, set()).add(entry.key)
+                self._by_agent.setdefault(entry.agent, set()).add(entry.key)
+
+    def park(self, thread_id: str, approvals: Iterable[Dict]) -> None:
+        """Registers a thread's pending approvals (called by the router as it pauses)."""
+        self.add(ApprovalEntry.from_pending(thread_id, approval) for approval in approvals)
+
+    def release(self, thread_id: str, steps: Iterable[int]) -> None:
+        """Drops answered steps."""
+        with self._lock:
+            for step in steps:
+                self._discard((thread_id, int(step)))
+
+    def _discard(self, key: Key) -> Optional[ApprovalEntry]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._by_reason[entry.reason].discard(key)
+            self._by_agent[entry.agent].discard(key)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_reason.clear()
+            self._by_agent.clear()
+
+    # ----- Queries -----
+    def query(self, reason: Optional[str] = None, agent: Optional[str] = None, tool: Optional[str] = None,
+              older_than: Optional[float] = None, limit: Optional[int] = None, **args) -> List[ApprovalEntry]:
+        """
+        Waiting entries, oldest first. Keyword arguments other than the named
+        ones match the parked tool call's args (e.g. device="macbook_pro");
+        older_than is in seconds.
+        """
+        with self._lock:
+            keys = None
+            for index, value in ((self._by_reason, reason), (self._by_agent, agent)):
+                if value is not None:
+                    matches = index.get(value, set())
+                    keys = matches if keys is None else keys & matches
+            candidates = self._entries.values() if keys is None else [self._entries[key] for key in keys]
+
+            now = time.time()
+            results = []
+            for entry in sorted(candidates, key=lambda entry: entry.parked_at):
+                if tool is not None and entry.tool != tool:
+                    continue
+                if older_than is not None and now - entry.parked_at < older_than:
+                    continue
+                if any(entry.args.get(k) != v for k, v in args.items()):
+                    continue
+                results.append(entry)
+                if limit is not None and len(results) >= limit:
+                    break
+            return results
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts by reason and department, plus the oldest entry's age."""
+        with self._lock:
+            oldest = min((entry.parked_at for entry in self._entries.values()), default=None)
+            return {
+                "waiting": len(self._entries),
+                "threads": len({thread_id for thread_id, _ in self._entries}),
+                "by_reason": {reason: len(keys) for reason, keys in self._by_reason.items() if keys},
+                "by_agent": {agent: len(keys) for agent, keys in self._by_agent.items() if keys},
+                "oldest_age_s": round(time.time() - oldest, 1) if oldest is not None else 0.0,
+            }
+
+    # ----- Bulk resolution -----
+    def _claim(self, entries: Iterable[ApprovalEntry]) -> Dict[str, List[ApprovalEntry]]:
+        """Removes entries so concurrent resolutions never answer the same step twice; groups them by thread."""
+        by_thread: Dict[str, List[ApprovalEntry]] = {}
+        with self._lock:
+            for entry in entries:
+                claimed = self._discard(entry.key)
+                if claimed is not None:
+                    by_thread.setdefault(claimed.thread_id, []).append(claimed)
+        return by_thread
+
+    async def aresolve(self, app, entries: Iterable[ApprovalEntry], answer: Any, concurrency: int = 64) -> Dict[str, Any]:
+        """
+        Answers every entry with `answer`, resuming the affected threads
+        concurrently (one Command(resume=...) per thread, covering all its
+        claimed steps). Threads that are still waiting afterwards show up in
+        the queue again.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        counts = {"resumed": 0, "paused": 0, "failed": 0}
+        errors: Dict[str, str] = {}
+
+        async def resume(thread_id: str, claimed: List[ApprovalEntry]):
+            config = {"configurable": {"thread_id": thread_id}}
+            async with semaphore:
+                try:
+                    await app.ainvoke(Command(resume={str(entry.number): answer for entry in claimed}), config)
+                    state = await app.aget_state(config)
+                    counts["paused" if state.next else "resumed"] += 1
+                except Exception as e:
+                    # Put the entries back so they can be retried
+                    self.add(claimed)
+                    counts["failed"] += 1
+                    errors[thread_id] = f"{type(e).__name__}: {e}"
+
+        by_thread = self._claim(entries)
+        started = time.perf_counter()
+        await asyncio.gather(*(resume(thread_id, claimed) for thread_id, claimed in by_thread.items()))
+        return {
+            "steps": sum(len(claimed) for claimed in by_thread.values()),
+            "threads": len(by_thread),
+            **counts,
+            "errors": errors,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def resolve(self, app, entries: Iterable[ApprovalEntry], answer: Any, concurrency: int = 64) -> Dict[str, Any]:
+        """Blocking variant of aresolve (not for use inside a running event loop)."""
+        return asyncio.run(self.aresolve(app, entries, answer, concurrency))
+
+    # ----- Recovery -----
+    def rebuild(self, app) -> int:
+        """Re-indexes every paused thread in the app's checkpointer (e.g. after a restart). Returns the count."""
+        self.clear()
+        for thread_id in thread_ids(app.checkpointer):
+            state = app.get_state({"configurable": {"thread_id": thread_id}})
+            # The interrupt shows step numbers; the state keeps the plan indices the index uses
+            if any(task.interrupts for task in state.tasks):
+                self.park(thread_id, (state.values.get("pending_approvals") or {}).values())
+        return len(self)
+
+
+def thread_ids(checkpointer) -> List[str]:
+    """Every thread id stored in a checkpointer."""
+    if hasattr(checkpointer, "thread_ids"):
+        return list(checkpointer.thread_ids())
+    return list(dict.fromkeys(item.config["configurable"]["thread_id"] for item in checkpointer.list(None)))
+
+
+approval_queue = ApprovalQueue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List and bulk-answer steps waiting for approval.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help in (("list", "Show waiting steps"), ("resolve", "Answer matching steps and resume their threads")):
+        command = sub.add_parser(name, help=help)
+        command.add_argument("--reason", help="e.g. ERROR_OUT_OF_STOCK")
+        command.add_argument("--agent", help="Department, e.g. IT")
+        command.add_argument("--device", help="Only steps for this device (tool arg)")
+        command.add_argument("--older-than", type=float, metavar="MINUTES", help="Only steps parked this long ago")
+        command.add_argument("--limit", type=int)
+    sub.choices["resolve"].add_argument("--answer", required=True, help="e.g. the admin override code")
+    sub.choices["resolve"].add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    from graph.graph import app
+
+    print(f"🔎 Indexed {approval_queue.rebuild(app)} waiting step(s)")
+    filters = {"device": args.device} if args.device else {}
+    entries = approval_queue.query(reason=args.reason, agent=args.agent, limit=args.limit,
+                                   older_than=args.older_than * 60 if args.older_than is not None else None,
+                                   **filters)
+    if args.command == "list":
+        for entry in entries:
+            print(f"   • {entry.thread_id} step {entry.number}: {entry.agent} {entry.tool} {entry.args} "
+                  f"- {entry.reason} ({entry.age / 60:.1f} min)")
+        print(f"📋 {len(entries)} matching, {approval_queue.summary()}")
+        return
+
+    result = approval_queue.resolve(app, entries, args.answer, args.concurrency)
+    print(f"✅ Answered {result['steps']} step(s) in {result['threads']} thread(s) in {result['seconds']}s: "
+          f"{result['resumed']} resumed, {result['paused']} still paused, {result['failed']} failed")
+    for thread_id, error in result["errors"].items():
+        print(f"   ❌ {thread_id}: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Checkpointer selection and a durable SQLite backend with retention.
+
+    TALENTFLOW_CHECKPOINTER=sqlite TALENTFLOW_CHECKPOINT_DB=talentflow.db python main.py
+
+Compaction can be run against a live database (WAL mode allows it):
+
+    python -m graph.checkpoint compact --db talentflow.db --keep-last 5 --finished-older-than 24
+"""
+import os
+import asyncio
+import sqlite3
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Sequence, AsyncIterator
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.base import CheckpointTuple
+
+DEFAULT_DB_PATH = "talentflow_checkpoints.db"
+
+
+class RetentionSqliteSaver(SqliteSaver):
+    """
+    SqliteSaver (WAL mode) that keeps at most `keep_last` checkpoints per
+    thread, can purge finished threads and supports app.astream by running
+    its blocking calls on worker threads.
+    """
+    def __init__(self, conn: sqlite3.Connection, *, keep_last: Optional[int] = None, serde=None):
+        super().__init__(conn, serde=serde)
+        self.keep_last = keep_last
+
+    @classmethod
+    def from_path(cls, path: str = DEFAULT_DB_PATH, keep_last: Optional[int] = None) -> "RetentionSqliteSaver":
+        conn = sqlite3.connect(path, check_same_thread=False)
+        # setup() switches to WAL; in WAL mode NORMAL sync survives app crashes without an fsync per commit
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return cls(conn, keep_last=keep_last)
+
+    # ----- Retention -----
+    def put(self, config, checkpoint, metadata, new_versions):
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        if self.keep_last:
+            conf = next_config["configurable"]
+            self.trim_thread(conf["thread_id"], self.keep_last, conf.get("checkpoint_ns", ""))
+        return next_config
+
+    def trim_thread(self, thread_id: str, keep_last: int, checkpoint_ns: str = "") -> int:
+        """Deletes all but the newest `keep_last` checkpoints (and their writes) of a thread."""
+        with self.cursor() as cur:
+            cur.execute(
+                """
+                DELETE FROM checkpoints
+                WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN (
+                    SELECT checkpoint_id FROM checkpoints
+                    WHERE thread_id = ? AND checkpoint_ns = ?
+                    ORDER BY checkpoint_id DESC LIMIT ?
+                )
+                """,
+                (thread_id, checkpoint_ns, thread_id, checkpoint_ns, keep_last),
+            )
+            deleted = cur.rowcount
+            if deleted:
+                cur.execute(
+                    """
+                    DELETE FROM writes
+                    WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN (
+                        SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?
+                    )
+                    """,
+                    (thread_id, checkpoint_ns, thread_id, checkpoint_ns),
+                )
+        return deleted
+
+    def thread_ids(self) -> Sequence[str]:
+        with self.cursor(transaction=False) as cur:
+            cur.execute("SELECT DISTINCT thread_id FROM checkpoints")
+            return [row[0] for row in cur.fetchall()]
+
+    def purge_finished(self, older_than: timedelta) -> int:
+        """Deletes threads whose graph ended ('done' or 'failed') more than `older_than` ago."""
+        cutoff = datetime.now(timezone.utc) - older_than
+        purged = 0
+        for thread_id in self.thread_ids():
+            latest = self.get_tuple({"configurable": {"thread_id": thread_id}})
+            if latest is None or not is_finished(latest):
+                continue
+            if datetime.fromisoformat(latest.checkpoint["ts"]) < cutoff:
+                self.delete_thread(thread_id)
+                purged += 1
+        return purged
+
+    def compact(self, keep_last: Optional[int] = None, finished_older_than: Optional[timedelta] = None) -> dict:
+        """Applies retention to every thread, then reclaims space in the WAL and database file."""
+        purged = self.purge_finished(finished_older_than) if finished_older_than is not None else 0
+        trimmed = 0
+        keep_last = keep_last or self.keep_last
+        if keep_last:
+            with self.cursor(transaction=False) as cur:
+                cur.execute("SELECT DISTINCT thread_id, checkpoint_ns FROM checkpoints")
+                namespaces = cur.fetchall()
+            for thread_id, checkpoint_ns in namespaces:
+                trimmed += self.trim_thread(thread_id, keep_last, checkpoint_ns)
+
+        with self.lock:
+            # VACUUM rewrites the database through the WAL, so truncate the WAL afterwards
+            self.conn.execute("VACUUM")
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {"threads_purged": purged, "checkpoints_trimmed": trimmed}
+
+    # ----- Async support (app.astream) -----
+    async def aget_tuple(self, config) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path: str = ""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+FINISHED_STATUSES = ("done", "failed")
+
+
+def is_finished(checkpoint: CheckpointTuple) -> bool:
+    """True when the onboarding on this checkpoint has ended, completed or failed."""
+    return checkpoint.checkpoint.get("channel_values", {}).get("status") in FINISHED_STATUSES
+
+
+def make_checkpointer():
+    """Builds the checkpointer selected by TALENTFLOW_CHECKPOINTER ('memory' or 'sqlite')."""
+    kind = os.getenv("TALENTFLOW_CHECKPOINTER", "memory")
+    if kind == "sqlite":
+        keep_last = os.getenv("TALENTFLOW_CHECKPOINT_KEEP_LAST")
+        return RetentionSqliteSaver.from_path(
+            os.getenv("TALENTFLOW_CHECKPOINT_DB", DEFAULT_DB_PATH),
+            keep_last=int(keep_last) if keep_last else None,
+        )
+    if kind == "memory":
+        return MemorySaver()
+    raise ValueError(f"Unknown TALENTFLOW_CHECKPOINTER '{kind}' (expected 'memory' or 'sqlite')")
+
+
+def _disk_size(path: str) -> int:
+    """Bytes used by the database file and its WAL."""
+    return sum(os.path.getsize(p) for p in (path, f"{path}-wal") if os.path.exists(p))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the TalentFlow SQLite checkpoint store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compact = sub.add_parser("compact", help="Apply retention and reclaim disk space")
+    compact.add_argument("--db", default=os.getenv("TALENTFLOW_CHECKPOINT_DB", DEFAULT_DB_PATH))
+    compact.add_argument("--keep-last", type=int, help="Checkpoints to keep per thread")
+    compact.add_argument("--finished-older-than", type=float, metavar="HOURS",
+                         help="Delete threads that finished more than this many hours ago")
+    args = parser.parse_args()
+
+    saver = RetentionSqliteSaver.from_path(args.db)
+    older_than = timedelta(hours=args.finished_older_than) if args.finished_older_than is not None else None
+    before = _disk_size(args.db)
+    result = saver.compact(keep_last=args.keep_last, finished_older_than=older_than)
+    after = _disk_size(args.db)
+    print(f"🧹 Purged {result['threads_purged']} finished (done or failed) threads, "
+          f"trimmed {result['checkpoints_trimmed']} checkpoints ({before} -> {after} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+from typing import List, Dict, Iterable
+
+# Default ordering rules: department -> departments whose earlier steps it waits on.
+# Everything hangs off the HR profile; Facilities also needs the hardware from IT.
+DEPARTMENT_DEPENDENCIES: Dict[str, List[str]] = {
+    "HR": [],
+    "Legal": ["HR"],
+    "Finance": ["HR"],
+    "IT": ["HR"],
+    "Facilities": ["HR", "IT"],
+    "Training": ["HR"],
+}
+
+
+def default_dependencies(plan: List[Dict], idx: int) -> List[int]:
+    """Earlier steps that step `idx` waits on under the department rules."""
+    agent = plan[idx].get("agent")
+    if agent not in DEPARTMENT_DEPENDENCIES:
+        # Unknown department: stay conservative and run after everything before it.
+        return list(range(idx))
+    upstream = DEPARTMENT_DEPENDENCIES[agent]
+    return [i for i in range(idx) if plan[i].get("agent") in upstream]
+
+
+def explicit_dependencies(plan: List[Dict], idx: int, depends_on: Iterable) -> List[int]:
+    """
+    Resolves an explicit `depends_on` list. Entries are step indices or
+    department names (meaning every other step of that department).
+    """
+    resolved = set()
+    for dep in depends_on:
+        if isinstance(dep, int):
+            if 0 <= dep < len(plan) and dep != idx:
+                resolved.add(dep)
+        else:
+            resolved.update(i for i, s in enumerate(plan) if s.get("agent") == dep and i != idx)
+    return sorted(resolved)
+
+
+def resolve_dependencies(plan: List[Dict]) -> List[Dict]:
+    """Returns a copy of the plan where every step carries `depends_on` as step indices."""
+    resolved = []
+    for idx, step in enumerate(plan):
+        if "depends_on" in step:
+            deps = explicit_dependencies(plan, idx, step["depends_on"])
+        else:
+            deps = default_dependencies(plan, idx)
+        resolved.append({**step, "depends_on": deps})
+    return resolved
+
+
+def ready_steps(plan: List[Dict], completed: Iterable[int], parked: Iterable = ()) -> List[int]:
+    """
+    Steps that have not run yet and whose dependencies have all completed.
+    Parked steps (waiting for an approval, given as indices or their str keys)
+    are left out; their dependents wait for them as usual.
+    """
+    done = set(completed)
+    skip = {int(idx) for idx in parked}
+    return [
+        idx for idx, step in enumerate(plan)
+        if idx not in done and idx not in skip and all(dep in done for dep in step.get("depends_on", []))
+    ]
+
+
+def group_by_agent(plan: List[Dict], steps: Iterable[int]) -> List[List[int]]:
+    """
+    Splits a wave of ready steps into one group per department, in plan
+    order. A group runs as a single worker invocation; its steps are
+    independent of each other, since they all became ready together.
+    """
+    groups: Dict[str, List[int]] = {}
+    for idx in steps:
+        groups.setdefault(plan[idx].get("agent"), []).append(idx)
+    return list(groups.values())
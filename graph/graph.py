@@ -1,69 +1,120 @@
-import json
-from typing import Literal
+import os
+from typing import List, Literal, Union
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.types import interrupt
+from langgraph.types import Send
+from langchain_core.runnables import RunnableLambda
 
 from graph.state import AgentState
+from graph.dag import ready_steps, group_by_agent
+from graph.checkpoint import make_checkpointer
+from telemetry.tracing import span
 from graph.node import (
+    AGENT_NODES,
     node_orchestrator,
+    node_planner,
     node_router,
     node_hr_worker,
     node_it_worker,
     node_finance_worker,
     node_legal_worker,
     node_facilities_worker,
-    node_training_worker
+    node_training_worker,
+    anode_orchestrator,
+    anode_planner,
+    anode_router,
+    anode_hr_worker,
+    anode_it_worker,
+    anode_finance_worker,
+    anode_legal_worker,
+    anode_facilities_worker,
+    anode_training_worker
 )
 
 
+def dual(name: str, func, afunc) -> RunnableLambda:
+    """
+    Node with both sync and async bodies (app.stream uses func, app.astream
+    uses afunc), each wrapped in a node span for latency metrics.
+    """
+    def run(state):
+        with span("node", name):
+            return func(state)
+
+    async def arun(state):
+        with span("node", name):
+            return await afunc(state)
+
+    return RunnableLambda(run, afunc=arun, name=func.__name__)
+
+
 workflow = StateGraph(AgentState)
 
 # Add all agent nodes
-workflow.add_node("orchestrator", node_orchestrator)
-workflow.add_node("router", node_router)
-workflow.add_node("hr_agent", node_hr_worker)
-workflow.add_node("it_agent", node_it_worker)
-workflow.add_node("finance_agent", node_finance_worker)
-workflow.add_node("legal_agent", node_legal_worker)
-workflow.add_node("facilities_agent", node_facilities_worker)
-workflow.add_node("training_agent", node_training_worker)
+workflow.add_node("orchestrator", dual("orchestrator", node_orchestrator, anode_orchestrator))
+workflow.add_node("planner", dual("planner", node_planner, anode_planner))
+workflow.add_node("router", dual("router", node_router, anode_router))
+workflow.add_node("hr_agent", dual("hr_agent", node_hr_worker, anode_hr_worker))
+workflow.add_node("it_agent", dual("it_agent", node_it_worker, anode_it_worker))
+workflow.add_node("finance_agent", dual("finance_agent", node_finance_worker, anode_finance_worker))
+workflow.add_node("legal_agent", dual("legal_agent", node_legal_worker, anode_legal_worker))
+workflow.add_node("facilities_agent", dual("facilities_agent", node_facilities_worker, anode_facilities_worker))
+workflow.add_node("training_agent", dual("training_agent", node_training_worker, anode_training_worker))
 
 # Edges
 workflow.add_edge(START, "orchestrator")
 workflow.add_edge("orchestrator", "router")
 
-# Conditional Routing Logic - Now handles all 6 departments
-def route_next(state: AgentState) -> Literal["hr_agent", "it_agent", "finance_agent", "legal_agent", "facilities_agent", "training_agent", END]:
-    if state["status"] == "done":
-        return END
+# Set TALENTFLOW_GROUP_STEPS=0 to run every ready step as its own branch.
+GROUP_STEPS = os.getenv("TALENTFLOW_GROUP_STEPS", "1") != "0"
 
-    # Look at the plan to decide next node
-    current_step = state["plan"][state["current_step"]]
-    agent_name = current_step["agent"]
-
-    # Map agent names to node names
-    agent_routing = {
-        "HR": "hr_agent",
-        "IT": "it_agent",
-        "Finance": "finance_agent",
-        "Legal": "legal_agent",
-        "Facilities": "facilities_agent",
-        "Training": "training_agent"
-    }
+# Conditional Routing Logic - fan out each department's ready steps as one parallel branch
+def route_next(state: AgentState) -> Union[List[Send], Literal["__end__"]]:
+    if state["status"] in ("done", "failed"):
+        return END
 
-    return agent_routing.get(agent_name, END)
+    # Independent departments run concurrently; their results join back at the router.
+    # A department's steps share one worker invocation (one super-step and checkpoint).
+    plan = state["plan"]
+    pending = state.get("pending_approvals") or {}
+    ready = ready_steps(plan, state.get("completed_steps", []), parked=pending)
+    groups = group_by_agent(plan, ready) if GROUP_STEPS else [[idx] for idx in ready]
+    sends = [
+        Send(AGENT_NODES[plan[group[0]]["agent"]], {"plan": plan, "step_indices": group})
+        for group in groups
+    ]
+    # Parked steps the admin has answered are retried alongside them
+    sends += [
+        Send(AGENT_NODES[approval["agent"]], {"plan": plan, "step_indices": [approval["step"]], "approval": approval})
+        for approval in pending.values() if "override" in approval
+    ]
+    # A plan still streaming is read further while this wave executes
+    if state["status"] == "planning":
+        sends.append(Send("planner", {"plan": plan, "request": state["request"],
+                                      "completed": state.get("completed_steps", [])}))
+    return sends
 
-workflow.add_conditional_edges("router", route_next)
+workflow.add_conditional_edges("router", route_next, [*AGENT_NODES.values(), "planner", END])
 
-# Connect all agents back to router
+# Connect all agents back to router (parallel branches join here)
 workflow.add_edge("hr_agent", "router")
 workflow.add_edge("it_agent", "router")
 workflow.add_edge("finance_agent", "router")
 workflow.add_edge("legal_agent", "router")
 workflow.add_edge("facilities_agent", "router")
 workflow.add_edge("training_agent", "router")
+workflow.add_edge("planner", "router")
+
+# Sync runs execute branches and their memoized calls (graph/node.py) on one
+# thread pool, and a branch holds its thread while it waits for its call.
+# The default pool (CPU count + 4) would deadlock a wide fan-out on a small
+# machine, so it is sized for every department branch plus one call each.
+MAX_CONCURRENCY = int(os.getenv("TALENTFLOW_MAX_CONCURRENCY", "64"))
+
+def compile_app(checkpointer=None):
+    """Compiles the workflow. A checkpointer is required for Pause/Resume."""
+    compiled = workflow.compile(checkpointer=checkpointer if checkpointer is not None else make_checkpointer())
+    return compiled.with_config(max_concurrency=MAX_CONCURRENCY)
 
-# Compile with Memory (Required for Pause/Resume)
-checkpointer = MemorySaver()
-app = workflow.compile(checkpointer=checkpointer)
+# In-memory by default; TALENTFLOW_CHECKPOINTER=sqlite persists threads across restarts
+checkpointer = make_checkpointer()
+app = compile_app(checkpointer)
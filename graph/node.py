@@ -1,185 +1,593 @@
-import json
+import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from langchain_core.messages import AIMessage
+from langgraph.config import get_config
+from langgraph.func import task
 from langgraph.types import interrupt
 
-from graph.state import AgentState
-from agents.orchestrator import orchestrator
-from agents.worker import (
-    hr_agent,
-    it_agent,
-    finance_agent,
-    legal_agent,
-    facilities_agent,
-    training_agent
-)
-from external_crm_mock.mock import (
-    hr_create_profile,
-    it_provision_device,
-    finance_approve_budget,
-    finance_setup_expense_account,
-    legal_generate_contract,
-    legal_compliance_check,
-    facilities_assign_desk,
-    facilities_issue_badge,
-    training_enroll_course,
-    training_schedule_orientation
-)
-
+from graph.state import AgentState, StepTask, StepResult, PlanTask, PendingApproval
+from graph.dag import resolve_dependencies, ready_steps
+from graph.plan_compiler import compile_plan, check_steps, check_acyclic
+from graph.approvals import approval_queue
+from agents.registry import agent_registry
+from agents.worker import WorkerAgent
+from agents.plan_parser import PlanStream, PlanParseError
+from external_crm_mock.mock import crm
+from telemetry.tracing import span
+from telemetry.events import emit
+
+# Map plan agent names to graph node names
+AGENT_NODES = {
+    "HR": "hr_agent",
+    "IT": "it_agent",
+    "Finance": "finance_agent",
+    "Legal": "legal_agent",
+    "Facilities": "facilities_agent",
+    "Training": "training_agent"
+}
+
+# Set TALENTFLOW_STREAM_PLAN=0 to wait for the whole plan before executing any step.
+STREAM_PLAN = os.getenv("TALENTFLOW_STREAM_PLAN", "1") != "0"
+
+# Plans still being streamed, by thread id, least recently pulled first. They
+# are not checkpointed: after a restart the planner regenerates the plan and
+# keeps the steps already known. The planner drops a stream once it ends or
+# fails, including when the planner is cancelled. A run that dies elsewhere
+# leaves its stream behind, so streams not pulled for
+# TALENTFLOW_PLAN_STREAM_IDLE seconds (default 300) are dropped as well.
+PLAN_STREAM_IDLE = float(os.getenv("TALENTFLOW_PLAN_STREAM_IDLE", "300"))
+_plan_streams: "OrderedDict[str, Tuple[PlanStream, float]]" = OrderedDict()
+_plan_streams_lock = threading.Lock()
+
+def _keep_stream(thread_id: str, stream: PlanStream) -> None:
+    now = time.monotonic()
+    with _plan_streams_lock:
+        _plan_streams[thread_id] = (stream, now)
+        _plan_streams.move_to_end(thread_id)
+        while _plan_streams:
+            oldest, (_, used) = next(iter(_plan_streams.items()))
+            if now - used < PLAN_STREAM_IDLE:
+                break
+            # Dropping the last reference closes the model stream
+            del _plan_streams[oldest]
+
+def _take_stream(thread_id: str) -> Optional[PlanStream]:
+    with _plan_streams_lock:
+        entry = _plan_streams.pop(thread_id, None)
+    return entry[0] if entry is not None else None
+
+def _thread_id() -> str:
+    return get_config()["configurable"].get("thread_id", "")
+
+
+# Set TALENTFLOW_COMPILE_PLAN=0 to execute plans exactly as generated.
+COMPILE_PLAN = os.getenv("TALENTFLOW_COMPILE_PLAN", "1") != "0"
+# A step whose action belongs to another department fails the plan, unless
+# TALENTFLOW_MOVE_STEPS=1 lets the compiler move it to that department.
+MOVE_STEPS = os.getenv("TALENTFLOW_MOVE_STEPS", "0") != "0"
+
+def _compiled(request: str, steps: List[Dict], known: List[Dict] = (), complete: bool = False) -> List[Dict]:
+    """
+    New plan steps checked and fixed against the tool schemas (graph.plan_compiler)
+    with depends_on resolved. A complete plan is also ordered for its critical
+    path; a streamed one, whose first steps are already running, is only
+    checked for dependency cycles once its last step is in. Raises
+    PlanCompileError for a step that cannot run.
+    """
+    if not COMPILE_PLAN:
+        return resolve_dependencies(list(known) + steps)
+    notes: List[str] = []
+    started = time.perf_counter()
+    if complete and not known:
+        plan = compile_plan(steps, request, notes, MOVE_STEPS)
+    else:
+        plan = resolve_dependencies(list(known) + check_steps(steps, known, request, notes, MOVE_STEPS))
+        if complete:
+            check_acyclic(plan)
+    if notes:
+        emit("plan_compiled", notes=notes, micros=round((time.perf_counter() - started) * 1e6, 1))
+    return plan
+
+def _plan_started(request: str, steps: List[Dict], stream: Optional[PlanStream]):
+    """State update for a new plan; status 'planning' while more steps are streaming in."""
+    plan = _compiled(request, steps, complete=stream is None or stream.done)
+    update = {
+        "request": request,
+        "plan": plan,
+        "completed_steps": None,
+        "step_results": None,
+        "pending_approvals": None,
+        "current_step": 0,
+        "last_error": "",
+    }
+    if stream is not None and not stream.done:
+        _keep_stream(_thread_id(), stream)
+        emit("plan_created", steps=len(plan), streaming=True)
+        return {**update, "status": "planning"}
+    emit("plan_created", steps=len(plan), streaming=False)
+    return {**update, "status": "executing"}
+
+def _plan_failed(error: PlanParseError):
+    emit("plan_failed", error=str(error))
+    return {"status": "failed", "last_error": str(error)}
 
 def node_orchestrator(state: AgentState):
-    """The Brain: Generates the workflow plan."""
-    print("\n--- 🧠 ORCHESTRATOR: Generating Plan ---")
+    """The Brain: Generates the workflow plan, handing over the first steps as soon as they are written."""
+    emit("plan_requested")
     user_req = state["messages"][-1].content
-    plan = orchestrator.generate_plan(user_req)
-    print(f"Plan created with {len(plan)} steps.")
-    return {"plan": plan, "current_step": 0, "status": "executing"}
-
-
-def node_router(state: AgentState):
-    """Decides which agent works next or if we are done."""
-    idx = state["current_step"]
+    orchestrator = agent_registry.get("Orchestrator")
+    try:
+        if not STREAM_PLAN:
+            return _plan_started(user_req, orchestrator.generate_plan(user_req), None)
+        stream = orchestrator.stream_plan(user_req)
+        return _plan_started(user_req, stream.pull(), stream)
+    except PlanParseError as e:
+        return {**_plan_failed(e), "request": user_req, "plan": [], "completed_steps": None, "step_results": None,
+                "pending_approvals": None}
+
+async def anode_orchestrator(state: AgentState):
+    """Async variant of node_orchestrator."""
+    emit("plan_requested")
+    user_req = state["messages"][-1].content
+    orchestrator = agent_registry.get("Orchestrator")
+    try:
+        if not STREAM_PLAN:
+            return _plan_started(user_req, await orchestrator.agenerate_plan(user_req), None)
+        stream = orchestrator.astream_plan(user_req)
+        return _plan_started(user_req, await stream.apull(), stream)
+    except PlanParseError as e:
+        return {**_plan_failed(e), "request": user_req, "plan": [], "completed_steps": None, "step_results": None,
+                "pending_approvals": None}
+
+
+def _has_runnable(state: PlanTask, steps: List[Dict]) -> bool:
+    """True once a newly streamed step could start now instead of after the running wave."""
+    plan = resolve_dependencies(state["plan"] + steps)
+    return any(idx >= len(state["plan"]) for idx in ready_steps(plan, state["completed"]))
+
+def _plan_extended(state: PlanTask, steps: List[Dict], done: bool):
+    try:
+        plan = _compiled(state["request"], steps, state["plan"], complete=done)
+    except PlanParseError as e:
+        return _plan_failed(e)
+    added = len(plan) - len(state["plan"])
+    emit("plan_extended", added=added, steps=len(plan), done=done)
+    return {"plan": plan, "status": "executing" if done else "planning"}
+
+def node_planner(state: PlanTask):
+    """
+    Reads further into a streaming plan alongside the workers of the current
+    wave. It returns as soon as a new step could start right away; steps
+    that wait on the running wave are collected so they fan out together.
+    """
+    thread_id = _thread_id()
+    stream = _take_stream(thread_id)
+    try:
+        if stream is None:
+            # Stream lost (e.g. process restart): regenerate; steps already known are dropped as duplicates
+            plan = agent_registry.get("Orchestrator").generate_plan(state["request"])
+            return _plan_extended(state, plan, True)
+        steps = stream.pull()
+        while not stream.done and not _has_runnable(state, steps):
+            steps += stream.pull()
+    except PlanParseError as e:
+        return _plan_failed(e)
+    if not stream.done:
+        _keep_stream(thread_id, stream)
+    return _plan_extended(state, steps, stream.done)
+
+async def anode_planner(state: PlanTask):
+    """Async variant of node_planner."""
+    thread_id = _thread_id()
+    stream = _take_stream(thread_id)
+    try:
+        if stream is None:
+            plan = await agent_registry.get("Orchestrator").agenerate_plan(state["request"])
+            return _plan_extended(state, plan, True)
+        steps = await stream.apull()
+        while not stream.done and not _has_runnable(state, steps):
+            steps += await stream.apull()
+    except PlanParseError as e:
+        return _plan_failed(e)
+    if not stream.done:
+        _keep_stream(thread_id, stream)
+    return _plan_extended(state, steps, stream.done)
+
+
+# Admins number steps as they are shown (1-based); state keys are 0-based plan indices
+def _approval_requests(pending: Dict[str, PendingApproval]) -> List[Dict]:
+    """The interrupt payload: each parked step with its step number, which is also its answer key."""
+    return [{**pending[key], "step": int(key) + 1} for key in sorted(pending, key=int)]
+
+def _answers(decision: Any, pending: Dict[str, PendingApproval]) -> Dict[str, Any]:
+    """Resume value -> answers by state key. Dict keys are step numbers; other keys are ignored."""
+    if not isinstance(decision, dict):
+        return dict.fromkeys(pending, decision)
+    return {str(int(number) - 1): answer for number, answer in decision.items() if str(number).isdigit()}
+
+def _announce_pause(thread_id: str, pending: Dict[str, PendingApproval]) -> None:
+    emit("paused", step_indices=sorted(map(int, pending)))
+    # Indexed so admins can find and bulk-answer it (graph.approvals)
+    approval_queue.park(thread_id, pending.values())
+
+# Side effects of pausing run as a task: its completion is checkpointed with
+# the interrupt, so the router's replay on resume does not repeat them.
+@task(name="pause")
+def _pause(thread_id: str, pending: Dict[str, PendingApproval]) -> None:
+    _announce_pause(thread_id, pending)
+
+@task(name="pause")
+async def _apause(thread_id: str, pending: Dict[str, PendingApproval]) -> None:
+    _announce_pause(thread_id, pending)
+
+def _await_approvals(pending: Dict[str, PendingApproval]):
+    """
+    Pauses the thread until an admin answers for the parked steps. Only
+    called once nothing else can run. The resume value is one answer for
+    every parked step, or a dict of answers keyed by the step number as
+    displayed (e.g. {"5": "ADMIN_OVERRIDE"} for step 5); unanswered steps
+    stay parked.
+    """
+    thread_id = _thread_id()
+    _pause(thread_id, pending).result()
+    return _answered(thread_id, pending)
+
+async def _aawait_approvals(pending: Dict[str, PendingApproval]):
+    """Async variant of _await_approvals."""
+    thread_id = _thread_id()
+    await _apause(thread_id, pending)
+    return _answered(thread_id, pending)
+
+def _answered(thread_id: str, pending: Dict[str, PendingApproval]):
+    """Interrupts until the resume value answers at least one parked step; returns the state update."""
+    while True:
+        # Interrupt execution. When resumed, the value provided by Command(resume=...) is returned.
+        decision = interrupt(_approval_requests(pending))
+        answers = _answers(decision, pending)
+        approved = {key: {**pending[key], "override": answer} for key, answer in answers.items() if key in pending}
+        if approved:
+            break
+    approval_queue.release(thread_id, map(int, approved))
+    emit("resumed", step_indices=sorted(map(int, approved)))
+    return {"pending_approvals": approved, "status": "working"}
+
+def _route(state: AgentState):
+    """The routing decision as a state update (the next wave, done or failed), or None to wait for approvals."""
     plan = state["plan"]
-
-    if idx >= len(plan):
-        return {"status": "done"}
-
-    step = plan[idx]
-    print(f"\n--- 🔄 ROUTING: Step {idx + 1}/{len(plan)} -> {step['agent']} Agent ---")
-
-    # Return nothing creates a pass-through to the Conditional Edge
-    return {"status": "working"}
-
-def node_hr_worker(state: AgentState):
+    completed = state.get("completed_steps", [])
+    pending = state.get("pending_approvals") or {}
+    # While the plan is still streaming, the planner keeps running beside the workers
+    planning = state["status"] == "planning"
+
+    if state["status"] == "failed":
+        return {"status": "failed", "current_step": len(completed)}
+
+    if len(completed) >= len(plan) and not planning:
+        return {"status": "done", "current_step": len(completed)}
+
+    # Parked steps wait for their approval; everything that does not depend on them keeps going
+    ready = ready_steps(plan, completed, parked=pending)
+    if not ready and not planning:
+        if pending:
+            return None  # Nothing else can run: wait for an admin (see node_router)
+        return {"status": "failed", "current_step": len(completed),
+                "last_error": "Remaining steps have unsatisfiable dependencies."}
+
+    unknown = [idx for idx in ready if plan[idx]["agent"] not in AGENT_NODES]
+    if unknown:
+        return {"status": "failed", "current_step": len(completed),
+                "last_error": f"No agent for step {unknown[0] + 1}: {plan[unknown[0]]['agent']}"}
+
+    if ready:
+        emit("routing", step_indices=ready, agents=sorted({plan[idx]["agent"] for idx in ready}),
+             steps=len(plan), streaming=planning)
+
+    return {"status": "planning" if planning else "working", "current_step": len(completed)}
+
+# Devices, budgets and seats a thread's steps reserved are held until the
+# onboarding ends: committed when it is done, returned when it fails
+# (including a plan that cannot be finished).
+def node_router(state: AgentState):
+    """Decides which steps are ready to run next or if we are done."""
+    update = _route(state)
+    if update is None:
+        update = {**_await_approvals(state["pending_approvals"]), "current_step": len(state.get("completed_steps", []))}
+    if update["status"] == "done":
+        crm.commit_holds(_thread_id())
+    elif update["status"] == "failed":
+        crm.release_holds(_thread_id())
+    return update
+
+async def anode_router(state: AgentState):
+    """Async variant of node_router."""
+    update = _route(state)
+    if update is None:
+        update = {**await _aawait_approvals(state["pending_approvals"]), "current_step": len(state.get("completed_steps", []))}
+    if update["status"] == "done":
+        await crm.acommit_holds(_thread_id())
+    elif update["status"] == "failed":
+        crm.release_holds(_thread_id())
+    return update
+
+
+def _step_result(idx: int, tool_call, output: str, started: float) -> StepResult:
+    return {
+        "step": idx,
+        "tool": tool_call["name"],
+        "args": tool_call["args"],
+        "output": output,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+def _invoke_tool(tool, tool_input) -> str:
+    """Runs a tool call (or plain args) under a tool span and returns its text output."""
+    with span("tool", tool.name) as record, crm.holding_for(_thread_id()):
+        output = tool.invoke(tool_input)
+        output = getattr(output, "content", output)
+        record["result"] = str(output).split(":", 1)[0]
+        return output
+
+async def _ainvoke_tool(tool, tool_input) -> str:
+    """Async variant of _invoke_tool."""
+    with span("tool", tool.name) as record, crm.holding_for(_thread_id()):
+        output = await tool.ainvoke(tool_input)
+        output = getattr(output, "content", output)
+        record["result"] = str(output).split(":", 1)[0]
+        return output
+
+def _parked(agent: WorkerAgent, idx: int, approval: PendingApproval) -> Dict[str, PendingApproval]:
+    """pending_approvals entry for a step that needs an approval: it leaves the wave without completing."""
+    emit("step_parked", step=idx, agent=agent.name, tool=approval["tool"], reason=approval["reason"])
+    return {str(idx): {**approval, "step": idx, "parked_at": time.time()}}
+
+# Model and tool calls inside workers run as LangGraph tasks. Each result is
+# saved with the checkpoint as soon as it completes (keyed by thread, step
+# and call order), so a replayed step gets it back instead of paying for the
+# model again or repeating a tool's side effect. TALENTFLOW_MEMOIZE_STEPS=0
+# calls them directly.
+MEMOIZE_STEPS = os.getenv("TALENTFLOW_MEMOIZE_STEPS", "1") != "0"
+
+@task(name="llm_resolve_step")
+def _llm_resolve_step(department: str, step: Dict) -> AIMessage:
+    return agent_registry.get(department).resolve_step(step)
+
+@task(name="llm_resolve_step")
+async def _allm_resolve_step(department: str, step: Dict) -> AIMessage:
+    return await agent_registry.get(department).aresolve_step(step)
+
+@task(name="tool_call")
+def _tool_call(department: str, tool_name: str, tool_input) -> str:
+    return _invoke_tool(agent_registry.get(department).tools_by_name[tool_name], tool_input)
+
+@task(name="tool_call")
+async def _atool_call(department: str, tool_name: str, tool_input) -> str:
+    return await _ainvoke_tool(agent_registry.get(department).tools_by_name[tool_name], tool_input)
+
+def _gather(calls: List[Callable[[], Any]]) -> List:
+    """Runs blocking calls concurrently and returns their results in order."""
+    if len(calls) <= 1:
+        return [call() for call in calls]
+    with ContextThreadPoolExecutor(max_workers=len(calls)) as executor:
+        return list(executor.map(lambda call: call(), calls))
+
+def _resolve_steps(agent: WorkerAgent, steps: List[Dict]) -> List[AIMessage]:
+    """
+    One AIMessage of tool calls per step. Well-formed steps map straight onto
+    a tool call; the rest ask the LLM, all of them at once.
+    """
+    messages = [agent.dispatch(step) for step in steps]
+    todo = [i for i, msg in enumerate(messages) if msg is None]
+    if MEMOIZE_STEPS:
+        # Tasks start when called, so the whole group is in flight before the first result()
+        futures = [_llm_resolve_step(agent.name, steps[i]) for i in todo]
+        resolved = [future.result() for future in futures]
+    else:
+        resolved = _gather([partial(agent.resolve_step, steps[i]) for i in todo])
+    for i, msg in zip(todo, resolved):
+        messages[i] = msg
+    return messages
+
+async def _aresolve_steps(agent: WorkerAgent, steps: List[Dict]) -> List[AIMessage]:
+    """Async variant of _resolve_steps."""
+    messages = [agent.dispatch(step) for step in steps]
+    todo = [i for i, msg in enumerate(messages) if msg is None]
+    resolve = (lambda step: _allm_resolve_step(agent.name, step)) if MEMOIZE_STEPS else agent.aresolve_step
+    resolved = await asyncio.gather(*(resolve(steps[i]) for i in todo))
+    for i, msg in zip(todo, resolved):
+        messages[i] = msg
+    return messages
+
+def _call_tool(agent: WorkerAgent, tool, tool_input) -> str:
+    if not MEMOIZE_STEPS:
+        return _invoke_tool(tool, tool_input)
+    return _tool_call(agent.name, tool.name, tool_input).result()
+
+async def _acall_tool(agent: WorkerAgent, tool, tool_input) -> str:
+    if not MEMOIZE_STEPS:
+        return await _ainvoke_tool(tool, tool_input)
+    return await _atool_call(agent.name, tool.name, tool_input)
+
+def _call_tools(agent: WorkerAgent, calls: List[Tuple[int, Any, Dict]]) -> List[str]:
+    """Runs a group's tool calls concurrently; outputs come back in call order."""
+    if MEMOIZE_STEPS:
+        futures = [_tool_call(agent.name, tool.name, tool_call) for _, tool, tool_call in calls]
+        return [future.result() for future in futures]
+    return _gather([partial(_invoke_tool, tool, tool_call) for _, tool, tool_call in calls])
+
+async def _acall_tools(agent: WorkerAgent, calls: List[Tuple[int, Any, Dict]]) -> List[str]:
+    """Async variant of _call_tools."""
+    return list(await asyncio.gather(*(_acall_tool(agent, tool, tool_call) for _, tool, tool_call in calls)))
+
+def _tool_calls(agent: WorkerAgent, indices: List[int], messages: List[AIMessage]) -> List[Tuple[int, Any, Dict]]:
+    """(step, tool, tool call) for every call the agent has a tool for."""
+    return [
+        (idx, agent.tools_by_name[tool_call["name"]], tool_call)
+        for idx, msg in zip(indices, messages)
+        for tool_call in msg.tool_calls
+        if tool_call["name"] in agent.tools_by_name
+    ]
+
+def _steps_started(agent: WorkerAgent, plan: List[Dict], indices: List[int]) -> None:
+    for idx in indices:
+        emit("step_started", step=idx, agent=agent.name, action=plan[idx].get("action", ""))
+
+def _tool_result(agent: WorkerAgent, result: StepResult, blocked: bool) -> None:
+    emit("tool_result", step=result["step"], agent=agent.name, tool=result["tool"], output=str(result["output"]),
+         latency_ms=result["latency_ms"], blocked=blocked)
+
+def _group_update(agent: WorkerAgent, indices: List[int], messages: List[AIMessage],
+                  calls: List[Tuple[int, Any, Dict]], outputs: List[str], started: float, handle_output=None):
+    """State update for a finished group: completed steps, results, and any steps that parked."""
+    outputs_by_step: Dict[int, List] = {idx: [] for idx in indices}
+    for (idx, _, tool_call), output in zip(calls, outputs):
+        outputs_by_step[idx].append((tool_call, output))
+
+    completed, results, pending = [], [], {}
+    for idx in indices:
+        approval = None
+        for tool_call, output in outputs_by_step[idx]:
+            result = _step_result(idx, tool_call, output, started)
+            results.append(result)
+            blocked = handle_output(tool_call, output) if handle_output is not None else None
+            _tool_result(agent, result, blocked is not None)
+            if blocked is not None and approval is None:
+                approval = blocked
+        if approval is None:
+            completed.append(idx)
+            emit("step_finished", step=idx, agent=agent.name)
+        else:
+            pending.update(_parked(agent, idx, approval))
+
+    update = {"completed_steps": completed, "step_results": results, "messages": messages}
+    if pending:
+        update["pending_approvals"] = pending
+    return update
+
+def _run_worker(agent: WorkerAgent, state: StepTask, handle_output=None):
+    """
+    Resolves a department's ready steps into tool calls and executes them
+    in one invocation, independent calls concurrently. handle_output may
+    turn a blocking output into a PendingApproval, which parks that step
+    instead of pausing the thread.
+    """
+    if "approval" in state:
+        return _apply_approval(agent, state, handle_output)
+
+    indices = state["step_indices"]
+    _steps_started(agent, state["plan"], indices)
+    messages = _resolve_steps(agent, [state["plan"][idx] for idx in indices])
+    calls = _tool_calls(agent, indices, messages)
+    started = time.perf_counter()
+    outputs = _call_tools(agent, calls)
+    return _group_update(agent, indices, messages, calls, outputs, started, handle_output)
+
+async def _arun_worker(agent: WorkerAgent, state: StepTask, handle_output=None):
+    """Async variant of _run_worker."""
+    if "approval" in state:
+        return await _aapply_approval(agent, state, handle_output)
+
+    indices = state["step_indices"]
+    _steps_started(agent, state["plan"], indices)
+    messages = await _aresolve_steps(agent, [state["plan"][idx] for idx in indices])
+    calls = _tool_calls(agent, indices, messages)
+    started = time.perf_counter()
+    outputs = await _acall_tools(agent, calls)
+    return _group_update(agent, indices, messages, calls, outputs, started, handle_output)
+
+def _approved_call(state: StepTask) -> Dict:
+    """The parked tool call with the admin's answer filled in."""
+    approval = state["approval"]
+    return {"name": approval["tool"], "args": {**approval["args"], approval["param"]: approval["override"]}}
+
+def _approval_applied(agent: WorkerAgent, state: StepTask, tool_call: Dict, output: str, started: float,
+                      handle_output=None):
+    idx = state["approval"]["step"]
+    approval = state["approval"]
+    results = [_step_result(idx, tool_call, output, started)]
+    blocked = handle_output(tool_call, output) if handle_output is not None else None
+    _tool_result(agent, results[0], blocked is not None)
+    if blocked is not None:
+        # Still blocked (e.g. a wrong override code): park it again with the original call
+        return {"step_results": results, "pending_approvals": _parked(agent, idx, {**blocked, "args": approval["args"]})}
+    emit("step_finished", step=idx, agent=agent.name)
+    return {"completed_steps": [idx], "step_results": results, "pending_approvals": {str(idx): None}}
+
+def _apply_approval(agent: WorkerAgent, state: StepTask, handle_output=None):
+    """Retries a parked step's blocked tool call with the admin's answer."""
+    tool_call = _approved_call(state)
+    emit("step_retried", step=state["approval"]["step"], agent=agent.name)
+    started = time.perf_counter()
+    output = _call_tool(agent, agent.tools_by_name[tool_call["name"]], tool_call["args"])
+    return _approval_applied(agent, state, tool_call, output, started, handle_output)
+
+async def _aapply_approval(agent: WorkerAgent, state: StepTask, handle_output=None):
+    """Async variant of _apply_approval."""
+    tool_call = _approved_call(state)
+    emit("step_retried", step=state["approval"]["step"], agent=agent.name)
+    started = time.perf_counter()
+    output = await _acall_tool(agent, agent.tools_by_name[tool_call["name"]], tool_call["args"])
+    return _approval_applied(agent, state, tool_call, output, started, handle_output)
+
+def node_hr_worker(state: StepTask):
     """Executes HR tasks."""
-    idx = state["current_step"]
-    step = state["plan"][idx]
-
-    # Construct instruction from plan
-    instruction = f"Execute: {step['action']} with params {json.dumps(step['params'])}"
-    result = hr_agent.process_step(instruction)
-
-    # Simply Execute the tool call (Simplified for demo)
-    # In full production, we'd loop the tool execution.
-    for tool_call in result.tool_calls:
-        if tool_call['name'] == 'hr_create_profile':
-            output = hr_create_profile.invoke(tool_call)
-            print(f"✅ HR Output: {output}")
-
-    return {"current_step": idx + 1, "messages": [result]}
-
-def node_it_worker(state: AgentState):
-    """Executes IT tasks. HANDLES HITL INTERRUPTION."""
-    idx = state["current_step"]
-    step = state["plan"][idx]
-
-    # Check if we are resuming from an interrupt with new data
-    override_code = None
-    # If the tool previously failed, we might have injected an override code via Command
-    # (Simplified logic: we just check if we are retrying)
-
-    instruction = f"Execute: {step['action']} with params {json.dumps(step['params'])}"
-
-    # 1. Ask LLM what to do
-    ai_msg = it_agent.process_step(instruction)
-
-    # 2. Execute Tool
-    for tool_call in ai_msg.tool_calls:
-        if tool_call['name'] == 'it_provision_device':
-            output = it_provision_device.invoke(tool_call)
-
-            # --- 🛑 INTERRUPT LOGIC ---
-            if output == "ERROR_OUT_OF_STOCK":
-                print("🛑 CRITICAL: IT Agent reports Out of Stock.")
-                print("⏸️  PAUSING WORKFLOW. Waiting for Admin...")
-
-                # Interrupt execution. The graph stops here.
-                # When resumed, the value provided by Command(resume="...") is returned.
-                human_input = interrupt("Out of Stock. Please provide Admin Override Code.")
-
-                print(f"▶️  RESUMING: Received code '{human_input}'")
-
-                # Retry with the code provided by the human
-                retry_output = it_provision_device.invoke({
-                    "device": tool_call['args']['device'],
-                    "override_auth": human_input
-                })
-                print(f"✅ IT Output (Retry): {retry_output}")
-            else:
-                print(f"✅ IT Output: {output}")
-
-    return {"current_step": idx + 1, "messages": [ai_msg]}
-
-def node_finance_worker(state: AgentState):
+    return _run_worker(agent_registry.get("HR"), state)
+
+def _handle_out_of_stock(tool_call, output: str) -> Optional[PendingApproval]:
+    """Parks the step for an admin override when a device is out of stock."""
+    if output != "ERROR_OUT_OF_STOCK":
+        return None
+
+    # The retry with the override code runs once the admin answers (see node_router)
+    return {
+        "agent": "IT",
+        "tool": tool_call["name"],
+        "args": {k: v for k, v in tool_call["args"].items() if k != "override_auth"},
+        "param": "override_auth",
+        "reason": output,
+        "prompt": "Out of Stock. Please provide Admin Override Code.",
+    }
+
+def node_it_worker(state: StepTask):
+    """Executes IT tasks. Out-of-stock devices park the step for an admin override (HITL)."""
+    return _run_worker(agent_registry.get("IT"), state, handle_output=_handle_out_of_stock)
+
+def node_finance_worker(state: StepTask):
     """Executes Finance tasks."""
-    idx = state["current_step"]
-    step = state["plan"][idx]
+    return _run_worker(agent_registry.get("Finance"), state)
 
-    instruction = f"Execute: {step['action']} with params {json.dumps(step['params'])}"
-    ai_msg = finance_agent.process_step(instruction)
-
-    # Execute tool calls
-    for tool_call in ai_msg.tool_calls:
-        if tool_call['name'] == 'finance_approve_budget':
-            output = finance_approve_budget.invoke(tool_call)
-            print(f"✅ Finance Output: {output}")
-        elif tool_call['name'] == 'finance_setup_expense_account':
-            output = finance_setup_expense_account.invoke(tool_call)
-            print(f"✅ Finance Output: {output}")
-
-    return {"current_step": idx + 1, "messages": [ai_msg]}
-
-def node_legal_worker(state: AgentState):
+def node_legal_worker(state: StepTask):
     """Executes Legal tasks."""
-    idx = state["current_step"]
-    step = state["plan"][idx]
+    return _run_worker(agent_registry.get("Legal"), state)
 
-    instruction = f"Execute: {step['action']} with params {json.dumps(step['params'])}"
-    ai_msg = legal_agent.process_step(instruction)
+def node_facilities_worker(state: StepTask):
+    """Executes Facilities tasks."""
+    return _run_worker(agent_registry.get("Facilities"), state)
 
-    # Execute tool calls
-    for tool_call in ai_msg.tool_calls:
-        if tool_call['name'] == 'legal_generate_contract':
-            output = legal_generate_contract.invoke(tool_call)
-            print(f"✅ Legal Output: {output}")
-        elif tool_call['name'] == 'legal_compliance_check':
-            output = legal_compliance_check.invoke(tool_call)
-            print(f"✅ Legal Output: {output}")
+def node_training_worker(state: StepTask):
+    """Executes Training tasks."""
+    return _run_worker(agent_registry.get("Training"), state)
 
-    return {"current_step": idx + 1, "messages": [ai_msg]}
+# ============= ASYNC WORKERS =============
+async def anode_hr_worker(state: StepTask):
+    return await _arun_worker(agent_registry.get("HR"), state)
 
-def node_facilities_worker(state: AgentState):
-    """Executes Facilities tasks."""
-    idx = state["current_step"]
-    step = state["plan"][idx]
+async def anode_it_worker(state: StepTask):
+    return await _arun_worker(agent_registry.get("IT"), state, handle_output=_handle_out_of_stock)
 
-    instruction = f"Execute: {step['action']} with params {json.dumps(step['params'])}"
-    ai_msg = facilities_agent.process_step(instruction)
+async def anode_finance_worker(state: StepTask):
+    return await _arun_worker(agent_registry.get("Finance"), state)
 
-    # Execute tool calls
-    for tool_call in ai_msg.tool_calls:
-        if tool_call['name'] == 'facilities_assign_desk':
-            output = facilities_assign_desk.invoke(tool_call)
-            print(f"✅ Facilities Output: {output}")
-        elif tool_call['name'] == 'facilities_issue_badge':
-            output = facilities_issue_badge.invoke(tool_call)
-            print(f"✅ Facilities Output: {output}")
+async def anode_legal_worker(state: StepTask):
+    return await _arun_worker(agent_registry.get("Legal"), state)
 
-    return {"current_step": idx + 1, "messages": [ai_msg]}
+async def anode_facilities_worker(state: StepTask):
+    return await _arun_worker(agent_registry.get("Facilities"), state)
 
-def node_training_worker(state: AgentState):
-    """Executes Training tasks."""
-    idx = state["current_step"]
-    step = state["plan"][idx]
-
-    instruction = f"Execute: {step['action']} with params {json.dumps(step['params'])}"
-    ai_msg = training_agent.process_step(instruction)
-
-    # Execute tool calls
-    for tool_call in ai_msg.tool_calls:
-        if tool_call['name'] == 'training_enroll_course':
-            output = training_enroll_course.invoke(tool_call)
-            print(f"✅ Training Output: {output}")
-        elif tool_call['name'] == 'training_schedule_orientation':
-            output = training_schedule_orientation.invoke(tool_call)
-            print(f"✅ Training Output: {output}")
-
-    return {"current_step": idx + 1, "messages": [ai_msg]}
+async def anode_training_worker(state: StepTask):
+    return await _arun_worker(agent_registry.get("Training"), state)
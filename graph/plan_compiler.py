@@ -0,0 +1,246 @@
+"""
+Static checks and rewrites for a plan before the router executes it.
+
+Every step is checked against the worker tools' schemas:
+    - a department name in the wrong case ("it", "Facilities Agent") is
+      normalized; a step with no known department is rejected
+    - a step whose action belongs to another department is rejected, or
+      moved to that department when the caller opts in (move_steps)
+    - params are coerced to the tool's types, and missing ones are filled
+      from the hire's details (the request and the other steps' params),
+      so the step is dispatched directly instead of asking the model
+    - a step identical to an earlier one (same tool and args) is dropped
+
+A complete plan is then ordered for the shortest critical path. The
+department rules (HR first, IT before Facilities) are resolved into
+explicit dependencies, a dependency cycle is rejected, and steps are
+listed in dependency order with the longest remaining chain first.
+Compiling takes microseconds, so a bad plan fails before any step runs
+rather than halfway through.
+"""
+import heapq
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from agents.worker import WORKER_TOOLS
+from agents.plan_cache import extract_hire
+from agents.plan_parser import PlanParseError
+from graph.dag import DEPARTMENT_DEPENDENCIES, resolve_dependencies
+
+# Interchangeable param names for the hire's details
+PARAM_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "name": ("name", "employee_name"),
+    "employee_name": ("employee_name", "name"),
+}
+FACT_PARAMS = ("name", "employee_name", "role", "email")
+
+
+class PlanCompileError(PlanParseError):
+    """A plan step that cannot be executed (unknown department, dependency cycle)."""
+
+
+def _department(agent: Any) -> Optional[str]:
+    """The canonical department for an agent name, ignoring case and an 'agent' suffix."""
+    if not isinstance(agent, str):
+        return None
+    key = agent.strip().lower().replace("_", " ")
+    if key.endswith(" agent"):
+        key = key[:-len(" agent")].strip()
+    for department in WORKER_TOOLS:
+        if department.lower() == key:
+            return department
+    return None
+
+
+def find_tool(department: Optional[str], action: str, anywhere: bool = False):
+    """
+    (department, tool) for a step's action in its own department, or in any
+    department with `anywhere`; (None, None) if there is none.
+    """
+    departments = [department] if department else []
+    if anywhere:
+        departments += [d for d in WORKER_TOOLS if d != department]
+    for name in departments:
+        for tool in WORKER_TOOLS[name]:
+            if action in (tool.name, tool.name[len(name) + 1:]):
+                return name, tool
+    return None, None
+
+
+def hire_facts(request: str, steps: List[Dict]) -> Dict[str, Any]:
+    """The hire's name, role and email as stated in the request or any step's params."""
+    facts: Dict[str, Any] = dict(extract_hire(request) or {}) if request else {}
+    for step in steps:
+        params = step.get("params") or {}
+        for key in FACT_PARAMS:
+            if key in params and params[key] not in (None, ""):
+                facts.setdefault(key, params[key])
+    for key, aliases in PARAM_ALIASES.items():
+        if key not in facts:
+            value = next((facts[alias] for alias in aliases if alias in facts), None)
+            if value is not None:
+                facts[key] = value
+    return facts
+
+
+def _fill_params(tool, params: Dict, facts: Dict[str, Any]) -> Tuple[Dict, bool]:
+    """Params validated against the tool schema (missing ones filled from facts); False if still invalid."""
+    schema = tool.args_schema
+    filled = dict(params)
+    for field, info in schema.model_fields.items():
+        if field not in filled and info.is_required():
+            value = next((facts[alias] for alias in PARAM_ALIASES.get(field, (field,)) if alias in facts), None)
+            if value is not None:
+                filled[field] = value
+    try:
+        return schema.model_validate(filled).model_dump(exclude_unset=True), True
+    except ValidationError:
+        return params, False
+
+
+def check_step(step: Dict, index: int, facts: Dict[str, Any], notes: List[str], move_steps: bool = False) -> Dict:
+    """
+    One step with its department, action and params fixed where possible.
+    Raises PlanCompileError, also for an action of another department
+    unless move_steps allows moving the step there.
+    """
+    agent = _department(step.get("agent"))
+    department, tool = find_tool(agent, step.get("action", ""), anywhere=move_steps)
+    if tool is None:
+        owner, _ = find_tool(None, step.get("action", ""), anywhere=True)
+        if owner is not None and owner != agent:
+            raise PlanCompileError(f"action '{step.get('action')}' belongs to {owner}, not '{step.get('agent')}'",
+                                   step=index)
+    if department is None and agent is None:
+        raise PlanCompileError(f"unknown agent '{step.get('agent')}' for action '{step.get('action')}'", step=index)
+    if tool is None:
+        # Known department, unknown action: the worker's model interprets it
+        notes.append(f"step {index + 1}: no tool for '{step.get('action')}', left to the {agent} model")
+        return {**step, "agent": agent}
+    if department != step.get("agent"):
+        notes.append(f"step {index + 1}: agent '{step.get('agent')}' -> {department}")
+
+    params, valid = _fill_params(tool, step.get("params") or {}, facts)
+    if not valid:
+        notes.append(f"step {index + 1}: params do not match {tool.name}, left to the {department} model")
+    elif set(params) - set(step.get("params") or {}):
+        notes.append(f"step {index + 1}: filled {', '.join(sorted(set(params) - set(step.get('params') or {})))}")
+    return {**step, "agent": department, "params": params}
+
+
+def _signature(step: Dict) -> Tuple:
+    _, tool = find_tool(step["agent"], step.get("action", ""))
+    name = tool.name if tool is not None else f"{step['agent']}:{step.get('action')}"
+    return name, tuple(sorted((k, repr(v)) for k, v in (step.get("params") or {}).items()))
+
+
+def check_steps(steps: List[Dict], known: List[Dict] = (), request: str = "",
+                notes: Optional[List[str]] = None, move_steps: bool = False) -> List[Dict]:
+    """
+    Validates and fixes steps appended after `known` (already compiled
+    steps) and drops duplicates of any earlier step. Explicit depends_on
+    indices are renumbered to match. Notes refer to steps by their number
+    in the plan as generated.
+    """
+    notes = notes if notes is not None else []
+    known = list(known)
+    facts = hire_facts(request, known + list(steps))
+    seen = {_signature(step): idx for idx, step in enumerate(known)}    # signature -> index after dedupe
+    first = dict(seen)                                                  # signature -> index as generated
+    kept: List[Dict] = []
+    renumber: Dict[int, int] = {idx: idx for idx in range(len(known))}
+    for offset, step in enumerate(steps):
+        index = len(known) + offset
+        step = check_step(step, index, facts, notes, move_steps)
+        signature = _signature(step)
+        if signature in seen:
+            notes.append(f"step {index + 1}: duplicate of step {first[signature] + 1}, removed")
+            renumber[index] = seen[signature]
+            continue
+        renumber[index] = seen[signature] = len(known) + len(kept)
+        first[signature] = index
+        kept.append(step)
+
+    for step in kept:
+        if "depends_on" in step:
+            step["depends_on"] = [renumber.get(dep, dep) if isinstance(dep, int) else dep
+                                  for dep in step["depends_on"]]
+    return kept
+
+
+def _department_rank(agent: str, ranks: Dict[str, int]) -> int:
+    """Depth of a department in the ordering rules (HR 0, ..., Facilities 2)."""
+    if agent not in ranks:
+        ranks[agent] = 0  # Guards against cycles in the rules themselves
+        upstream = DEPARTMENT_DEPENDENCIES.get(agent, [])
+        ranks[agent] = 1 + max((_department_rank(dep, ranks) for dep in upstream), default=-1)
+    return ranks[agent]
+
+
+def order_steps(plan: List[Dict]) -> List[Dict]:
+    """
+    Resolves dependencies and lists steps in dependency order, longest
+    remaining chain first, so the critical path starts earliest.
+    depends_on is renumbered for the new order. Raises PlanCompileError on
+    a dependency cycle.
+    """
+    # Rule-based dependencies only look at earlier steps, so first put every step after its upstream departments
+    ranks: Dict[str, int] = {}
+    by_rank = sorted(range(len(plan)), key=lambda idx: (_department_rank(plan[idx]["agent"], ranks), idx))
+    position = {old: new for new, old in enumerate(by_rank)}
+    ranked = []
+    for old in by_rank:
+        step = dict(plan[old])
+        if "depends_on" in step:
+            step["depends_on"] = [position.get(dep, dep) if isinstance(dep, int) else dep
+                                  for dep in step["depends_on"]]
+        ranked.append(step)
+    resolved = resolve_dependencies(ranked)
+
+    dependents: List[List[int]] = [[] for _ in resolved]
+    for idx, step in enumerate(resolved):
+        for dep in step["depends_on"]:
+            dependents[dep].append(idx)
+    # Longest chain of steps from each step to the end of the plan
+    height = [0] * len(resolved)
+    waiting = [len(step["depends_on"]) for step in resolved]
+    for idx in reversed(_topological(resolved, dependents, list(waiting), lambda i: i)):
+        height[idx] = 1 + max((height[d] for d in dependents[idx]), default=0)
+
+    order = _topological(resolved, dependents, waiting, lambda i: (-height[i], i))
+    position = {old: new for new, old in enumerate(order)}
+    return [{**resolved[old], "depends_on": sorted(position[dep] for dep in resolved[old]["depends_on"])}
+            for old in order]
+
+
+def check_acyclic(plan: List[Dict]) -> None:
+    """Raises PlanCompileError if the resolved plan's depends_on form a cycle."""
+    dependents: List[List[int]] = [[] for _ in plan]
+    for idx, step in enumerate(plan):
+        for dep in step["depends_on"]:
+            dependents[dep].append(idx)
+    _topological(plan, dependents, [len(step["depends_on"]) for step in plan], lambda i: i)
+
+
+def _topological(plan: List[Dict], dependents: List[List[int]], waiting: List[int], priority) -> List[int]:
+    ready = [(priority(idx), idx) for idx, count in enumerate(waiting) if count == 0]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        _, idx = heapq.heappop(ready)
+        order.append(idx)
+        for dependent in dependents[idx]:
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0:
+                heapq.heappush(ready, (priority(dependent), dependent))
+    if len(order) < len(plan):
+        stuck = min(set(range(len(plan))) - set(order))
+        raise PlanCompileError("dependency cycle", step=stuck)
+    return order
+
+
+def compile_plan(steps: List[Dict], request: str = "", notes: Optional[List[str]] = None,
+                 move_steps: bool = False) -> List[Dict]:
+    """Checks, deduplicates and orders a complete plan. Returns it with depends_on resolved."""
+    return order_steps(check_steps(steps, request=request, notes=notes, move_steps=move_steps))
@@ -1,11 +1,75 @@
-import operator
+import os
 from typing import Annotated, List, Dict, Union, Any, Literal
-from typing_extensions import TypedDict
+from typing_extensions import TypedDict, NotRequired
 from langchain_core.messages import SystemMessage, HumanMessage, BaseMessage
 
+# Messages kept in state; older ones are dropped so checkpoints stay small
+MESSAGE_WINDOW = int(os.getenv("TALENTFLOW_MESSAGE_WINDOW", "8"))
+
+def keep_last(n: int):
+    """Reducer factory: appends like operator.add but keeps only the newest n items (n=0 keeps all)."""
+    def reducer(left: List, right: List) -> List:
+        merged = (left or []) + (right or [])
+        return merged[-n:] if n else merged
+    return reducer
+
+def add_or_reset(left: List, right: Union[List, None]) -> List:
+    """Like operator.add, but an explicit None clears the list (used when a new plan starts)."""
+    if right is None:
+        return []
+    return (left or []) + right
+
+def merge_or_reset(left: Dict, right: Union[Dict, None]) -> Dict:
+    """Dict merge where a None value drops its key and an explicit None clears the dict."""
+    if right is None:
+        return {}
+    merged = dict(left or {})
+    for key, value in right.items():
+        if value is None:
+            merged.pop(key, None)
+        else:
+            merged[key] = value
+    return merged
+
+class StepResult(TypedDict):
+    """Compact record of one tool call, kept instead of full message payloads."""
+    step: int
+    tool: str
+    args: Dict[str, Any]
+    output: str
+    latency_ms: float
+
+class PendingApproval(TypedDict):
+    """A parked step: the tool call that was blocked and what an admin must supply to retry it."""
+    step: int
+    agent: str
+    tool: str
+    args: Dict[str, Any]
+    param: str                 # Argument the admin's answer is passed as (e.g. override_auth)
+    reason: str                # Tool output that blocked the step
+    prompt: str                # Question shown to the admin
+    parked_at: float           # Unix time the step was parked
+    override: NotRequired[str] # Set once the admin has answered
+
 class AgentState(TypedDict):
-    messages: Annotated[List[BaseMessage], operator.add]
-    plan: List[Dict]           # The steps to execute
-    current_step: int          # Index of the current step
-    status: str                # 'planning', 'executing', 'paused', 'done'
+    messages: Annotated[List[BaseMessage], keep_last(MESSAGE_WINDOW)]
+    request: str               # The onboarding request the plan was generated from
+    plan: List[Dict]           # The steps to execute, each with resolved `depends_on`
+    completed_steps: Annotated[List[int], add_or_reset]  # Indices of finished steps (parallel-safe)
+    step_results: Annotated[List[StepResult], add_or_reset]  # Compact per-tool-call outcomes
+    pending_approvals: Annotated[Dict[str, PendingApproval], merge_or_reset]  # Parked steps by str(step index)
+    current_step: int          # Number of steps completed so far
+    status: str                # 'planning', 'executing', 'working', 'paused', 'done', 'failed'
     last_error: str            # To track HITL needs
+
+class StepTask(TypedDict):
+    """Payload sent to a worker branch: the ready steps of one department."""
+    plan: List[Dict]
+    step_indices: List[int]
+    approval: NotRequired[PendingApproval]  # Set when re-running a parked step (its only index) with the admin's answer
+
+class PlanTask(TypedDict):
+    """Payload sent to the planner branch while the plan is still streaming."""
+    plan: List[Dict]
+    request: str
+    completed: List[int]       # Steps finished before the current wave
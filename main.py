@@ -6,9 +6,8 @@ from langgraph.types import Command
 # Load environment variables from .env file
 load_dotenv()
 
-# Validate API key is set
-# Validate API key is set
-if not os.getenv("GOOGLE_API_KEY"):
+# Validate API key is set (not needed for the offline fake backend)
+if os.getenv("TALENTFLOW_LLM_BACKEND", "gemini") == "gemini" and not os.getenv("GOOGLE_API_KEY"):
     print("=" * 70)
     print("❌ ERROR: GOOGLE_API_KEY not found!")
     print("=" * 70)
@@ -18,11 +17,19 @@ if not os.getenv("GOOGLE_API_KEY"):
     print("   nano .env")
     print("\n3. Or set it as an environment variable:")
     print("   export GOOGLE_API_KEY='AIza...'")
+    print("\n4. Or run offline with the fake model:")
+    print("   export TALENTFLOW_LLM_BACKEND=fake")
     print("\n" + "=" * 70)
     exit(1)
 
 from graph.graph import app
+from agents.registry import agent_registry
+from agents.llm_cache import llm_cache
+from agents.client_pool import client_pool
+from agents.context_cache import context_cache
 from external_crm_mock.mock import crm
+from telemetry.tracing import format_latency_summary
+from telemetry.events import ConsoleRenderer
 
 
 if __name__ == "__main__":
@@ -43,10 +50,13 @@ if __name__ == "__main__":
     print("\n📋 Processing onboarding request for Sarah Johnson...")
     print("-" * 70)
 
+    # Nodes report progress as typed events on the "custom" stream; the console is one way to show them
+    console = ConsoleRenderer()
+
     # 1. Initial Run (User Request)
-    # Expected: HR → Legal → Finance → IT (pause) → Facilities → Training
-    for event in app.stream(initial_input, thread_config):
-        pass  # Stream output is handled by print statements in nodes
+    # Expected: HR → (Legal, Finance, IT (parked), Training in parallel) → pause → IT retry → Facilities
+    for event in app.stream(initial_input, thread_config, stream_mode="custom"):
+        console(event)
 
     # 2. Inspect State
     state = app.get_state(thread_config)
@@ -55,8 +65,10 @@ if __name__ == "__main__":
         print("⚠️  WORKFLOW IS PAUSED - AWAITING HUMAN INPUT")
         print("=" * 70)
         print(f"📍 Paused at: {state.next}")
-        print(f"📊 Steps completed: {state.values.get('current_step', 0)}/{len(state.values.get('plan', []))}")
+        print(f"📊 Steps completed: {len(state.values.get('completed_steps', []))}/{len(state.values.get('plan', []))}")
         print(f"🔍 Status: {state.values.get('status', 'unknown')}")
+        for approval in state.values.get("pending_approvals", {}).values():
+            print(f"🅿️  Parked: step {approval['step'] + 1} ({approval['agent']}: {approval['tool']}) - {approval['prompt']}")
 
         # 3. Resume (Simulate Admin Override)
         print("\n" + "-" * 70)
@@ -64,8 +76,8 @@ if __name__ == "__main__":
         print("-" * 70 + "\n")
 
         # Resume the workflow
-        for event in app.stream(Command(resume="ADMIN_OVERRIDE"), thread_config):
-            pass
+        for event in app.stream(Command(resume="ADMIN_OVERRIDE"), thread_config, stream_mode="custom"):
+            console(event)
 
     print("\n" + "=" * 70)
     print("🏁 WORKFLOW COMPLETE - ONBOARDING FINISHED")
@@ -74,35 +86,51 @@ if __name__ == "__main__":
     # Display final CRM state
     print("\n📊 FINAL CRM STATE:")
     print("-" * 70)
-    print(f"\n👥 Employees: {len(crm.db['employees'])} registered")
-    for emp in crm.db['employees']:
-        print(f"   • {emp['name']} - {emp['role']} ({emp['email']})")
+    store = crm.store
+    print(f"\n👥 Employees: {len(store.employees)} registered")
+    for emp in store.employees.values():
+        print(f"   • {emp.name} - {emp.role} ({emp.email})")
 
-    print(f"\n📋 Contracts: {len(crm.db['contracts'])} generated")
-    for contract in crm.db['contracts']:
-        print(f"   • {contract['id']}: {contract['employee']} ({contract['type']})")
+    print(f"\n📋 Contracts: {len(store.contracts)} generated")
+    for contract in store.contracts.values():
+        print(f"   • {contract.id}: {contract.employee} ({contract.type})")
 
     print(f"\n💰 Finance:")
-    print(f"   • HR Budget: ${crm.db['budgets']['hr']}")
-    print(f"   • IT Budget: ${crm.db['budgets']['it']}")
-    print(f"   • Facilities Budget: ${crm.db['budgets']['facilities']}")
-    print(f"   • Training Budget: ${crm.db['budgets']['training']}")
+    print(f"   • HR Budget: ${store.budgets['hr']}")
+    print(f"   • IT Budget: ${store.budgets['it']}")
+    print(f"   • Facilities Budget: ${store.budgets['facilities']}")
+    print(f"   • Training Budget: ${store.budgets['training']}")
 
     print(f"\n💻 IT Inventory:")
-    for device, stock in crm.db['inventory'].items():
+    for device, stock in store.inventory.items():
         print(f"   • {device}: {stock} units")
 
     print(f"\n🏢 Facilities:")
-    if crm.db['desk_assignments']:
-        for employee, desk in crm.db['desk_assignments'].items():
-            print(f"   • {employee}: {desk}")
-    if crm.db['access_badges']:
-        for employee, badge_info in crm.db['access_badges'].items():
-            print(f"   • {employee}: {badge_info['badge_id']} ({badge_info['access_level']})")
+    for employee, desk in store.desk_by_employee.items():
+        print(f"   • {employee}: {desk}")
+    for employee, badge in store.badges.items():
+        print(f"   • {employee}: {badge.badge_id} ({badge.access_level})")
 
     print(f"\n📚 Training:")
-    for course, info in crm.db['training_courses'].items():
-        print(f"   • {course}: {info['enrolled']}/{info['capacity']} enrolled")
+    for course in store.courses.values():
+        print(f"   • {course.name}: {course.enrolled}/{course.capacity} enrolled")
+
+    cache_stats = agent_registry.get("Orchestrator").plan_cache.stats()
+    print(f"\n🧠 Plan Cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    if llm_cache is not None:
+        llm_stats = llm_cache.stats()
+        print(f"🧠 LLM Cache: {llm_stats['hits']} hits, {llm_stats['misses']} misses, "
+              f"{llm_stats['latency_saved_s']}s saved")
+    pool_stats = client_pool.stats()
+    print(f"🧠 LLM Pool: {pool_stats['requests']} requests, {pool_stats['retries']} retries, "
+          f"{pool_stats['throttled_s']}s throttled")
+    if context_cache is not None:
+        prefix_stats = context_cache.stats()
+        print(f"🧠 Prompt Prefix Cache: {prefix_stats['created']} created, {prefix_stats['hits']} hits, "
+              f"{prefix_stats['inline']} sent inline")
+
+    print(f"\n⏱️  Latency by node, model call and tool:")
+    print(format_latency_summary())
 
     print("\n" + "=" * 70)
     print("✅ TalentFlow Multi-Department Demo Complete!")
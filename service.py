@@ -0,0 +1,371 @@
+"""
+Local onboarding service.
+
+A plain ASGI app (no web framework) that accepts onboarding requests,
+answers right away with a job id (the graph thread id) and runs the jobs
+on a fixed pool of workers pulling from an in-process queue. When the
+queue is full, new work is refused with 429 and a Retry-After header, so
+overload turns into queueing at the client instead of timeouts.
+
+    POST /onboard                  {"name", "role", "email", "thread_id"?} or {"request": "Onboard ..."}
+    GET  /jobs/{id}                status, steps completed / planned, outcome
+    GET  /jobs/{id}/interrupts     steps waiting for approval
+    POST /jobs/{id}/resume         {"answer": "ADMIN_OVERRIDE"} or {"answers": {"5": "ADMIN_OVERRIDE"}}
+    GET  /health                   queue depth, busy workers, jobs by status
+
+    TALENTFLOW_LLM_BACKEND=fake python service.py --port 8000 --workers 32 --queue-size 256
+
+Steps are numbered as they are displayed, from 1: the "step" of each
+interrupt is the key to answer it by in "answers".
+
+A job's graph thread is deleted from the checkpointer once it completes
+or fails, so a long-running service holds state only for live jobs; the
+job record keeps the final step counts.
+
+Any ASGI server can host `api` (e.g. `uvicorn service:api`); tests can
+drive it in-process with httpx.ASGITransport. Workers start with the
+server's lifespan, or on the first request when there is none.
+"""
+import os
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from langchain_core.messages import HumanMessage
+from langgraph.types import Command
+
+from batch import onboarding_request
+
+load_dotenv()
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict]]
+Send = Callable[[Dict], Awaitable[None]]
+
+# Job statuses; a paused job becomes queued again when it is resumed
+QUEUED, RUNNING, PAUSED, COMPLETED, FAILED = "queued", "running", "paused", "completed", "failed"
+FINISHED = (COMPLETED, FAILED)
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class Job:
+    __slots__ = ("job_id", "request", "status", "submitted_at", "started_at", "finished_at", "runs", "error",
+                 "progress")
+
+    def __init__(self, job_id: str, request: str):
+        self.job_id = job_id
+        self.request = request
+        self.status = QUEUED
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.runs = 0              # Initial run plus one per resume
+        self.error: Optional[str] = None
+        self.progress: Optional[Dict[str, Any]] = None  # Final step counts, once the thread is deleted
+
+    @property
+    def config(self) -> Dict:
+        return {"configurable": {"thread_id": self.job_id}}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__ if field != "progress"}
+
+
+class OnboardingService:
+    """ASGI app: admission control in front of a bounded worker pool running the compiled graph."""
+    def __init__(self, graph_app=None, workers: int = 32, queue_size: int = 256, max_jobs: int = 10000,
+                 retry_after: int = 1):
+        self._graph_app = graph_app
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_jobs = max_jobs
+        self.retry_after = retry_after
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.busy = 0
+        self.rejected = 0
+        self.undeleted = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._routes: List[Tuple[str, Tuple[str, ...], Callable]] = [
+            ("POST", ("onboard",), self.submit),
+            ("GET", ("jobs", None), self.status),
+            ("GET", ("jobs", None, "interrupts"), self.interrupts),
+            ("POST", ("jobs", None, "resume"), self.resume),
+            ("GET", ("health",), self.health),
+        ]
+
+    @property
+    def graph_app(self):
+        # Imported on first use so building the service does not build the graph
+        if self._graph_app is None:
+            from graph.graph import app
+            self._graph_app = app
+        return self._graph_app
+
+    # ----- Worker pool -----
+    def start(self) -> None:
+        """Starts the workers on the running event loop (idempotent)."""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue(self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker(), name=f"onboarding-worker-{i}")
+                       for i in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks, self._queue = [], None
+
+    def _enqueue(self, job: Job, graph_input: Any) -> int:
+        """Admits work or raises 429. Returns the queue depth after admitting it."""
+        try:
+            self._queue.put_nowait((job, graph_input))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise HTTPError(429, f"Queue full ({self.queue_size} waiting), retry later",
+                            {"retry-after": str(self.retry_after)})
+        return self._queue.qsize()
+
+    async def _worker(self) -> None:
+        while True:
+            job, graph_input = await self._queue.get()
+            self.busy += 1
+            try:
+                await self._run(job, graph_input)
+            finally:
+                self.busy -= 1
+                self._queue.task_done()
+
+    async def _run(self, job: Job, graph_input: Any) -> None:
+        """Runs the graph until the thread finishes or pauses and records the outcome."""
+        job.status, job.started_at, job.runs = RUNNING, job.started_at or time.time(), job.runs + 1
+        try:
+            async for _ in self.graph_app.astream(graph_input, job.config):
+                pass
+            state = await self.graph_app.aget_state(job.config)
+            job.progress = _progress(state.values)
+            if state.next:
+                job.status = PAUSED
+            elif state.values.get("last_error"):
+                job.status, job.error = FAILED, state.values["last_error"]
+            else:
+                job.status = COMPLETED
+        except asyncio.CancelledError:
+            _abandon(job.job_id)
+            raise
+        except Exception as e:
+            job.status, job.error = FAILED, f"{type(e).__name__}: {e}"
+            _abandon(job.job_id)
+        if job.status in FINISHED:
+            job.finished_at = time.time()
+            await self._forget(job)
+
+    async def _forget(self, job: Job) -> None:
+        """Deletes a finished job's thread from the checkpointer; the job record outlives it."""
+        try:
+            await self.graph_app.checkpointer.adelete_thread(job.job_id)
+        except Exception:
+            self.undeleted += 1  # Left for checkpoint compaction; reported by /health
+
+    def _remember(self, job: Job) -> None:
+        """Keeps the newest max_jobs jobs, evicting finished ones first."""
+        self.jobs[job.job_id] = job
+        while len(self.jobs) > self.max_jobs:
+            victim = next((key for key, old in self.jobs.items() if old.status in FINISHED), None)
+            if victim is None:
+                break
+            del self.jobs[victim]
+
+    # ----- Endpoints -----
+    async def submit(self, body: Dict) -> Tuple[int, Dict]:
+        if body.get("request"):
+            request = str(body["request"])
+        elif all(body.get(field) for field in ("name", "role", "email")):
+            request = onboarding_request(body)
+        else:
+            raise HTTPError(400, "Expected 'request' or 'name', 'role' and 'email'")
+        job_id = str(body.get("thread_id") or f"onboarding-{uuid.uuid4().hex[:12]}")
+        if job_id in self.jobs and self.jobs[job_id].status not in FINISHED:
+            raise HTTPError(409, f"Job {job_id} is already {self.jobs[job_id].status}")
+
+        job = Job(job_id, request)
+        depth = self._enqueue(job, {"messages": [HumanMessage(content=request)]})
+        self._remember(job)
+        return 202, {"job_id": job_id, "status": job.status, "queue_depth": depth}
+
+    def _job(self, job_id: str) -> Job:
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise HTTPError(404, f"Unknown job {job_id}")
+        return job
+
+    async def status(self, body: Dict, job_id: str) -> Tuple[int, Dict]:
+        job = self._job(job_id)
+        if job.status in FINISHED:
+            progress = job.progress or _progress({})
+        else:
+            progress = _progress((await self.graph_app.aget_state(job.config)).values)
+        return 200, {**job.to_dict(), **progress}
+
+    async def interrupts(self, body: Dict, job_id: str) -> Tuple[int, Dict]:
+        job = self._job(job_id)
+        state = await self.graph_app.aget_state(job.config)
+        pending = [value for task in state.tasks for interrupt in task.interrupts
+                   for value in (interrupt.value if isinstance(interrupt.value, list) else [interrupt.value])]
+        return 200, {"job_id": job_id, "status": job.status, "interrupts": pending}
+
+    async def resume(self, body: Dict, job_id: str) -> Tuple[int, Dict]:
+        job = self._job(job_id)
+        if job.status != PAUSED:
+            raise HTTPError(409, f"Job {job_id} is {job.status}, not paused")
+        if isinstance(body.get("answers"), dict):
+            answer = {str(step): value for step, value in body["answers"].items()}
+        elif "answer" in body:
+            answer = body["answer"]
+        else:
+            raise HTTPError(400, "Expected 'answer' or 'answers'")
+        depth = self._enqueue(job, Command(resume=answer))
+        job.status = QUEUED
+        return 202, {"job_id": job_id, "status": job.status, "queue_depth": depth}
+
+    async def health(self, body: Dict) -> Tuple[int, Dict]:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return 200, {
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self.queue_size,
+            "workers": self.workers,
+            "busy": self.busy,
+            "rejected": self.rejected,
+            "undeleted_threads": self.undeleted,
+            "jobs": counts,
+        }
+
+    # ----- ASGI -----
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        self.start()
+        try:
+            handler, args = self._route(scope["method"], scope["path"])
+            body = await _read_json(receive) if scope["method"] == "POST" else {}
+            status, payload = await handler(body, *args)
+            await _respond(send, status, payload)
+        except HTTPError as e:
+            await _respond(send, e.status, {"error": str(e)}, e.headers)
+        except Exception as e:
+            await _respond(send, 500, {"error": f"{type(e).__name__}: {e}"})
+
+    def _route(self, method: str, path: str) -> Tuple[Callable, List[str]]:
+        parts = tuple(part for part in path.split("/") if part)
+        allowed = False
+        for route_method, pattern, handler in self._routes:
+            if len(pattern) != len(parts) or any(p is not None and p != part for p, part in zip(pattern, parts)):
+                continue
+            if route_method == method:
+                return handler, [part for p, part in zip(pattern, parts) if p is None]
+            allowed = True
+        raise HTTPError(405 if allowed else 404, f"{'Method not allowed' if allowed else 'Not found'}: {path}")
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def _progress(values: Optional[Dict]) -> Dict[str, Any]:
+    values = values or {}
+    return {
+        "steps_completed": len(values.get("completed_steps", [])),
+        "steps_total": len(values.get("plan", [])),
+        "graph_status": values.get("status"),
+        "waiting_for_approval": len(values.get("pending_approvals") or {}),
+    }
+
+
+def _abandon(thread_id: str) -> None:
+    """Returns the CRM holds of a run that ended outside the graph (crash or shutdown)."""
+    from external_crm_mock.mock import crm
+    crm.release_holds(thread_id)
+
+
+async def _read_json(receive: Receive) -> Dict:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    raw = b"".join(chunks)
+    if not raw:
+        return {}
+    try:
+        body = json.loads(raw)
+    except ValueError:
+        raise HTTPError(400, "Body is not valid JSON")
+    if not isinstance(body, dict):
+        raise HTTPError(400, "Body must be a JSON object")
+    return body
+
+
+async def _respond(send: Send, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+    body = json.dumps(payload, default=str).encode()
+    raw_headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    raw_headers += [(key.encode(), value.encode()) for key, value in (headers or {}).items()]
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+api = OnboardingService(
+    workers=int(os.getenv("TALENTFLOW_SERVICE_WORKERS", "32")),
+    queue_size=int(os.getenv("TALENTFLOW_SERVICE_QUEUE_SIZE", "256")),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve onboarding jobs over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=api.workers, help="Jobs run concurrently")
+    parser.add_argument("--queue-size", type=int, default=api.queue_size, help="Jobs waiting before 429s")
+    args = parser.parse_args()
+
+    if os.getenv("TALENTFLOW_LLM_BACKEND", "gemini") == "gemini" and not os.getenv("GOOGLE_API_KEY"):
+        print("❌ ERROR: GOOGLE_API_KEY not found! See README.md for setup.")
+        exit(1)
+    try:
+        import uvicorn
+    except ImportError:
+        print("❌ ERROR: serving needs an ASGI server: pip install uvicorn")
+        exit(1)
+
+    api.workers, api.queue_size = args.workers, args.queue_size
+    print(f"🚀 Onboarding service on http://{args.host}:{args.port} "
+          f"({args.workers} workers, queue of {args.queue_size})")
+    uvicorn.run(api, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Typed progress events from the graph.
+
+Nodes report progress with emit(): the event is a small dict (see
+ProgressEvent) tagged with its thread and time. It goes to two places:
+
+- the run's own LangGraph stream, for callers that ask for it:
+      for event in app.stream(inputs, config, stream_mode="custom"): ...
+- the process-wide event bus, which hands events to subscribers from a
+  daemon thread. Publishing never blocks: with no subscribers it is a
+  no-op, and a full queue drops the event (counted in bus.dropped).
+
+Nothing is printed by the nodes themselves. ConsoleRenderer turns events
+into the familiar progress lines and is just one optional subscriber:
+
+    unsubscribe = event_bus.subscribe(ConsoleRenderer())
+"""
+import sys
+import json
+import time
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Literal, Optional, TextIO
+
+from typing_extensions import TypedDict, NotRequired
+from langgraph.config import get_config, get_stream_writer
+
+EventType = Literal[
+    "plan_requested",   # The orchestrator started planning
+    "plan_compiled",    # The plan compiler fixed something (notes, micros)
+    "plan_created",     # A plan is ready (steps; streaming=True while more steps are coming)
+    "plan_extended",    # A streaming plan grew (added, steps, done)
+    "plan_failed",      # The plan could not be used (error)
+    "routing",          # A wave of steps was fanned out (step_indices, agents, steps, streaming)
+    "step_started",     # A worker took a step (step, agent, action)
+    "tool_result",      # A tool call returned (step, agent, tool, output, latency_ms, blocked)
+    "step_finished",    # A step completed (step, agent)
+    "step_parked",      # A step is waiting for an approval (step, agent, tool, reason)
+    "step_retried",     # A parked step is retried with the admin's answer (step, agent)
+    "paused",           # The thread paused for approvals (step_indices)
+    "resumed",          # An admin answered (step_indices)
+]
+
+
+class ProgressEvent(TypedDict):
+    type: EventType
+    thread_id: str
+    ts: float
+    step: NotRequired[int]             # 0-based plan index
+    step_indices: NotRequired[List[int]]
+    agent: NotRequired[str]
+    agents: NotRequired[List[str]]
+    action: NotRequired[str]
+    tool: NotRequired[str]
+    output: NotRequired[str]
+    latency_ms: NotRequired[float]
+    blocked: NotRequired[bool]         # The output parks the step
+    reason: NotRequired[str]
+    steps: NotRequired[int]            # Plan length
+    added: NotRequired[int]
+    streaming: NotRequired[bool]
+    done: NotRequired[bool]
+    notes: NotRequired[List[str]]
+    micros: NotRequired[float]
+    error: NotRequired[str]
+
+
+Subscriber = Callable[[ProgressEvent], None]
+
+
+class EventBus:
+    """Fans events out to subscribers on a daemon thread; publish() never waits."""
+    def __init__(self, maxsize: int = 10000):
+        self._queue: "queue.Queue[ProgressEvent]" = queue.Queue(maxsize)
+        self._subscribers: List[Subscriber] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    def subscribe(self, subscriber: Subscriber) -> Callable[[], None]:
+        """Adds a subscriber; returns a function that removes it."""
+        with self._lock:
+            self._subscribers = [*self._subscribers, subscriber]
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="event-bus", daemon=True)
+                self._thread.start()
+
+        def unsubscribe():
+            with self._lock:
+                self._subscribers = [s for s in self._subscribers if s is not subscriber]
+        return unsubscribe
+
+    def publish(self, event: ProgressEvent) -> None:
+        if not self._subscribers:
+            return
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Waits until every published event has been delivered. False on timeout."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def _run(self) -> None:
+        while True:
+            event = self._queue.get()
+            for subscriber in self._subscribers:
+                try:
+                    subscriber(event)
+                except Exception:
+                    pass  # A broken subscriber must not stop delivery to the others
+            self._queue.task_done()
+
+
+event_bus = EventBus()
+
+
+def emit(type: EventType, **fields: Any) -> None:
+    """Reports a progress event from inside a graph node."""
+    config = get_config()
+    event: ProgressEvent = {"type": type, "thread_id": config["configurable"].get("thread_id", ""),
+                            "ts": time.time(), **fields}
+    get_stream_writer()(event)
+    event_bus.publish(event)
+
+
+def _step(event: ProgressEvent) -> str:
+    return f"step {event['step'] + 1}"
+
+
+# Console lines per event type; None means the event is not shown
+_FORMATS: Dict[str, Callable[[ProgressEvent], Optional[str]]] = {
+    "plan_requested": lambda e: "\n--- 🧠 ORCHESTRATOR: Generating Plan ---",
+    "plan_compiled": lambda e: "\n".join([f"🧩 Plan compiled in {e['micros']:.0f}µs:",
+                                          *(f"   • {note}" for note in e["notes"])]),
+    "plan_created": lambda e: f"Plan streaming: {e['steps']} step(s) ready, more on the way." if e["streaming"]
+                              else f"Plan created with {e['steps']} steps.",
+    "plan_extended": lambda e: f"\n--- 🧠 PLANNER: +{e['added']} step(s), {e['steps']} planned"
+                               f"{'' if e['done'] else ', still streaming'} ---",
+    "plan_failed": lambda e: f"⚠️ {e['error']}",
+    "routing": lambda e: f"\n--- 🔄 ROUTING: Steps {', '.join(str(i + 1) for i in e['step_indices'])} of "
+                         f"{e['steps']}{'+' if e['streaming'] else ''} -> {', '.join(e['agents'])} ---",
+    "step_started": lambda e: None,
+    "tool_result": lambda e: f"{'🛑' if e.get('blocked') else '✅'} {e['agent']} Output: {e['output']}",
+    "step_finished": lambda e: None,
+    "step_parked": lambda e: f"⏸️  {e['agent']}: {_step(e)} parked ({e['reason']}). The rest of the plan continues.",
+    "step_retried": lambda e: f"▶️  {e['agent']}: retrying {_step(e)} with admin answer",
+    "paused": lambda e: f"⏸️  PAUSING WORKFLOW. {len(e['step_indices'])} step(s) waiting for Admin...",
+    "resumed": lambda e: f"▶️  RESUMING: Received admin answer for step(s) "
+                         f"{', '.join(str(i + 1) for i in e['step_indices'])}",
+}
+
+
+class ConsoleRenderer:
+    """Prints events as progress lines. With show_thread, lines are prefixed by their thread id."""
+    def __init__(self, stream: TextIO = None, show_thread: bool = False):
+        self.stream = stream
+        self.show_thread = show_thread
+
+    def render(self, event: ProgressEvent) -> Optional[str]:
+        line = _FORMATS.get(event["type"], lambda e: None)(event)
+        if line is None or not self.show_thread:
+            return line
+        return "\n".join(f"[{event['thread_id']}] {part}" for part in line.strip("\n").split("\n"))
+
+    def __call__(self, event: ProgressEvent) -> None:
+        line = self.render(event)
+        if line is not None:
+            print(line, file=self.stream or sys.stdout)
+
+
+class JsonlSink:
+    """Appends events to a JSONL file for other tools to consume."""
+    def __init__(self, path: str):
+        self._file = open(path, "a", encoding="utf-8")
+
+    def __call__(self, event: ProgressEvent) -> None:
+        # Runs on the bus thread, so flushing per event costs the graph nothing
+        self._file.write(json.dumps(event, default=str) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
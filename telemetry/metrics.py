@@ -0,0 +1,111 @@
+import bisect
+import threading
+from typing import Dict, List, Tuple, Optional
+
+# Latency bucket upper bounds in milliseconds (last bucket is open-ended)
+LATENCY_BUCKETS_MS = [0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000]
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    """Fixed-bucket histogram: O(log buckets) observe, constant memory."""
+    __slots__ = ("bounds", "counts", "count", "total", "min", "max", "_lock")
+
+    def __init__(self, bounds: List[float] = LATENCY_BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.count += 1
+            self.total += value
+            self.min = min(self.min, value)
+            self.max = max(self.max, value)
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the pct-th observation (capped at the observed max)."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = pct / 100 * self.count
+            seen = 0
+            for i, bucket in enumerate(self.counts):
+                seen += bucket
+                if seen >= rank and bucket:
+                    return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+            return self.max
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+        }
+
+
+class MetricsRegistry:
+    """Process-wide named counters and histograms, keyed by name plus labels."""
+    def __init__(self):
+        self._counters: Dict[Tuple[str, Labels], Counter] = {}
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, metric: str, **labels: str) -> Counter:
+        key = (metric, tuple(sorted(labels.items())))
+        metric = self._counters.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._counters.setdefault(key, Counter())
+        return metric
+
+    def histogram(self, metric: str, **labels: str) -> Histogram:
+        key = (metric, tuple(sorted(labels.items())))
+        metric = self._histograms.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._histograms.setdefault(key, Histogram())
+        return metric
+
+    def snapshot(self, prefix: Optional[str] = None) -> Dict[str, List[Dict]]:
+        """Plain-data view of every metric, optionally filtered by name prefix."""
+        keep = lambda name: prefix is None or name.startswith(prefix)
+        return {
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": c.value}
+                for (name, labels), c in list(self._counters.items()) if keep(name)
+            ],
+            "histograms": [
+                {"name": name, "labels": dict(labels), **h.snapshot()}
+                for (name, labels), h in list(self._histograms.items()) if keep(name)
+            ],
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+registry = MetricsRegistry()
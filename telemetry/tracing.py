@@ -0,0 +1,107 @@
+"""
+Spans around graph nodes, model calls and tool calls.
+
+Every span feeds the in-process metrics registry. When TALENTFLOW_TRACE_FILE
+is set, spans are also appended to that file as JSONL by a background
+writer, so hot paths never block on disk.
+"""
+import os
+import json
+import time
+import queue
+import atexit
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+from telemetry.metrics import registry
+
+
+class TraceExporter:
+    """Batches span records onto a JSONL file from a daemon thread."""
+    def __init__(self, path: str, flush_interval: float = 0.5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._queue: "queue.SimpleQueue[Optional[Dict]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def export(self, record: Dict[str, Any]) -> None:
+        self._queue.put(record)
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        with open(self.path, "a") as f:
+            while True:
+                record = self._queue.get()
+                batch = [record]
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                done = None in batch
+                f.writelines(json.dumps(r, default=str) + "\n" for r in batch if r is not None)
+                f.flush()
+                if done:
+                    return
+                time.sleep(self.flush_interval)
+
+
+_trace_file = os.getenv("TALENTFLOW_TRACE_FILE")
+exporter: Optional[TraceExporter] = TraceExporter(_trace_file) if _trace_file else None
+
+# Exceptions LangGraph uses for control flow (interrupt/resume) are not failures
+_CONTROL_FLOW = {"GraphInterrupt", "NodeInterrupt", "ParentCommand"}
+
+
+@contextmanager
+def span(kind: str, name: str, **attributes: Any):
+    """
+    Times the enclosed block as a `kind` span (node, llm, tool). The yielded
+    dict can be filled with extra attributes such as token counts.
+    """
+    record: Dict[str, Any] = {"kind": kind, "name": name, **attributes}
+    started = time.perf_counter()
+    try:
+        yield record
+        record.setdefault("outcome", "ok")
+    except BaseException as e:
+        record["outcome"] = "interrupted" if type(e).__name__ in _CONTROL_FLOW else "error"
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        _finish(record, (time.perf_counter() - started) * 1000)
+
+
+def record_span(kind: str, name: str, duration_ms: float, **attributes: Any) -> None:
+    """Records a span timed elsewhere, e.g. a model stream consumed across several graph steps."""
+    _finish({"kind": kind, "name": name, "outcome": "ok", **attributes}, duration_ms)
+
+
+def _finish(record: Dict[str, Any], duration_ms: float) -> None:
+    kind, name = record["kind"], record["name"]
+    record["duration_ms"] = round(duration_ms, 3)
+    registry.histogram(f"{kind}.latency_ms", name=name).observe(duration_ms)
+    registry.counter(f"{kind}.calls", name=name, outcome=record["outcome"]).inc()
+    for field in ("input_tokens", "output_tokens", "cached_tokens", "retries"):
+        if record.get(field):
+            registry.counter(f"{kind}.{field}", name=name).inc(record[field])
+    if exporter is not None:
+        record["ts"] = time.time()
+        exporter.export(record)
+
+
+def format_latency_summary() -> str:
+    """One line per node/llm/tool span name with call count and p50/p99 latency."""
+    lines = []
+    for metric in sorted(registry.snapshot()["histograms"], key=lambda m: (m["name"], m["labels"].get("name", ""))):
+        kind = metric["name"].split(".")[0]
+        lines.append(f"   • {kind:<5} {metric['labels'].get('name', ''):<32} "
+                     f"{metric['count']:>6} calls   p50 {metric['p50']:.1f}ms   p99 {metric['p99']:.1f}ms")
+    return "\n".join(lines)
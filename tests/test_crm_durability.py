@@ -0,0 +1,63 @@
+"""
+Durable CRM: holds taken by an onboarding that has not finished yet are
+recovered after a crash, so its devices cannot be handed out twice.
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from external_crm_mock.durability import CRMJournal
+from external_crm_mock.mock import MockCorporateCRM
+
+KEY = "inventory:dell_xps"
+
+
+def open_crm(directory) -> MockCorporateCRM:
+    return MockCorporateCRM(journal_factory=lambda store: CRMJournal(store, str(directory), fsync=False))
+
+
+def crash(crm: MockCorporateCRM) -> None:
+    """Stops the journal without committing or releasing anything in memory."""
+    crm.journal.close()
+
+
+@pytest.mark.parametrize("snapshot", [False, True])
+def test_in_flight_holds_survive_recovery(tmp_path, snapshot):
+    crm = open_crm(tmp_path)
+    stock = crm.reservations.available(KEY)
+    with crm.holding_for("thread-1"):
+        assert crm.provision_hardware("dell_xps").startswith("SUCCESS")
+        assert crm.approve_budget("it", 500, "laptop").startswith("SUCCESS")
+    with crm.holding_for("thread-2"):
+        assert crm.provision_hardware("dell_xps").startswith("SUCCESS")
+    assert crm.release_holds("thread-2") == 1
+    if snapshot:
+        crm.journal.snapshot()
+    crash(crm)
+
+    recovered = open_crm(tmp_path)
+    assert recovered.reservations.available(KEY) == stock - 1
+    assert recovered.reservations.available("budget:it") == 30000 - 500
+
+    # The resumed onboarding finishes: its recovered holds become permanent
+    assert recovered.commit_holds("thread-1") == 2
+    crash(recovered)
+    assert open_crm(tmp_path).reservations.snapshot()[KEY] == {"capacity": 5, "available": stock - 1, "held": 0}
+
+
+def test_recovered_holds_can_be_released(tmp_path):
+    crm = open_crm(tmp_path)
+    stock = crm.reservations.available(KEY)
+    with crm.holding_for("thread-1"):
+        crm.provision_hardware("dell_xps")
+    crash(crm)
+
+    recovered = open_crm(tmp_path)
+    assert recovered.release_holds("thread-1") == 1
+    crash(recovered)
+    assert open_crm(tmp_path).reservations.available(KEY) == stock
@@ -0,0 +1,45 @@
+"""
+Plan template cache: only requests that are nothing but name, role and
+email get a template; any other requirement goes to the model.
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.plan_cache import PlanTemplateCache, extract_hire
+
+HITS = [
+    ("Onboard Sarah Johnson as a Senior Engineer. Email: sarah.johnson@company.com", "macbook_pro"),
+    ("Onboard Sam Lee as a Software Engineer with email sam@x.com.", "macbook_pro"),
+    ("onboard Sam Lee as an Account Executive, email sam@x.com", "dell_xps"),
+    ("Onboard Sam Lee as a Contractor (sam.lee@company.co.uk)", "dell_xps"),
+]
+
+MISSES = [
+    "Onboard Sam Lee as a Software Engineer with a ThinkPad instead of a MacBook. Email: sam@x.com",
+    "Onboard Sam Lee as a Software Engineer with a ThinkPad instead of a MacBook",
+    "Onboard Sam Lee as a Sales Rep, email sam@x.com, no laptop needed",
+    "Onboard Sam Lee as a Software Engineer. Email: sam@x.com. Needs elevated badge access and floor 5 desk",
+    "Onboard Sam Lee as a Software Engineer. Email: sam@x.com, cc boss@x.com",
+    "Onboard Sam Lee as an Account Manager for enterprise sales. Email: sam@x.com",
+]
+
+
+@pytest.mark.parametrize("request_text, device", HITS)
+def test_plain_requests_hit(request_text, device):
+    plan = PlanTemplateCache().lookup(request_text)
+    assert plan is not None
+    assert extract_hire(request_text)["role"] in plan[0]["params"]["role"]
+    assert [step["params"]["device"] for step in plan if step["action"] == "provision_device"] == [device]
+
+
+@pytest.mark.parametrize("request_text", MISSES)
+def test_extra_requirements_miss(request_text):
+    cache = PlanTemplateCache()
+    assert cache.lookup(request_text) is None
+    assert cache.stats()["misses"] == 1
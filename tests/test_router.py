@@ -0,0 +1,60 @@
+"""
+Router outcomes and CRM holds: a finished onboarding keeps what it took,
+one that cannot finish gives it back.
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("TALENTFLOW_LLM_BACKEND", "fake")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langgraph.graph import StateGraph, START, END
+
+from graph.state import AgentState
+from graph.node import node_router
+from external_crm_mock.mock import crm
+
+KEY = "budget:it"
+
+
+def route(thread_id: str, plan, completed):
+    """Runs node_router alone on a thread holding $100 of IT budget; returns its update and the amount kept."""
+    graph = StateGraph(AgentState)
+    graph.add_node("router", node_router)
+    graph.add_edge(START, "router")
+    graph.add_edge("router", END)
+
+    before = crm.reservations.available(KEY)
+    with crm.holding_for(thread_id):
+        assert crm.approve_budget("it", 100, "laptop").startswith("SUCCESS")
+    state = graph.compile().invoke(
+        {"plan": plan, "completed_steps": completed, "pending_approvals": {}, "status": "working"},
+        {"configurable": {"thread_id": thread_id}},
+    )
+    crm.release_holds(thread_id)  # Nothing may be left to release
+    return state, before - crm.reservations.available(KEY)
+
+
+def step(agent: str, depends_on=()):
+    return {"agent": agent, "action": "provision_device", "params": {}, "depends_on": list(depends_on)}
+
+
+def test_done_commits_holds():
+    state, taken = route("router-done", [step("IT")], [0])
+    assert state["status"] == "done" and not state.get("last_error")
+    assert taken == 100
+
+
+@pytest.mark.parametrize("plan, error", [
+    ([step("IT"), step("IT", [2]), step("IT", [1])], "unsatisfiable dependencies"),
+    ([step("IT"), step("Catering", [0])], "No agent for step 2"),
+])
+def test_unfinishable_plan_fails_and_releases_holds(plan, error):
+    state, taken = route("router-failed", plan, [0])
+    assert state["status"] == "failed"
+    assert error in state["last_error"]
+    assert taken == 0
@@ -0,0 +1,103 @@
+"""
+Drives the onboarding service in-process through httpx.ASGITransport,
+with the fake model backend:
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+import asyncio
+
+os.environ.setdefault("TALENTFLOW_LLM_BACKEND", "fake")
+os.environ.setdefault("TALENTFLOW_LLM_CACHE", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from service import OnboardingService
+
+REQUEST = {"name": "Sarah Johnson", "role": "Senior Engineer", "email": "sarah.johnson@company.com"}
+
+
+def run(service: OnboardingService, scenario):
+    """Runs scenario(client) against the service and stops its workers afterwards."""
+    async def main():
+        transport = httpx.ASGITransport(app=service)
+        async with httpx.AsyncClient(transport=transport, base_url="http://service") as client:
+            try:
+                return await scenario(client)
+            finally:
+                await service.stop()
+    return asyncio.run(main())
+
+
+async def wait_for(client: httpx.AsyncClient, job_id: str, *statuses: str, timeout: float = 30.0) -> dict:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        job = (await client.get(f"/jobs/{job_id}")).json()
+        if job["status"] in statuses:
+            return job
+        assert asyncio.get_running_loop().time() < deadline, f"job stuck at {job['status']}"
+        await asyncio.sleep(0.02)
+
+
+def test_pause_resume_and_cleanup():
+    service = OnboardingService(workers=2)
+
+    async def scenario(client):
+        response = await client.post("/onboard", json={**REQUEST, "thread_id": "svc-test-1"})
+        assert response.status_code == 202
+        assert response.json()["job_id"] == "svc-test-1"
+
+        job = await wait_for(client, "svc-test-1", "paused", "completed", "failed")
+        assert job["status"] == "paused", job
+
+        interrupts = (await client.get("/jobs/svc-test-1/interrupts")).json()["interrupts"]
+        assert interrupts and all(item["step"] >= 1 for item in interrupts)
+
+        conflict = await client.post("/onboard", json={**REQUEST, "thread_id": "svc-test-1"})
+        assert conflict.status_code == 409
+
+        answers = {str(item["step"]): "ADMIN_OVERRIDE" for item in interrupts}
+        resumed = await client.post("/jobs/svc-test-1/resume", json={"answers": answers})
+        assert resumed.status_code == 202
+
+        job = await wait_for(client, "svc-test-1", "completed", "failed")
+        assert job["status"] == "completed", job
+        assert job["steps_completed"] == job["steps_total"] > 0
+        assert (await client.post("/jobs/svc-test-1/resume", json={"answer": "x"})).status_code == 409
+
+        # The finished thread no longer holds checkpoints
+        state = await service.graph_app.aget_state({"configurable": {"thread_id": "svc-test-1"}})
+        assert not state.values
+        health = (await client.get("/health")).json()
+        assert health["jobs"] == {"completed": 1} and health["undeleted_threads"] == 0
+
+    run(service, scenario)
+
+
+def test_errors():
+    service = OnboardingService(workers=1)
+
+    async def scenario(client):
+        assert (await client.get("/jobs/nope")).status_code == 404
+        assert (await client.get("/nowhere")).status_code == 404
+        assert (await client.get("/onboard")).status_code == 405
+        assert (await client.post("/onboard", json={"name": "Sam"})).status_code == 400
+        assert (await client.post("/onboard", content=b"{not json")).status_code == 400
+
+    run(service, scenario)
+
+
+def test_full_queue_is_refused_with_retry_after():
+    # No workers, so admitted jobs stay queued and the queue fills up
+    service = OnboardingService(workers=0, queue_size=1, retry_after=3)
+
+    async def scenario(client):
+        assert (await client.post("/onboard", json=REQUEST)).status_code == 202
+        refused = await client.post("/onboard", json=REQUEST)
+        assert refused.status_code == 429
+        assert refused.headers["retry-after"] == "3"
+        assert (await client.get("/health")).json()["rejected"] == 1
+
+    run(service, scenario)
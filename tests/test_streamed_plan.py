@@ -0,0 +1,55 @@
+"""
+Streamed plans: the compiler still catches a dependency cycle once the
+last step has streamed in, instead of the run stalling halfway.
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+os.environ.setdefault("TALENTFLOW_LLM_BACKEND", "fake")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import HumanMessage
+
+from agents.registry import agent_registry
+from graph.graph import compile_app
+
+REQUEST = "Onboard Sam Lee as a Staff Accountant. Email: sam.lee@company.com"
+
+
+class ScriptedStream:
+    """A plan stream that hands out fixed chunks of steps, one per pull()."""
+    def __init__(self, chunks):
+        self._chunks = list(chunks)
+        self.done = not self._chunks
+
+    def pull(self):
+        steps = self._chunks.pop(0) if self._chunks else []
+        self.done = not self._chunks
+        return steps
+
+    async def apull(self):
+        return self.pull()
+
+
+def test_cycle_in_streamed_plan_fails_at_compile(monkeypatch):
+    chunks = [
+        [{"agent": "HR", "action": "create_profile",
+          "params": {"name": "Sam Lee", "role": "Staff Accountant", "email": "sam.lee@company.com"}}],
+        [{"agent": "Legal", "action": "generate_contract", "depends_on": [2],
+          "params": {"employee_name": "Sam Lee", "role": "Staff Accountant", "contract_type": "full-time"}},
+         {"agent": "Legal", "action": "compliance_check", "depends_on": [1],
+          "params": {"employee_name": "Sam Lee", "check_type": "background"}}],
+    ]
+    orchestrator = agent_registry.get("Orchestrator")
+    monkeypatch.setattr(orchestrator, "stream_plan", lambda user_input: ScriptedStream(chunks))
+
+    app = compile_app()
+    config = {"configurable": {"thread_id": "streamed-cycle"}}
+    app.invoke({"messages": [HumanMessage(content=REQUEST)]}, config)
+    state = app.get_state(config).values
+
+    assert state["status"] == "failed"
+    assert "dependency cycle" in state["last_error"]
+    assert state["completed_steps"] == [0]